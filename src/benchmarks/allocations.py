@@ -0,0 +1,70 @@
+# Memory allocated by each generation of the performance EPSO engine
+# usage: python -m benchmarks.allocations [--swarm-size N] [--chromosome-length L] [--generations G] [--dtype D]
+#        [--block-size B]
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from evola.epso.performance_version import _Swarm
+from evola.evaluation import Evaluator
+
+
+def sphere(chromosomes):
+    return np.einsum("ij,ij->j", chromosomes, chromosomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory allocated by each generation of epso()")
+    parser.add_argument("--swarm-size", type=int, default=10000)
+    parser.add_argument("--chromosome-length", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--communication-probability", type=float, default=0.5)
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float64")
+    parser.add_argument("--block-size", type=int, help="Columns per block of a tiled swarm")
+    args = parser.parse_args()
+
+    swarm = _Swarm(
+        Evaluator(sphere, vectorized=True),
+        np.random.default_rng(42),
+        swarm_size=args.swarm_size,
+        chromosome_length=args.chromosome_length,
+        chromosome_low=-5.0,
+        chromosome_high=5.0,
+        wi=0.5,
+        wm=0.5,
+        wc=0.5,
+        communication_probability=args.communication_probability,
+        dtype=args.dtype,
+        block_size=args.block_size,
+    )
+    state_bytes = (
+        swarm.chromosome_matrix.nbytes
+        + swarm.costs.nbytes
+        + sum(buffer.nbytes for buffer in vars(swarm.workspace).values() if isinstance(buffer, np.ndarray))
+    )
+
+    # numpy reports its data buffers to tracemalloc, so the peak above the memory in use before each
+    # generation is what that generation allocated on top of the preallocated swarm state
+    tracemalloc.start()
+    transient = []
+    for generation in range(args.generations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        swarm.reproduce()
+        swarm.move(generation)
+        swarm.select()
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - before)
+    tracemalloc.stop()
+
+    tiling = f", blocks of {swarm.block_size}" if swarm.tiled else ""
+    print(f"Swarm {args.swarm_size} x {args.chromosome_length} ({args.dtype}{tiling}), {args.generations} generations")
+    print(f"\t-> Preallocated state: {state_bytes / 2**20:.1f} MiB")
+    mean_mib, max_mib = np.mean(transient) / 2**20, max(transient) / 2**20
+    print(f"\t-> Temporary memory per generation: {mean_mib:.2f} MiB mean, {max_mib:.2f} MiB max")
+    print(f"\t-> Relative to state: {np.mean(transient) / state_bytes:.2%}")
+
+
+if __name__ == "__main__":
+    main()
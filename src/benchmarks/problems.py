@@ -0,0 +1,67 @@
+# Standard minimization problems for the benchmarks. Every cost function reduces over the first axis,
+# so the same function takes one chromosome (EPSO) or a (dimension, n) block of them (vectorized epso).
+from typing import Callable, Dict, NamedTuple
+
+import numpy as np
+
+from examples.moore import A
+
+WINGO = [0.1, -1.0, -79 / 20, 71 / 10, 39 / 80, -52 / 25, 1.0]  # coefficients of x^0 ... x^6
+MOORE = [0.0] + A  # coefficients of x^0 ... x^50
+
+
+class Problem(NamedTuple):
+    name: str
+    cost_function: Callable
+    low: float
+    high: float
+    optimum_per_gene: float  # optimum for dimension d is d * optimum_per_gene (all of these are 0 or separable)
+    min_dimension: int = 1
+
+    def optimum(self, dimension: int) -> float:
+        return dimension * self.optimum_per_gene
+
+
+def wingo(chromosomes):
+    # The examples' 1-d polynomial, summed over the genes
+    return np.sum(np.polynomial.polynomial.polyval(chromosomes, WINGO), axis=0)
+
+
+def moore(chromosomes):
+    # Moore's degree 50 polynomial, summed over the genes
+    return np.sum(np.polynomial.polynomial.polyval(chromosomes, MOORE), axis=0)
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+def rastrigin(chromosomes):
+    return 10 * chromosomes.shape[0] + np.sum(chromosomes**2 - 10 * np.cos(2 * np.pi * chromosomes), axis=0)
+
+
+def rosenbrock(chromosomes):
+    head, tail = chromosomes[:-1], chromosomes[1:]
+    return np.sum(100 * (tail - head**2) ** 2 + (1 - head) ** 2, axis=0)
+
+
+def ackley(chromosomes):
+    return (
+        -20 * np.exp(-0.2 * np.sqrt(np.mean(chromosomes**2, axis=0)))
+        - np.exp(np.mean(np.cos(2 * np.pi * chromosomes), axis=0))
+        + 20
+        + np.e
+    )
+
+
+PROBLEMS: Dict[str, Problem] = {
+    problem.name: problem
+    for problem in (
+        Problem("wingo", wingo, -2.0, 10.0, -7.487312364902),
+        Problem("moore", moore, 1.0, 2.0, -663.500096610),
+        Problem("sphere", sphere, -5.12, 5.12, 0.0),
+        Problem("rastrigin", rastrigin, -5.12, 5.12, 0.0),
+        Problem("rosenbrock", rosenbrock, -5.0, 10.0, 0.0, min_dimension=2),
+        Problem("ackley", ackley, -32.768, 32.768, 0.0),
+    )
+}
@@ -0,0 +1,188 @@
+# Speed, memory and quality-at-budget of both EPSO engines on the standard problems
+# usage: python -m benchmarks.suite [--problems P ...] [--dimensions D ...] [--swarm-sizes S ...]
+#        [--engines epso EPSO] [--generations G] [--repeats R] [--output results.json] [--compare baseline.json]
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.problems import PROBLEMS, Problem
+from evola.epso import EPSO, epso
+
+ENGINES = ("epso", "EPSO")
+
+
+def _run_epso(problem: Problem, dimension: int, swarm_size: int, generations: int, seed: int) -> float:
+    solution = epso(
+        swarm_size,
+        generations,
+        dimension,
+        problem.low,
+        problem.high,
+        problem.cost_function,
+        vectorized=True,
+        seed=seed,
+    )
+    return float(problem.cost_function(solution))
+
+
+def _run_academic(problem: Problem, dimension: int, swarm_size: int, generations: int, seed: int) -> float:
+    sim = EPSO(
+        generations,
+        swarm_size,
+        dimension,
+        problem.low,
+        problem.high,
+        problem.cost_function,
+        (),
+        seed=seed,
+    )
+    sim.run_cli(verbose=False)
+    return float(sim.best_cost)
+
+
+RUNNERS: Dict[str, Callable[[Problem, int, int, int, int], float]] = {"epso": _run_epso, "EPSO": _run_academic}
+
+
+def benchmark(
+    engine: str, problem: Problem, dimension: int, swarm_size: int, generations: int, repeats: int, seed: int
+) -> dict:
+    run = RUNNERS[engine]
+
+    # Timings and quality over seeded repeats, without tracemalloc (which slows allocations down)
+    seconds, best_costs = [], []
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        best_costs.append(run(problem, dimension, swarm_size, generations, seed + repeat))
+        seconds.append(time.perf_counter() - start)
+
+    # numpy reports its buffers to tracemalloc, so this is the peak Python and numpy memory of one run
+    tracemalloc.start()
+    run(problem, dimension, swarm_size, generations, seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Both engines evaluate the particles and their sons (or first ancestors) once per generation, plus once at start
+    evaluations = 2 * swarm_size * (generations + 1)
+    best_seconds = min(seconds)
+    optimum = problem.optimum(dimension)
+    return dict(
+        engine=engine,
+        problem=problem.name,
+        dimension=dimension,
+        swarm_size=swarm_size,
+        generations=generations,
+        repeats=repeats,
+        seconds=best_seconds,
+        generations_per_second=generations / best_seconds,
+        evaluations_per_second=evaluations / best_seconds,
+        peak_memory_bytes=peak,
+        best_cost_mean=float(np.mean(best_costs)),
+        best_cost_min=float(np.min(best_costs)),
+        optimum=optimum,
+        gap_mean=float(np.mean(best_costs)) - optimum,
+    )
+
+
+def _key(result: dict) -> tuple:
+    return result["engine"], result["problem"], result["dimension"], result["swarm_size"], result["generations"]
+
+
+def compare(results: List[dict], baseline: List[dict]) -> List[str]:
+    # One line per configuration in both runs: speed ratio, memory ratio and quality change against the baseline
+    previous = {_key(result): result for result in baseline}
+    lines = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None:
+            continue
+        lines.append(
+            "%-5s %-10s d=%-3d s=%-5d speed x%.2f | memory x%.2f | gap %.4g -> %.4g"
+            % (
+                *_key(result)[:4],
+                result["generations_per_second"] / old["generations_per_second"],
+                result["peak_memory_bytes"] / max(old["peak_memory_bytes"], 1),
+                old["gap_mean"],
+                result["gap_mean"],
+            )
+        )
+    return lines
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()  # nosec
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Speed, memory and quality-at-budget of EPSO and epso()")
+    parser.add_argument("--problems", nargs="+", choices=list(PROBLEMS), default=list(PROBLEMS))
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[2, 10])
+    parser.add_argument("--swarm-sizes", nargs="+", type=int, default=[20, 100])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--generations", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON results of a previous run (e.g. another commit) to compare with")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.problems:
+        problem = PROBLEMS[name]
+        for dimension in args.dimensions:
+            if dimension < problem.min_dimension:
+                continue
+            for swarm_size in args.swarm_sizes:
+                for engine in args.engines:
+                    result = benchmark(
+                        engine, problem, dimension, swarm_size, args.generations, args.repeats, args.seed
+                    )
+                    results.append(result)
+                    print(
+                        "%-5s %-10s d=%-3d s=%-5d %9.1f gen/s %12.0f eval/s %8.2f MiB  gap %.4g"
+                        % (
+                            engine,
+                            name,
+                            dimension,
+                            swarm_size,
+                            result["generations_per_second"],
+                            result["evaluations_per_second"],
+                            result["peak_memory_bytes"] / 2**20,
+                            result["gap_mean"],
+                        )
+                    )
+
+    if args.output:
+        report = dict(
+            commit=_commit(),
+            python=platform.python_version(),
+            numpy=np.__version__,
+            machine=platform.platform(),
+            seed=args.seed,
+            results=results,
+        )
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        print("\nCompared with %s:" % args.compare)
+        for line in compare(results, baseline):
+            print(line)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import glob
+import json
+import os
+import time
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+STATE_FILE = "state.json"
+
+
+class Checkpoint(NamedTuple):
+    generation: int  # generations run when the checkpoint was saved
+    rng_state: dict  # state of the run's bit generator
+    arrays: Dict[str, np.ndarray]  # copy-on-write memory maps of the saved arrays
+    state: dict  # everything else the engine saved
+
+
+class Checkpointer:
+    """
+    Saves the state of a run to the `path` directory every `every` generations and/or every `seconds` seconds,
+    so it can continue from there (see `resume` in epso and EPSO).
+
+    Arrays are written to .npy memory maps and the rest (generation, random state, ...) to a small JSON file,
+    which is replaced atomically once the arrays are on disk: a run killed while saving leaves the previous
+    checkpoint intact. The directory is dedicated to the run, older .npy files in it are removed.
+    """
+
+    def __init__(self, path: str, every: Optional[int] = None, seconds: Optional[float] = None) -> None:
+        if every is None and seconds is None:
+            raise ValueError("Checkpoint every N generations, every T seconds, or both")
+        if every is not None and every < 1:
+            raise ValueError("every must be at least 1")
+        if seconds is not None and seconds <= 0:
+            raise ValueError("seconds must be positive")
+
+        self.path = path
+        self.every = every
+        self.seconds = seconds
+        self.saves = 0
+        self.start()
+        return
+
+    def start(self) -> None:
+        self._last_save = time.perf_counter()
+        return
+
+    def due(self, generation: int) -> bool:
+        if self.every is not None and generation % self.every == 0:
+            return True
+        return self.seconds is not None and time.perf_counter() - self._last_save >= self.seconds
+
+    def save(self, generation: int, rng: np.random.Generator, arrays: Dict[str, np.ndarray], **state) -> None:
+        os.makedirs(self.path, exist_ok=True)
+
+        files = {}
+        for name, array in arrays.items():
+            files[name] = "%s-%d.npy" % (name, generation)
+            stored = np.lib.format.open_memmap(
+                os.path.join(self.path, files[name]),
+                mode="w+",
+                dtype=array.dtype,
+                shape=array.shape,
+                fortran_order=array.flags.f_contiguous and not array.flags.c_contiguous,
+            )
+            np.copyto(stored, array)
+            stored.flush()
+            del stored
+
+        state = dict(state, generation=generation, rng_state=rng.bit_generator.state, arrays=files)
+        temporary = os.path.join(self.path, STATE_FILE + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump(state, file, default=lambda value: value.tolist())  # SFC64 keeps its state in an array
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, os.path.join(self.path, STATE_FILE))
+
+        for stale in glob.glob(os.path.join(self.path, "*.npy")):
+            if os.path.basename(stale) not in files.values():
+                os.remove(stale)
+
+        self.saves += 1
+        self._last_save = time.perf_counter()
+        return
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    # Arrays are mapped copy-on-write: nothing is read until used, and changes never reach the files
+    try:
+        with open(os.path.join(path, STATE_FILE)) as file:
+            state = json.load(file)
+    except FileNotFoundError as exc:
+        raise ValueError("No checkpoint found in %r" % path) from exc
+
+    arrays = {
+        name: np.load(os.path.join(path, filename), mmap_mode="c") for name, filename in state.pop("arrays").items()
+    }
+    return Checkpoint(state.pop("generation"), state.pop("rng_state"), arrays, state)
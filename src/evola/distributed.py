@@ -0,0 +1,280 @@
+# Evaluation over TCP: a coordinator hands out batches of chromosomes to worker processes on any machine.
+# usage (worker): python -m evola.distributed HOST:PORT package.module:cost_function
+import argparse
+import importlib
+import pickle  # nosec: workers only unpickle what the coordinator they connect to sends
+import socket
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Optional, Set, Tuple
+
+import numpy as np
+
+from evola.evaluation import _evaluate_chunk, evaluate
+
+# Messages start with one of these tags. Worker -> coordinator: PULL (ready for a batch), COST (batch id, n,
+# n costs) and FAIL (batch id, message). Coordinator -> worker: ARGS (size, the pickled cost function arguments,
+# keyword arguments and vectorized flag, sent before a batch whenever they change), EVAL (batch id, rows,
+# columns, the chromosomes column by column) and STOP. Numbers are big endian, chromosomes and costs little
+# endian float64
+PULL = b"PULL"
+COST = b"COST"
+FAIL = b"FAIL"
+ARGS = b"ARGS"
+EVAL = b"EVAL"
+STOP = b"STOP"
+BUFFER_DTYPE = np.dtype("<f8")
+
+_BATCH = struct.Struct("!QII")
+_RESULT = struct.Struct("!QI")
+_SIZE = struct.Struct("!I")
+
+
+def _receive(connection: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        received = connection.recv_into(view)
+        if not received:
+            raise ConnectionError("Connection closed")
+        view = view[received:]
+    return buffer
+
+
+class _Batch:
+    def __init__(self, identifier: int, chromosomes: np.ndarray, arguments: bytes, future: Future) -> None:
+        self.identifier = identifier
+        self.rows, self.columns = chromosomes.shape
+        self.payload = np.asarray(chromosomes, dtype=BUFFER_DTYPE, order="F").tobytes(order="F")
+        self.arguments = arguments  # pickled (cost_function_args, cost_function_kwargs, vectorized)
+        self.future = future
+        self.started = False
+
+
+class Coordinator(Executor):
+    """
+    Executor that sends the evaluation of chromosome blocks to workers connected over TCP (see `serve`), for
+    the `executor` of epso and EPSO. Workers run their own copy of the cost function: the chromosomes travel
+    as raw float64 buffers and the costs come back the same way. The run's cost function arguments, keyword
+    arguments and `vectorized` are pickled and sent to each worker once, and again only when they change.
+
+    Workers pull a batch whenever they are idle, so faster workers take more of them. A worker that
+    disconnects, or takes longer than `timeout` seconds to answer, is dropped and its batch goes back to the
+    front of the queue for another worker. Batches wait for a worker to connect. Shutting down stops the
+    workers and cancels the batches that weren't handed out.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, timeout: Optional[float] = None) -> None:
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.timeout = timeout
+        self.workers = 0  # workers connected now
+        self.lost_workers = 0  # workers dropped while evaluating a batch
+        self.requeued = 0  # batches handed out again after losing their worker
+
+        self._queue: Deque[_Batch] = deque()
+        self._condition = threading.Condition()
+        self._connections: Set[socket.socket] = set()
+        self._batches = 0
+        self._closed = False
+        self._arguments: Optional[Tuple[tuple, dict, bool, bytes]] = None  # last task's, and their pickle
+
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(0.1)  # closing a socket doesn't wake accept(): the acceptor polls instead
+        self.address: Tuple[str, int] = self._listener.getsockname()[:2]
+        self._acceptor = threading.Thread(target=self._accept, daemon=True)
+        self._acceptor.start()
+        return
+
+    @property
+    def _max_workers(self) -> int:
+        # Read by Evaluator to size its chunks
+        return max(self.workers, 1)
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        if fn is not _evaluate_chunk:
+            raise TypeError("Coordinator only evaluates chromosome blocks, got %r" % fn)
+        _, chromosomes, cost_function_args, cost_function_kwargs, vectorized = args[0]
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit batches after shutdown")
+            self._batches += 1
+            arguments = self._pickled_arguments(cost_function_args, cost_function_kwargs, vectorized)
+            self._queue.append(_Batch(self._batches, chromosomes, arguments, future))
+            self._condition.notify()
+        return future
+
+    def _pickled_arguments(self, cost_function_args: tuple, cost_function_kwargs: dict, vectorized: bool) -> bytes:
+        # The evaluator passes the same objects with every block, so they are only pickled once per run
+        last = self._arguments
+        if (
+            last is None
+            or last[0] is not cost_function_args
+            or last[1] is not cost_function_kwargs
+            or last[2] != vectorized
+        ):
+            blob = pickle.dumps((cost_function_args, cost_function_kwargs, vectorized))
+            last = self._arguments = (cost_function_args, cost_function_kwargs, vectorized, blob)
+        return last[3]
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            while self._queue:
+                self._queue.popleft().future.cancel()
+            self._condition.notify_all()
+        self._listener.close()
+        if wait:
+            self._acceptor.join()
+        return
+
+    def summary(self) -> str:
+        return "\t-> Workers: %d connected, %d lost (%d batches requeued)\n" % (
+            self.workers,
+            self.lost_workers,
+            self.requeued,
+        )
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                connection, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:  # listener closed by shutdown
+                return
+            connection.settimeout(None)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # messages are sent whole
+            threading.Thread(target=self._serve_worker, args=(connection,), daemon=True).start()
+
+    def _next_batch(self) -> Optional[_Batch]:
+        # Next batch to hand out, waiting for one. None once shut down
+        with self._condition:
+            while True:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return None
+                batch = self._queue.popleft()
+                if batch.started or batch.future.set_running_or_notify_cancel():
+                    batch.started = True
+                    return batch
+
+    def _serve_worker(self, connection: socket.socket):
+        with self._condition:
+            self.workers += 1
+        batch: Optional[_Batch] = None
+        arguments = None  # last arguments sent to this worker
+        try:
+            while True:
+                tag = _receive(connection, 4)
+                if tag == PULL:
+                    batch = self._next_batch()
+                    if batch is None:
+                        connection.sendall(STOP)
+                        return
+                    frame = EVAL + _BATCH.pack(batch.identifier, batch.rows, batch.columns) + batch.payload
+                    if batch.arguments != arguments:
+                        arguments = batch.arguments
+                        frame = ARGS + _SIZE.pack(len(arguments)) + arguments + frame
+                    connection.sendall(frame)
+                    connection.settimeout(self.timeout)  # from now on, silence means the worker is lost
+                elif tag in (COST, FAIL) and batch is not None:
+                    _answer(connection, tag, batch)
+                    batch = None
+                    connection.settimeout(None)
+                else:
+                    raise ConnectionError("Unexpected message %r" % bytes(tag))
+        except OSError:  # includes connection errors and timeouts
+            if batch is not None:
+                with self._condition:
+                    self.lost_workers += 1
+                    self.requeued += 1
+                    self._queue.appendleft(batch)
+                    self._condition.notify()
+        finally:
+            connection.close()
+            with self._condition:
+                self.workers -= 1
+
+
+def _answer(connection: socket.socket, tag: bytearray, batch: _Batch):
+    # Reads a worker's COST or FAIL message for `batch`, completing its future
+    identifier, size = _RESULT.unpack(_receive(connection, _RESULT.size))
+    if identifier != batch.identifier:
+        raise ConnectionError("Worker answered batch %d, expected %d" % (identifier, batch.identifier))
+    if tag == COST:
+        costs = np.frombuffer(_receive(connection, size * BUFFER_DTYPE.itemsize), dtype=BUFFER_DTYPE)
+        batch.future.set_result(costs.astype(float))
+    else:
+        message = _receive(connection, size).decode(errors="replace")
+        batch.future.set_exception(RuntimeError("Cost function failed on a worker: %s" % message))
+
+
+def serve(address: Tuple[str, int], cost_function: Callable) -> int:
+    """
+    Worker: connects to a Coordinator at `address` and evaluates the batches it pulls with `cost_function` (and
+    the arguments of the run the coordinator sends) until the coordinator stops it or goes away. Returns the
+    number of batches evaluated.
+    """
+    cost_function_args: tuple = tuple()
+    cost_function_kwargs: dict = dict()
+    vectorized = False
+    batches = 0
+    with socket.create_connection(address) as connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                connection.sendall(PULL)
+                tag = _receive(connection, 4)
+                if tag == ARGS:
+                    (size,) = _SIZE.unpack(_receive(connection, _SIZE.size))
+                    cost_function_args, cost_function_kwargs, vectorized = pickle.loads(  # nosec
+                        _receive(connection, size)
+                    )
+                    tag = _receive(connection, 4)
+            except OSError:
+                return batches
+            if tag != EVAL:
+                return batches
+
+            identifier, rows, columns = _BATCH.unpack(_receive(connection, _BATCH.size))
+            buffer = _receive(connection, rows * columns * BUFFER_DTYPE.itemsize)
+            chromosomes = np.frombuffer(buffer, dtype=BUFFER_DTYPE).reshape((rows, columns), order="F")
+            try:
+                costs = evaluate(cost_function, chromosomes, cost_function_args, cost_function_kwargs, vectorized)
+            except Exception as exc:  # reported to the coordinator, which raises it in the run
+                message = repr(exc).encode()
+                connection.sendall(FAIL + _RESULT.pack(identifier, len(message)) + message)
+                continue
+            costs = np.asarray(costs, dtype=BUFFER_DTYPE)
+            connection.sendall(COST + _RESULT.pack(identifier, len(costs)) + costs.tobytes())
+            batches += 1
+
+
+def _address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _import(value: str) -> Callable:
+    module, _, name = value.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluation worker for an evola Coordinator")
+    parser.add_argument("address", type=_address, help="HOST:PORT of the coordinator")
+    parser.add_argument("cost_function", type=_import, help="package.module:function to evaluate with")
+    args = parser.parse_args(argv)
+    batches = serve(args.address, args.cost_function)
+    print("Evaluated %d batches" % batches)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """
     Evolutionary Particle Swarm Optimization
 """
-__all__ = ["EPSO", "epso"]
+__all__ = ["EPSO", "EPSOState", "epso", "epso_async", "epso_batch", "epso_islands", "epso_iter"]
 from .academic_version.simulation import EPSO  # noqa
-from .performance_version import epso
+from .async_version import epso_async
+from .batched import epso_batch
+from .islands import epso_islands
+from .performance_version import EPSOState, epso, epso_iter
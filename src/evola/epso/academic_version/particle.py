@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 
 from evola.solution import Solution
@@ -17,7 +19,54 @@ class EvolutiveParticle(Solution):
 
         return
 
-    def mutate(self):
-        self.wi = self.wi * (1 + 0.1 * np.random.normal())
-        self.wm = self.wm * (1 + 0.1 * np.random.normal())
-        self.wc = self.wc * (1 + 0.1 * np.random.normal())
+    def mutate(self, rng: Optional[np.random.Generator] = None):
+        noise = 1 + 0.1 * (rng.standard_normal(3) if rng is not None else np.random.normal(size=3))
+        self.wi = self.wi * noise[0]
+        self.wm = self.wm * noise[1]
+        self.wc = self.wc * noise[2]
+
+
+class ParticleView(EvolutiveParticle):
+    # Particle stored in the arrays of an EvolutiveSwarm: chromossome, weights and cost are views,
+    # so reading or writing them reads or writes the swarm itself (no copies are made)
+    def __init__(
+        self, chromossome: np.ndarray, weights: np.ndarray, cost: np.ndarray, cost_function, cost_function_args
+    ):
+        self.chromossome = chromossome  # shape (chromossome_length,)
+        self._weights = weights  # shape (3,): wi, wm, wc
+        self._cost = cost  # shape (1,)
+        self._cost_function = cost_function
+        self._cost_function_args = cost_function_args
+        return
+
+    @property
+    def cost(self) -> float:
+        return float(self._cost[0])
+
+    @cost.setter
+    def cost(self, value: float):
+        self._cost[0] = value
+
+    @property
+    def wi(self) -> float:
+        return float(self._weights[0])
+
+    @wi.setter
+    def wi(self, value: float):
+        self._weights[0] = value
+
+    @property
+    def wm(self) -> float:
+        return float(self._weights[1])
+
+    @wm.setter
+    def wm(self, value: float):
+        self._weights[1] = value
+
+    @property
+    def wc(self) -> float:
+        return float(self._weights[2])
+
+    @wc.setter
+    def wc(self, value: float):
+        self._weights[2] = value
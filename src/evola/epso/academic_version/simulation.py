@@ -1,10 +1,66 @@
 import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 from copy import deepcopy
+from itertools import repeat
 from multiprocessing import Queue
-from typing import Callable, List, Optional, Union
+from typing import Callable, List, NamedTuple, Optional, Union
 
+import numpy as np
+
+from evola.checkpoint import Checkpointer, load_checkpoint
 from evola.epso.academic_version.swarm import EvolutiveSwarm
+from evola.evaluation import AsyncEvaluator
+from evola.profiling import Profiler
+from evola.rng import Seed
 from evola.simulation import Simulation
+from evola.stopping import EarlyStopping
+
+
+class ReplicateResult(NamedTuple):
+    best_cost: float
+    best_chromossome: np.ndarray
+    average_cost: float
+    best_history: np.ndarray  # global best cost at the start of each generation
+    average_history: np.ndarray  # average particle cost at the start of each generation
+    stop_reason: Optional[str] = None  # stopping criterion that ended the replicate early, if any
+
+
+def _run_replicate(
+    pop: EvolutiveSwarm,
+    generations: int,
+    stopping: Optional[EarlyStopping] = None,
+    checkpoint: Optional[Checkpointer] = None,
+    resume: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+) -> ReplicateResult:
+    # Runs pop in place. Module level so replicates can be sent to worker processes
+    start = pop.restore(load_checkpoint(resume)) if resume is not None else 0
+    best_history = np.empty(generations - start)
+    average_history = np.empty(generations - start)
+    if stopping is not None:
+        stopping.start(pop.evaluator.evaluations)
+    if checkpoint is not None:
+        checkpoint.start()
+    ran = generations - start
+    for i, generation in enumerate(range(start, generations)):
+        best_history[i] = pop.global_best.cost
+        average_history[i] = pop.average_cost()
+        # EPSO
+        pop.step(profiler)
+        if checkpoint is not None and checkpoint.due(generation + 1):
+            pop.save(checkpoint, generation + 1)
+        if stopping is not None and pop.stop(stopping, pop.evaluator.evaluations):
+            ran = i + 1
+            break
+    pop.last_gen_update()
+    return ReplicateResult(
+        pop.global_best.cost,
+        pop.global_best.chromossome.copy(),
+        pop.average_cost(),
+        best_history[:ran],
+        average_history[:ran],
+        stopping.reason if stopping is not None else None,
+    )
 
 
 class EPSO(Simulation):
@@ -24,6 +80,19 @@ class EPSO(Simulation):
         communication_probability: float = 1.0,
         export_top=0,
         description="",
+        executor: Optional[Executor] = None,
+        n_workers: Optional[int] = None,
+        n_threads: Optional[int] = None,
+        seed: Seed = None,
+        rng: Optional[np.random.Generator] = None,
+        bit_generator: str = "PCG64",
+        cache_size: Optional[int] = None,
+        cache_quantization: Optional[float] = None,
+        deduplicate: bool = False,
+        stopping: Optional[EarlyStopping] = None,
+        checkpoint: Optional[Checkpointer] = None,
+        resume: Optional[str] = None,
+        profiler: Optional[Profiler] = None,
     ) -> None:
         desc = description + " EPSO (p=%.2f)" % communication_probability
 
@@ -39,11 +108,62 @@ class EPSO(Simulation):
             wm,
             wc,
             communication_probability,
+            executor=executor,
+            n_workers=n_workers,
+            n_threads=n_threads,
+            seed=seed,
+            rng=rng,
+            bit_generator=bit_generator,
+            cache_size=cache_size,
+            cache_quantization=cache_quantization,
+            deduplicate=deduplicate,
+            evaluate=resume is None,
         )
 
         super().__init__(generations, pop, desc, export_top)
 
         self.population: EvolutiveSwarm
+        self._cost_function = cost_function
+        self._cost_function_args = cost_function_args
+        self.stopping = stopping
+        self.checkpoint = checkpoint
+        self.resume = resume  # checkpoint directory that runs continue from
+        self.profiler = profiler
+        self.stop_reason: Optional[str] = None  # stopping criterion that ended the last run early, if any
+        return
+
+    def _final_message(self, start, end):
+        message = super()._final_message(start, end) + self.population.evaluator.summary()
+        for report in (self.stopping, self.profiler):
+            if report is not None:
+                message += report.summary()
+        return message
+
+    def _stop(self, pop: EvolutiveSwarm, evaluations: int) -> bool:
+        if self.stopping is None or not pop.stop(self.stopping, evaluations):
+            return False
+        self.stop_reason = self.stopping.reason
+        return True
+
+    def _start(self, pop: EvolutiveSwarm, evaluations: int) -> int:
+        # Resets the stopping criteria and checkpoint timer, returns the generation the run starts from
+        self.stop_reason = None
+        if self.stopping is not None:
+            self.stopping.start(evaluations)
+        if self.checkpoint is not None:
+            self.checkpoint.start()
+        if self.resume is None:
+            return 0
+        return pop.restore(load_checkpoint(self.resume))
+
+    def _check_single_run(self, runs: int):
+        if runs > 1 and (self.checkpoint is not None or self.resume is not None):
+            raise ValueError("Checkpoint and resume apply to a single run, not to replicates")
+        return
+
+    def _save(self, pop: EvolutiveSwarm, generation: int):
+        if self.checkpoint is not None and self.checkpoint.due(generation):
+            pop.save(self.checkpoint, generation)
         return
 
     @property
@@ -66,13 +186,12 @@ class EPSO(Simulation):
         history = []
         start_time = time.time()
 
-        pbar, _ = self._get_pbar_if_tqdm_installed(range(self.generations))
+        start = self._start(self.population, self.population.evaluator.evaluations)
+        pbar, _ = self._get_pbar_if_tqdm_installed(range(start, self.generations))
 
-        for _ in pbar:
+        for generation in pbar:
             # EPSO steps
-            self.population.reproduce()
-            self.population.move()
-            self.population.select()
+            self.population.step(self.profiler)
 
             # Obter o custo melhor da população
             new_data = self.population.global_best.cost
@@ -81,7 +200,12 @@ class EPSO(Simulation):
             # Atualizar gráfico
             self._update_graph(history)
 
+            self._save(self.population, generation + 1)
+            if self._stop(self.population, self.population.evaluator.evaluations):
+                break
+
         self.population.last_gen_update()
+        self.population.close()
 
         end_time = time.time()
 
@@ -97,51 +221,120 @@ class EPSO(Simulation):
         return
 
     def _run_once(self, thread_num):
-        pbar, has_tqdm = self._get_pbar_if_tqdm_installed(range(self.generations), thread_num + 1)
-        pop = deepcopy(self.population)
-        for _ in pbar:
+        pop = next(self.population.spawn(1))
+        start = self._start(pop, pop.evaluator.evaluations)
+        pbar, has_tqdm = self._get_pbar_if_tqdm_installed(range(start, self.generations), thread_num + 1)
+        for generation in pbar:
             # EPSO
             self.cost_history.append(deepcopy(pop.global_best.cost))
             if has_tqdm:
                 pbar.set_description(
                     f"({self.population.size},{self.generations}) C = {pop.global_best.cost:.0f} euros"
                 )
-            pop.reproduce()
-            pop.move()
-            pop.select()
+            pop.step(self.profiler)
+            self._save(pop, generation + 1)
+            if self._stop(pop, pop.evaluator.evaluations):
+                break
         pop.last_gen_update()
         return pop
 
     def _run_multiple(self, itera, thread_num):
         pbar, _ = self._get_pbar_if_tqdm_installed(range(itera), thread_num + 1)
+        replicates = self.population.spawn(itera)
         for _ in pbar:
-            pop = deepcopy(self.population)
-            for _ in range(self.generations):
-                # EPSO
-                pop.reproduce()
-                pop.move()
-                pop.select()
-            pop.last_gen_update()
-            self.best_hist.append(deepcopy(pop.global_best.cost))
-            self.avg_hist.append(pop.average_cost())
+            pop = next(replicates)
+            result = _run_replicate(pop, self.generations, self.stopping, profiler=self.profiler)
+            self.best_hist.append(result.best_cost)
+            self.avg_hist.append(result.average_cost)
+            self.stop_reason = result.stop_reason
         return pop
 
     def _run_no_verbose(self, itera):
-        for _ in range(itera):
-            pop = deepcopy(self.population)
-            for _ in range(self.generations):
-                # EPSO
-                if itera == 1:
-                    self.cost_history.append(deepcopy(pop.global_best.cost))
-                pop.reproduce()
-                pop.move()
-                pop.select()
-            pop.last_gen_update()
-            self.best_hist.append(deepcopy(pop.global_best.cost))
-            self.avg_hist.append(pop.average_cost())
+        for pop in self.population.spawn(itera):
+            result = _run_replicate(pop, self.generations, self.stopping, self.checkpoint, self.resume, self.profiler)
+            if itera == 1:
+                self.cost_history.extend(result.best_history.tolist())
+            self.best_hist.append(result.best_cost)
+            self.avg_hist.append(result.average_cost)
+            self.stop_reason = result.stop_reason
         return pop
 
+    def run_replicates(self, n: int, workers: Optional[int] = None, verbose: bool = False) -> List[ReplicateResult]:
+        """
+        Runs n independent replicates of the simulation, each with its own random stream (see
+        EvolutiveSwarm.spawn), spread over a pool of `workers` processes when given. A single replicate
+        saves to the checkpoint and resumes from `resume` like the other runs.
+        Only the compact results travel back from the workers: they're returned in replicate order,
+        and their best and average costs are appended to best_hist and avg_hist. The profiler, if any,
+        only times replicates that run in process.
+        """
+        self._check_single_run(n)
+        start_time = time.time()
+
+        # Checkpoint and resume are only set for a single replicate (see _check_single_run)
+        options = (self.generations, self.stopping, self.checkpoint, self.resume)
+        replicates = self.population.spawn(n)
+        try:
+            if workers is None or workers == 1:
+                results = [_run_replicate(pop, *options, profiler=self.profiler) for pop in replicates]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_run_replicate, replicates, *map(repeat, options)))
+        finally:
+            self.population.close()
+
+        end_time = time.time()
+
+        self.best_hist.extend(result.best_cost for result in results)
+        self.avg_hist.extend(result.average_cost for result in results)
+        self.best_cost = min(self.best_hist)
+        if verbose:
+            print(self._final_message(start_time, end_time))
+
+        return results
+
+    async def run_async(self, concurrency: int = 10, timeout: Optional[float] = None, verbose=True):
+        """
+        Runs the simulation with an `async def` cost function (e.g. one that queries a simulation server).
+        Each generation's particles are evaluated concurrently, with at most `concurrency` evaluations in
+        flight, and particles whose evaluation exceeds `timeout` seconds get an infinite cost.
+        """
+        evaluator = AsyncEvaluator(
+            self._cost_function, self._cost_function_args, concurrency=concurrency, timeout=timeout
+        )
+
+        start_time = time.time()
+
+        if not self.population.evaluated and self.resume is None:
+            await self.population.initialize_async(evaluator)
+        pop = next(self.population.spawn(1))
+        start = self._start(pop, evaluator.evaluations)
+        for generation in range(start, self.generations):
+            # EPSO
+            self.cost_history.append(pop.global_best.cost)
+            pop.reproduce()
+            await pop.move_async(evaluator)
+            pop.select()
+            self._save(pop, generation + 1)
+            if self._stop(pop, evaluator.evaluations):
+                break
+        pop.last_gen_update()
+
+        end_time = time.time()
+        pop.close()
+
+        self.best_cost = pop.global_best.cost
+        if verbose:
+            print(self._final_message(start_time, end_time) + evaluator.summary())
+
+        self.population = pop
+
+        if self.export_top > 0:
+            self.export(self.export_top)
+        return
+
     def run_cli(self, q: Optional[Queue] = None, thread_num=0, verbose=True, itera=1):
+        self._check_single_run(itera)
 
         start_time = time.time()
 
@@ -154,6 +347,7 @@ class EPSO(Simulation):
             pop = self._run_no_verbose(itera)
 
         end_time = time.time()
+        pop.close()
 
         if itera == 1:
             self.best_cost = pop.global_best.cost
@@ -1,11 +1,64 @@
+from concurrent.futures import Executor
 from copy import deepcopy
-from operator import attrgetter
-from typing import Callable, List, Tuple, Union
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
-from evola.epso.academic_version.particle import EvolutiveParticle
+from evola.checkpoint import Checkpoint, Checkpointer
+from evola.epso.academic_version.particle import ParticleView
+from evola.evaluation import AsyncEvaluator, Evaluator, is_async
 from evola.population import Population
+from evola.profiling import Profiler
+from evola.rng import Seed, generator_seed_sequence, seed_sequence, spawn_rngs
+from evola.stopping import EarlyStopping
+
+# The swarm is stored as a structure of arrays, the first axis selects one of these groups
+PARTICLES = 0
+ANCESTORS = 1
+BEST_ANCESTORS = 2
+
+# Columns of the weights arrays
+WI = 0
+WM = 1
+WC = 2
+
+
+def _validate_genes(
+    chromossome_length: int,
+    chromossome_low: Union[List[Union[float, int]], Union[float, int]],
+    chromossome_high: Union[List[Union[float, int]], Union[float, int]],
+    chromossome_dtypes: Union[List[type], type],
+) -> Tuple[list, list, List[type]]:
+    # Bounds and types of every gene, expanding the ones given for all genes at once
+    if not isinstance(chromossome_low, list):
+        chromossome_low = [chromossome_low] * chromossome_length
+    if not isinstance(chromossome_high, list):
+        chromossome_high = [chromossome_high] * chromossome_length
+    if not isinstance(chromossome_dtypes, list):
+        chromossome_dtypes = [chromossome_dtypes] * chromossome_length
+
+    if len(chromossome_dtypes) != chromossome_length:
+        raise ValueError("Chromossome types list must be same length of chromossome")
+
+    if len(chromossome_low) != chromossome_length:
+        raise ValueError("Chromossome lower bounds must be same length of chromossome")
+
+    if len(chromossome_high) != chromossome_length:
+        raise ValueError("Chromossome higher bounds must be same length of chromossome")
+    return chromossome_low, chromossome_high, chromossome_dtypes
+
+
+def _gene_bounds(chromossome_low: list, chromossome_high: list, chromossome_dtypes: List[type]):
+    # Bounds as arrays, with the ones of integer genes rounded inwards so they only hold whole numbers in the domain
+    low = np.array(chromossome_low, dtype=float)
+    high = np.array(chromossome_high, dtype=float)
+    integer = np.array([np.issubdtype(_type, np.integer) for _type in chromossome_dtypes])
+    low = np.where(integer, np.ceil(low), low)
+    high = np.where(integer, np.floor(high), high)
+    if np.any(low > high):
+        raise ValueError("Integer genes need a whole number between their lower and higher bounds")
+    return low, high
 
 
 class EvolutiveSwarm(Population):
@@ -22,127 +75,219 @@ class EvolutiveSwarm(Population):
         wm: float,
         wc: float,
         communication_p: float,
+        executor: Optional[Executor] = None,
+        n_workers: Optional[int] = None,
+        n_threads: Optional[int] = None,
+        seed: Seed = None,
+        rng: Optional[np.random.Generator] = None,
+        bit_generator: str = "PCG64",
+        cache_size: Optional[int] = None,
+        cache_quantization: Optional[float] = None,
+        deduplicate: bool = False,
+        evaluate: bool = True,
     ):
+        if seed is not None and rng is not None:
+            raise ValueError("Use either seed or rng, not both")
+
         self.size = swarm_size
         self.gen = 0  # generation counter (for wi)
         self._communication_p = communication_p  # communication probability
         self._chromossome_length = chromossome_length
-        if not isinstance(chromossome_low, list):
-            chromossome_low = [chromossome_low] * chromossome_length
-        if not isinstance(chromossome_high, list):
-            chromossome_high = [chromossome_high] * chromossome_length
+        chromossome_low, chromossome_high, chromossome_dtypes = _validate_genes(
+            chromossome_length, chromossome_low, chromossome_high, chromossome_dtypes
+        )
 
-        self._chromossome_low = chromossome_low
-        self._chromossome_high = chromossome_high
         self._cost_function = cost_function
         self._cost_function_args = cost_function_args
+        self._async = is_async(cost_function)
+        self._evaluator = Evaluator(
+            cost_function,
+            cost_function_args,
+            executor=executor,
+            n_workers=n_workers,
+            n_threads=n_threads,
+            cache_size=cache_size,
+            cache_quantization=cache_quantization,
+            deduplicate=deduplicate,
+        )
+
+        # Replicates of this swarm draw from child streams of this seed sequence (see spawn), the given rng's when
+        # there is one
+        self._seed_sequence = seed_sequence(seed) if rng is None else generator_seed_sequence(rng)
+        self._bit_generator = bit_generator
+        self._rng = rng if rng is not None else spawn_rngs(self._seed_sequence, 1, bit_generator)[0]
+
+        self._chromossome_low, self._chromossome_high = _gene_bounds(
+            chromossome_low, chromossome_high, chromossome_dtypes
+        )
 
-        if not isinstance(chromossome_dtypes, list):
-            chromossome_dtypes = [chromossome_dtypes] * chromossome_length
+        self._rand_function = self._rand_functions(chromossome_dtypes)
+        self._chromossome_dtypes: List[type] = chromossome_dtypes
+
+        # Genes that are not float are typecast after moving, one whole column per dtype
+        self._casts: List[Tuple[type, np.ndarray]] = [
+            (_type, np.array([i for i, t in enumerate(chromossome_dtypes) if t is _type]))
+            for _type in dict.fromkeys(chromossome_dtypes)
+            if _type is not float
+        ]
+
+        # Room for the sons that reproduce() appends to the swarm, so no generation reallocates
+        capacity = swarm_size * 2
+        self._chromossomes = np.zeros((3, capacity, chromossome_length))
+        self._weights = np.zeros((3, capacity, 3))
+        self._costs = np.zeros((3, capacity))
+
+        # All the normal draws of a generation (mutation and movement), filled by a single call
+        self._normals = np.zeros(swarm_size * 3 + 2 * capacity * chromossome_length)
 
-        if len(chromossome_dtypes) != chromossome_length:
-            raise ValueError("Chromossome types list must be same length of chromossome")
+        self._init_particles(swarm_size, wi, wm, wc)
 
-        if len(chromossome_low) != chromossome_length:
-            raise ValueError("Chromossome lower bounds must be same length of chromossome")
+        # Best particle, kept apart because the swarm arrays are overwritten every generation
+        self._global_best_chromossome = np.zeros(chromossome_length)
+        self._global_best_weights = np.zeros(3)
+        self._global_best_cost = np.zeros(1)
 
-        if len(chromossome_high) != chromossome_length:
-            raise ValueError("Chromossome higher bounds must be same length of chromossome")
+        # Async cost functions can't be awaited here: initialize_async evaluates the first particles.
+        # Swarms that will be restored from a checkpoint aren't evaluated at all
+        self.evaluated = False
+        if evaluate and not self._async:
+            self._set_initial_costs(self._evaluator(self._initial_chromossomes().T))
 
+        return
+
+    def _rand_functions(self, chromossome_dtypes: List[type]) -> List[Callable]:
+        # Draw of each gene's initial values
         rand_function: List[Callable] = []
         for _type in chromossome_dtypes:
-            if isinstance(_type, int):
-                rand_function.append(np.random.randint)
+            if np.issubdtype(_type, np.integer):  # whole numbers within the bounds, both included
+                rand_function.append(partial(self._rng.integers, endpoint=True))
             else:  # by default, float chromossome value
-                rand_function.append(np.random.uniform)
+                rand_function.append(self._rng.uniform)
+        return rand_function
 
-        self._rand_function = rand_function
-        self._chromossome_dtypes: List[type] = chromossome_dtypes
+    def _init_particles(self, swarm_size: int, wi: float, wm: float, wc: float):
+        # Generate particles and ancestors randomly
+        chromossomes = np.zeros((2 * swarm_size, self._chromossome_length))
+        for i in range(self._chromossome_length):
+            chromossomes[:, i] = self._rand_function[i](
+                low=self._chromossome_low[i], high=self._chromossome_high[i], size=2 * swarm_size
+            )
 
-        particles, ancestors = self._init_particles(
-            swarm_size,
-            chromossome_length,
-            rand_function,
-            chromossome_low,
-            chromossome_high,
-            cost_function,
-            cost_function_args,
-            wi,
-            wm,
-            wc,
-        )
+        self._chromossomes[ANCESTORS, :swarm_size] = chromossomes[:swarm_size]
+        self._chromossomes[PARTICLES, :swarm_size] = chromossomes[swarm_size:]
+        self._weights[:, :swarm_size] = (wi, wm, wc)
+        return
+
+    def _initial_chromossomes(self) -> np.ndarray:
+        # Ancestors and particles, evaluated in a single batch
+        return np.concatenate((self._chromossomes[ANCESTORS, : self.size], self._chromossomes[PARTICLES, : self.size]))
 
-        self.ancestors: List[EvolutiveParticle] = ancestors
-        self.best_ancestors: List[EvolutiveParticle] = deepcopy(ancestors)
-        self.particles: List[EvolutiveParticle] = particles
+    def _set_initial_costs(self, costs: np.ndarray):
+        size = self.size
+        self._costs[ANCESTORS, :size] = costs[:size]
+        self._costs[PARTICLES, :size] = costs[size:]
 
-        sorted = min(self.ancestors, key=attrgetter("cost"))
-        self.global_best = deepcopy(sorted)  # best particle
+        self._chromossomes[BEST_ANCESTORS] = self._chromossomes[ANCESTORS]
+        self._costs[BEST_ANCESTORS] = self._costs[ANCESTORS]
 
+        self._update_global_best(ANCESTORS)
+        self.evaluated = True
         return
 
-    @staticmethod
-    def _init_particles(
-        swarm_size,
-        chromossome_length,
-        rand_function,
-        chromossome_low,
-        chromossome_high,
-        cost_function,
-        cost_function_args,
-        wi,
-        wm,
-        wc,
-    ) -> Tuple[List[EvolutiveParticle], List[EvolutiveParticle]]:
-        # Generate particles and ancestors randomly
-        ancestors: List[EvolutiveParticle] = []
-        particles: List[EvolutiveParticle] = []
-
-        for _ in range(swarm_size):
-            chromossome1 = np.zeros(chromossome_length)
-            chromossome2 = np.zeros(chromossome_length)
-            for i in range(chromossome_length):
-                chromossome1[i] = rand_function[i](low=chromossome_low[i], high=chromossome_high[i])
-                chromossome2[i] = rand_function[i](low=chromossome_low[i], high=chromossome_high[i])
-
-            ancestors.append(
-                EvolutiveParticle(
-                    chromossome1,
-                    cost_function,
-                    cost_function_args,
-                    wi,
-                    wm,
-                    wc,
-                )
-            )
-            particles.append(
-                EvolutiveParticle(
-                    chromossome2,
-                    cost_function,
-                    cost_function_args,
-                    wi,
-                    wm,
-                    wc,
-                )
-            )
+    async def initialize_async(self, evaluator: AsyncEvaluator):
+        self._set_initial_costs(await evaluator(self._initial_chromossomes().T))
+        return
+
+    def _view(self, group: int, index: int) -> ParticleView:
+        return ParticleView(
+            self._chromossomes[group, index],
+            self._weights[group, index],
+            self._costs[group, index : index + 1],  # noqa
+            self._cost_function,
+            self._cost_function_args,
+        )
+
+    def _views(self, group: int) -> List[ParticleView]:
+        return [self._view(group, i) for i in range(self.size)]
 
-        return particles, ancestors
+    @property
+    def particles(self) -> List[ParticleView]:
+        return self._views(PARTICLES)
+
+    @property
+    def ancestors(self) -> List[ParticleView]:
+        return self._views(ANCESTORS)
+
+    @property
+    def best_ancestors(self) -> List[ParticleView]:
+        return self._views(BEST_ANCESTORS)
+
+    @property
+    def evaluator(self) -> Evaluator:
+        return self._evaluator
 
     @property
     def elements(self):
         return self.particles
 
+    @property
+    def global_best(self) -> ParticleView:  # type: ignore[override]
+        return ParticleView(
+            self._global_best_chromossome,
+            self._global_best_weights,
+            self._global_best_cost,
+            self._cost_function,
+            self._cost_function_args,
+        )
+
+    def _update_global_best(self, group: int):
+        best = np.argmin(self._costs[group, : self.size])
+        self._global_best_chromossome[:] = self._chromossomes[group, best]
+        self._global_best_weights[:] = self._weights[group, best]
+        self._global_best_cost[0] = self._costs[group, best]
+        return best
+
+    def stop(self, stopping: EarlyStopping, evaluations: int) -> bool:
+        # Checks the stopping criteria after a generation (the global best lags the particles by one move)
+        costs = self._costs[PARTICLES, : self.size]
+        best_cost = min(float(self._global_best_cost[0]), float(np.min(costs)))
+        return stopping.update(best_cost, self._chromossomes[PARTICLES, : self.size], evaluations)
+
+    def average_cost(self):
+        return float(np.mean(self._costs[PARTICLES, : self.size]))
+
+    def spawn(self, n: int) -> Iterator["EvolutiveSwarm"]:
+        # Independent copies of this swarm (e.g. for replicates), each one with its own random stream
+        for rng in spawn_rngs(self._seed_sequence, n, self._bit_generator):
+            swarm = deepcopy(self)
+            swarm._rng = rng
+            yield swarm
+
+    def _generation_noise(self, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Views of the generation normals: weights mutation, best ancestor and global best terms
+        weights_size = size * 3
+        moving_size = size * 2 * self._chromossome_length
+        moving_shape = (size * 2, self._chromossome_length)
+        return (
+            self._normals[:weights_size].reshape((size, 3)),
+            self._normals[weights_size : weights_size + moving_size].reshape(moving_shape),  # noqa
+            self._normals[weights_size + moving_size :].reshape(moving_shape),  # noqa
+        )
+
     def reproduce(self):
+        size = self.size
+        self._rng.standard_normal(out=self._normals)
+        weights_noise, _, _ = self._generation_noise(size)
 
         # Append a copy of the swarm to itself
-        sons = deepcopy(self.particles)
-        son: EvolutiveParticle
-        for son in sons:
-            son.mutate()
+        self._chromossomes[:, size : 2 * size] = self._chromossomes[:, :size]  # noqa
+        self._weights[:, size : 2 * size] = self._weights[:, :size]  # noqa
+        self._costs[:, size : 2 * size] = self._costs[:, :size]  # noqa
 
-        self.particles.extend(sons)
-        self.ancestors.extend(self.ancestors)
-        self.best_ancestors.extend(self.best_ancestors)
+        # Mutate the sons' weights
+        weights_noise *= 0.1
+        weights_noise += 1
+        self._weights[PARTICLES, size : 2 * size] *= weights_noise  # noqa
 
         # Swarm doubles it's size
         self.size = self.size * 2
@@ -153,101 +298,149 @@ class EvolutiveSwarm(Population):
 
         # Population reduces in half
         self.size = int(self.size / 2)
+        size = self.size
 
         # Overwrite parents, ancestors and best ancestors if children perform better after swarm moves
-        for i in range(self.size):
-            if self.particles[i].cost > self.particles[i + self.size].cost:
-                self.particles[i] = deepcopy(self.particles[i + self.size])
-                self.ancestors[i] = deepcopy(self.ancestors[i + self.size])
-                self.best_ancestors[i] = deepcopy(self.best_ancestors[i + self.size])
+        sons_are_better = self._costs[PARTICLES, :size] > self._costs[PARTICLES, size : 2 * size]  # noqa
+        for array in (self._chromossomes, self._weights, self._costs):
+            parents = array[:, :size]
+            parents[:, sons_are_better] = array[:, size : 2 * size][:, sons_are_better]  # noqa
 
-        # Only first half of the swarm survives
-        self.particles = self.particles[: self.size]
-        self.ancestors = self.ancestors[: self.size]
-        self.best_ancestors = self.best_ancestors[: self.size]
+        # Only first half of the swarm survives (the second half is overwritten on the next reproduce)
 
         return
 
-    def _constrain(self, chromossome: np.ndarray):
-        for i in range(len(chromossome)):
-            if chromossome[i] > self._chromossome_high[i]:
-                chromossome[i] = self._chromossome_high[i]
-            elif chromossome[i] < self._chromossome_low[i]:
-                chromossome[i] = self._chromossome_low[i]
-        return chromossome
+    def _constrain(self, chromossomes: np.ndarray):
+        return np.clip(chromossomes, self._chromossome_low, self._chromossome_high, out=chromossomes)
+
+    def step(self, profiler: Optional[Profiler] = None):
+        # One EPSO generation, with its phases timed by the profiler if given
+        if profiler is None:
+            self.reproduce()
+            self.move()
+            self.select()
+            return
+        if self._async:
+            raise RuntimeError("Swarms with an async cost function must be run with EPSO.run_async")
+        profiler.run("reproduce", self.reproduce)
+        new_chromossomes = profiler.run("move", self._displace)
+        costs = profiler.evaluate(self._evaluator, new_chromossomes.T)
+        profiler.run("move", self._settle, new_chromossomes, costs)
+        profiler.run("select", self.select)
+        profiler.end_generation()
+        return
 
     def move(self):
+        if self._async:
+            raise RuntimeError("Swarms with an async cost function must be run with EPSO.run_async")
+        new_chromossomes = self._displace()
+        # Evaluate the whole new generation at once, so it can be spread over workers
+        self._settle(new_chromossomes, self._evaluator(new_chromossomes.T))
+        return
+
+    async def move_async(self, evaluator: AsyncEvaluator):
+        new_chromossomes = self._displace()
+        self._settle(new_chromossomes, await evaluator(new_chromossomes.T))
+        return
+
+    def _displace(self) -> np.ndarray:
+        # Applies the movement rule, returning the new particles to evaluate
 
         self.gen = self.gen + 1  # Increment nº of generations
 
-        # Create new generation
-        new_particles = []
-
-        # Move swarm
-        for i in range(self.size):
-            chromossome = np.zeros(len(self.particles[i].chromossome))
-
-            # Create probability of alllowing the particle to move on each dimension of the global best
-            if self._communication_p == 1:
-                communication_matrix = np.ones(len(self.particles[i].chromossome))
-            else:
-                communication_matrix = np.random.choice(
-                    [0, 1],
-                    len(self.particles[i].chromossome),
-                    p=[1 - self._communication_p, self._communication_p],
-                )
+        size = self.size
+        particles = self._chromossomes[PARTICLES, :size]
+        weights = self._weights[PARTICLES, :size]
+        _, memory_noise, cooperation_noise = self._generation_noise(size // 2)
+
+        # Create probability of alllowing each particle to move on each dimension of the global best
+        communication_matrix: np.ndarray
+        if self._communication_p == 1:
+            communication_matrix = np.ones(particles.shape)
+        else:
+            communication_matrix = self._rng.random(particles.shape) < self._communication_p
+
+        # Apply deviation to the whole swarm at once
+        deviation = 1 / self.gen * weights[:, WI, np.newaxis] * (particles - self._chromossomes[ANCESTORS, :size])
+        deviation += memory_noise * weights[:, WM, np.newaxis] * (self._chromossomes[BEST_ANCESTORS, :size] - particles)
+        deviation += (
+            communication_matrix
+            * cooperation_noise
+            * weights[:, WC, np.newaxis]
+            * (self._global_best_chromossome - particles)
+        )
+        new_chromossomes = particles + deviation
 
-            # Apply deviation, one dimention at a time
-            for j in range(len(self.particles[i].chromossome)):
-                deviation = (
-                    1
-                    / self.gen
-                    * self.particles[i].wi
-                    * (self.particles[i].chromossome[j] - self.ancestors[i].chromossome[j])
-                )
-                deviation = deviation + np.random.normal() * self.particles[i].wm * (
-                    self.best_ancestors[i].chromossome[j] - self.particles[i].chromossome[j]
-                )
-                deviation = deviation + communication_matrix[j] * np.random.normal() * self.particles[i].wc * (
-                    self.global_best.chromossome[j] - self.particles[i].chromossome[j]
-                )
-                chromossome[j] = self._chromossome_dtypes[j](self.particles[i].chromossome[j] + deviation)
-                # in this last line we typecast to correct chromossome dtype
-
-            # Apply chromossome value ceiling and floor
-            chromossome = self._constrain(chromossome)
-
-            new_particles.append(
-                EvolutiveParticle(
-                    chromossome,
-                    self._cost_function,
-                    self._cost_function_args,
-                    self.particles[i].wi,
-                    self.particles[i].wm,
-                    self.particles[i].wc,
-                )
-            )
+        # Typecast to correct chromossome dtype
+        for _type, genes in self._casts:
+            new_chromossomes[:, genes] = new_chromossomes[:, genes].astype(_type)
+
+        # Apply chromossome value ceiling and floor
+        self._constrain(new_chromossomes)
+        return new_chromossomes
+
+    def _settle(self, new_chromossomes: np.ndarray, costs: np.ndarray):
+        size = self.size
+        particles = self._chromossomes[PARTICLES, :size]
+        weights = self._weights[PARTICLES, :size]
 
         # Current generation is now ancestor generation
-        self.ancestors = deepcopy(self.particles)
+        self._chromossomes[ANCESTORS, :size] = particles
+        self._weights[ANCESTORS, :size] = weights
+        self._costs[ANCESTORS, :size] = self._costs[PARTICLES, :size]
 
         # Update best ancestors according to new generation of ancestors
-        for i in range(len(self.best_ancestors)):
-            if self.ancestors[i].cost < self.best_ancestors[i].cost:
-                self.best_ancestors[i] = deepcopy(self.ancestors[i])
+        improved = self._costs[ANCESTORS, :size] < self._costs[BEST_ANCESTORS, :size]
+        for array in (self._chromossomes, self._weights, self._costs):
+            array[BEST_ANCESTORS, :size][improved] = array[ANCESTORS, :size][improved]
 
-        # Update new generation particles
-        self.particles = new_particles
+        # Update new generation particles (weights are kept)
+        self._chromossomes[PARTICLES, :size] = new_chromossomes
+        self._costs[PARTICLES, :size] = costs
 
         # Update global best
-        best = min(self.ancestors, key=attrgetter("cost"))
-        self.global_best = deepcopy(best)
+        self._update_global_best(ANCESTORS)
+
+        return
 
+    def _checkpoint_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "chromossomes": self._chromossomes,
+            "weights": self._weights,
+            "costs": self._costs,
+            "global_best_chromossome": self._global_best_chromossome,
+            "global_best_weights": self._global_best_weights,
+            "global_best_cost": self._global_best_cost,
+        }
+
+    def save(self, checkpointer: Checkpointer, generation: int):
+        checkpointer.save(generation, self._rng, self._checkpoint_arrays(), size=self.size, gen=self.gen)
+        return
+
+    def restore(self, checkpoint: Checkpoint) -> int:
+        # Continues from a checkpoint. Returns the generations already run
+        for name, array in self._checkpoint_arrays().items():
+            saved = checkpoint.arrays[name]
+            if saved.shape != array.shape:
+                raise ValueError(
+                    "Checkpoint %s have shape %s, expected %s for this swarm size and chromossome length"
+                    % (name, saved.shape, array.shape)
+                )
+            np.copyto(array, saved)
+        self.size = checkpoint.state["size"]
+        self.gen = checkpoint.state["gen"]
+        self._rng.bit_generator.state = checkpoint.rng_state
+        self.evaluated = True
+        return checkpoint.generation
+
+    def close(self):
+        # Releases the evaluation worker pool, if any
+        self._evaluator.close()
         return
 
     def last_gen_update(self):
         # Must run after last generation
-        newbest = min(self.particles, key=attrgetter("cost"))
-        if newbest.cost < self.global_best.cost:
-            self.global_best = newbest
+        best = np.argmin(self._costs[PARTICLES, : self.size])
+        if self._costs[PARTICLES, best] < self._global_best_cost[0]:
+            self._update_global_best(PARTICLES)
         return
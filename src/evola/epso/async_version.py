@@ -0,0 +1,71 @@
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+
+from evola.epso.performance_version import _check_bounds, _progress, _Swarm
+from evola.evaluation import AsyncEvaluator
+from evola.rng import Seed, make_rng
+from evola.stopping import EarlyStopping
+
+
+async def epso_async(  # noqa
+    swarm_size: int,
+    generations: int,
+    chromosome_length: int,
+    chromosome_low: Union[Sequence[float], np.ndarray, float],
+    chromosome_high: Union[Sequence[float], np.ndarray, float],
+    cost_function: Callable,
+    cost_function_args: Optional[tuple] = None,
+    cost_function_kwargs: Optional[dict] = None,
+    wi: float = 0.5,
+    wm: float = 0.5,
+    wc: float = 0.5,
+    communication_probability: float = 1.0,
+    verbose: bool = False,
+    concurrency: int = 10,
+    timeout: Optional[float] = None,
+    seed: Seed = None,
+    rng: Optional[np.random.Generator] = None,
+    bit_generator: str = "PCG64",
+    stopping: Optional[EarlyStopping] = None,
+) -> np.ndarray:
+    # Same algorithm as epso, for `async def` cost functions (e.g. I/O bound ones that query a server):
+    # every generation's candidates are evaluated concurrently, at most `concurrency` at a time, and
+    # candidates whose evaluation exceeds `timeout` seconds get an infinite cost.
+    _check_bounds(chromosome_length, chromosome_low, chromosome_high)
+
+    evaluator = AsyncEvaluator(
+        cost_function,
+        cost_function_args,
+        cost_function_kwargs,
+        concurrency=concurrency,
+        timeout=timeout,
+    )
+    swarm = _Swarm(
+        None,
+        make_rng(seed, rng, bit_generator),
+        swarm_size=swarm_size,
+        chromosome_length=chromosome_length,
+        chromosome_low=chromosome_low,
+        chromosome_high=chromosome_high,
+        wi=wi,
+        wm=wm,
+        wc=wc,
+        communication_probability=communication_probability,
+    )
+    swarm.initialize(await evaluator(swarm.moving))
+
+    if stopping is not None:
+        stopping.start(evaluator.evaluations)
+
+    for generation in _progress(range(generations), verbose):
+        swarm.reproduce()
+        swarm.update_costs(await evaluator(swarm.displace(generation)))
+        swarm.select()
+        if stopping is not None and swarm.stop(stopping, evaluator.evaluations):
+            break
+
+    if verbose:
+        print(evaluator.summary() + (stopping.summary() if stopping is not None else ""), end="")
+
+    return swarm.solution
@@ -0,0 +1,459 @@
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from evola.epso.performance_version import _progress
+from evola.evaluation import evaluate
+from evola.rng import Seed, make_rng
+from evola.stopping import (
+    MAX_EVALUATIONS,
+    STAGNATION,
+    SWARM_COLLAPSE,
+    TARGET_COST,
+    TIME_LIMIT,
+    EarlyStopping,
+)
+
+
+def epso_batch(  # noqa
+    batch_size: int,
+    swarm_size: int,
+    generations: int,
+    chromosome_length: int,
+    chromosome_low: Union[Sequence, np.ndarray, float],
+    chromosome_high: Union[Sequence, np.ndarray, float],
+    cost_function: Callable,
+    cost_function_args: Optional[Sequence[tuple]] = None,
+    cost_function_kwargs: Optional[dict] = None,
+    wi: float = 0.5,
+    wm: float = 0.5,
+    wc: float = 0.5,
+    communication_probability: float = 1.0,
+    verbose: bool = False,
+    vectorized: bool = False,
+    batched: bool = False,
+    seed: Seed = None,
+    rng: Optional[np.random.Generator] = None,
+    bit_generator: str = "PCG64",
+    stopping: Union[EarlyStopping, Sequence[EarlyStopping], None] = None,
+) -> np.ndarray:
+    """
+    Solves `batch_size` independent problems at once: the same cost function with different arguments (one
+    tuple per problem in `cost_function_args`), and bounds that are a number, one per gene or one row of genes
+    per problem. The swarms are stacked in a (problems, rows, columns) tensor, so each generation reproduces,
+    moves and selects every problem with a few numpy calls, which pays off for many small problems.
+
+    The cost function is called per chromosome, per problem with `vectorized`, or once per generation with
+    `batched`: it then receives a (problems, chromosome_length, n) tensor and each argument stacked over the
+    problems (e.g. a number per problem becomes a vector), and returns a (problems, n) array of costs.
+
+    `stopping` criteria are checked for every problem on its own, either the same criteria for every problem
+    or one EarlyStopping per problem (which tells the reason, generations and evaluations of its problem after
+    the run). Problems that stop leave the tensor, so the rest run faster. Returns the (batch_size,
+    chromosome_length) best chromosomes.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if cost_function_args is not None and len(cost_function_args) != batch_size:
+        raise ValueError("cost_function_args must hold one tuple of arguments per problem")
+    problem_args: List[tuple] = (
+        [tuple(args) for args in cost_function_args] if cost_function_args is not None else [()] * batch_size
+    )
+
+    swarms = _BatchSwarm(
+        make_rng(seed, rng, bit_generator),
+        batch_size,
+        swarm_size,
+        chromosome_length,
+        _problem_bounds(chromosome_low, batch_size, chromosome_length, "lower"),
+        _problem_bounds(chromosome_high, batch_size, chromosome_length, "higher"),
+        wi,
+        wm,
+        wc,
+        communication_probability,
+        _BatchEvaluator(cost_function, problem_args, cost_function_kwargs, vectorized, batched),
+    )
+    checks = None if stopping is None else _BatchStopping(stopping, batch_size)
+
+    solutions = np.empty((batch_size, chromosome_length))
+    for generation in _progress(range(generations), verbose):
+        swarms.step(generation)
+        if checks is None:
+            continue
+        stopped = checks.update(swarms, (generation + 1) * swarm_size * 2)
+        if stopped.any():
+            solutions[swarms.problems[stopped]] = swarms.solutions[stopped]
+            swarms.keep(~stopped)
+            checks.keep(~stopped)
+        if not len(swarms.problems):
+            break
+    solutions[swarms.problems] = swarms.solutions
+
+    if checks is not None:
+        checks.report()
+        if verbose:
+            print(checks.summary(), end="")
+    return solutions
+
+
+def _problem_bounds(bound, batch_size: int, chromosome_length: int, name: str) -> np.ndarray:
+    # Bounds of every gene of every problem, as a (problems, genes, 1) column per problem, in the swarm's order
+    try:
+        bounds = np.broadcast_to(np.asarray(bound, dtype=float), (batch_size, chromosome_length))
+    except ValueError:
+        raise ValueError(
+            "Chromosome %s bounds must be a number, one per gene or one row of genes per problem" % name
+        ) from None
+    return np.asfortranarray(bounds.reshape((batch_size, chromosome_length, 1)))
+
+
+class _BatchEvaluator:
+    # Costs of the (problems, genes, n) tensor of the problems still running, as a (problems, n) array
+    def __init__(
+        self,
+        cost_function: Callable,
+        problem_args: List[tuple],
+        cost_function_kwargs: Optional[dict],
+        vectorized: bool,
+        batched: bool,
+    ):
+        self.cost_function = cost_function
+        self.problem_args = problem_args
+        self.cost_function_kwargs = cost_function_kwargs or dict()
+        self.vectorized = vectorized
+        self.batched = batched
+        # Batched cost functions get each argument stacked over the problems, sliced as problems stop
+        self.stacked_args = [np.stack(values) for values in zip(*problem_args)] if batched else []
+
+    def keep(self, kept: np.ndarray):
+        self.stacked_args = [values[kept] for values in self.stacked_args]
+
+    def __call__(self, chromosomes: np.ndarray, problems: np.ndarray) -> np.ndarray:
+        if self.batched:
+            costs = np.asarray(self.cost_function(chromosomes, *self.stacked_args, **self.cost_function_kwargs))
+            if costs.shape != chromosomes.shape[::2]:
+                raise ValueError(
+                    "Batched cost function must return one cost per chromosome of each problem: expected shape %s,"
+                    " got %s" % (chromosomes.shape[::2], costs.shape)
+                )
+            return costs
+        return np.stack(
+            [
+                evaluate(
+                    self.cost_function,
+                    block,
+                    self.problem_args[problem],
+                    self.cost_function_kwargs,
+                    self.vectorized,
+                )
+                for block, problem in zip(chromosomes, problems)
+            ]
+        )
+
+
+class _BatchSwarm:
+    # The swarms of every running problem, one _Swarm matrix per problem along the first axis:
+    #      | particles | particles sons | ancestors | ancestors sons | best_ancestors | best_ancestors_sons
+    # and their (problems, columns) costs. A batch of one problem runs exactly like epso: the random draws have
+    # the same shapes and order (noise is read in each _Swarm matrix's Fortran order) and the generation repeats
+    # _Swarm's operations, problem axis aside. Every array is Fortran ordered, which keeps each problem's
+    # matrix in _Swarm's order and makes the problems the contiguous axis: with short chromosomes, the runs
+    # numpy works on (and the column groups the generation copies) are as long as the batch instead of a column.
+    def __init__(
+        self,
+        rng: np.random.Generator,
+        batch_size: int,
+        swarm_size: int,
+        chromosome_length: int,
+        chromosome_low: np.ndarray,
+        chromosome_high: np.ndarray,
+        wi: float,
+        wm: float,
+        wc: float,
+        communication_probability: float,
+        evaluator: _BatchEvaluator,
+    ):
+        self.rng = rng
+        self.swarm_size = swarm_size
+        self.chromosome_length = chromosome_length
+        self.chromosome_low = chromosome_low
+        self.chromosome_high = chromosome_high
+        self.communication_probability = communication_probability
+        self.evaluator = evaluator
+        self.problems = np.arange(batch_size)  # original index of each running problem
+
+        # Row indexers
+        self.chromosome_rows = slice(0, chromosome_length)
+        self.weights_rows = slice(chromosome_length, chromosome_length + 3)
+
+        # Column indexers
+        self.particles_cols = slice(0, swarm_size)
+        self.sons_cols = slice(swarm_size, swarm_size * 2)
+        self.moving_cols = slice(0, swarm_size * 2)
+        self.ancestors_cols = slice(swarm_size * 2, swarm_size * 3)
+        self.sons_ancestors_cols = slice(swarm_size * 3, swarm_size * 4)
+        self.moving_ancestors_cols = slice(swarm_size * 2, swarm_size * 4)
+        self.best_ancestors_cols = slice(swarm_size * 4, swarm_size * 5)
+        self.sons_best_ancestors_cols = slice(swarm_size * 5, swarm_size * 6)
+        self.moving_best_ancestors_cols = slice(swarm_size * 4, swarm_size * 6)
+
+        rows = chromosome_length + 3
+        self.matrix = np.zeros((batch_size, rows, swarm_size * 6), order="F")
+        self.costs = np.zeros((batch_size, swarm_size * 6), order="F")
+        self._allocate(batch_size)
+
+        # Genetic soup initialization: sons' columns temporarily hold the first ancestors
+        moving = self.moving
+        moving[...] = rng.random(moving.shape)
+        moving *= chromosome_high - chromosome_low
+        moving += chromosome_low
+        weights = self.matrix[:, self.weights_rows, self.moving_cols]
+        weights[:, 0] = wi
+        weights[:, 1] = wm
+        weights[:, 2] = wc
+
+        self.costs[:, self.moving_cols] = evaluator(moving, self.problems)
+        self._copy(self.ancestors_cols, self.sons_cols)
+        self._copy(self.best_ancestors_cols, self.ancestors_cols)
+        return
+
+    def _allocate(self, batch_size: int):
+        # Generation buffers for `batch_size` running problems
+        s, length = self.swarm_size, self.chromosome_length
+        shape = (batch_size, length, s * 2)
+        self.deviation = np.empty(shape, order="F")
+        self.term = np.empty(shape, order="F")
+        self.communication = np.empty(shape, dtype=bool, order="F")
+        self.uniform = np.empty(shape, order="F")
+        # Selected particles are gathered here, laid out like the particles in the transposed tensor (see select)
+        self.selected = np.empty((s, length + 3, batch_size))
+        self.selected_costs = np.empty((s, batch_size))
+        self.gather_offsets = np.arange(length + 3)[:, None] * batch_size + np.arange(batch_size)  # within a column
+        # The normal draws of a generation, one _Workspace.normals per problem, split into views
+        self.normals = np.empty((batch_size, s * 3 + length * s * 4), order="F")
+        self.weights_noise = self.normals[:, : s * 3].reshape((batch_size, 3, s))
+        size = length * s * 2
+        self.memory_noise, self.cooperation_noise = (
+            self.normals[:, start : start + size].reshape((batch_size, s * 2, length)).transpose(0, 2, 1)  # noqa
+            for start in (s * 3, s * 3 + size)
+        )
+        return
+
+    def keep(self, kept: np.ndarray):
+        # Drops the problems that stopped, so the next generations only run the rest
+        self.matrix = np.asfortranarray(self.matrix[kept])
+        self.costs = np.asfortranarray(self.costs[kept])
+        self.chromosome_low = np.asfortranarray(self.chromosome_low[kept])
+        self.chromosome_high = np.asfortranarray(self.chromosome_high[kept])
+        self.problems = self.problems[kept]
+        self.evaluator.keep(kept)
+        self._allocate(len(self.problems))
+        return
+
+    @property
+    def moving(self) -> np.ndarray:
+        return self.matrix[:, self.chromosome_rows, self.moving_cols]
+
+    @property
+    def global_best_indexes(self) -> np.ndarray:
+        # Column of each problem's best, among its particles and its best ancestors
+        particles = self.costs[:, self.particles_cols]
+        best_ancestors = self.costs[:, self.best_ancestors_cols]
+        best_particle = np.argmin(particles, axis=1)
+        best_ancestor = np.argmin(best_ancestors, axis=1)
+        problems = np.arange(len(self.costs))
+        return np.where(
+            best_ancestors[problems, best_ancestor] < particles[problems, best_particle],
+            self.best_ancestors_cols.start + best_ancestor,
+            best_particle,
+        )
+
+    @property
+    def best_costs(self) -> np.ndarray:
+        return self.costs[np.arange(len(self.costs)), self.global_best_indexes]
+
+    @property
+    def solutions(self) -> np.ndarray:
+        return self.matrix[np.arange(len(self.costs)), self.chromosome_rows, self.global_best_indexes]
+
+    def _copy(self, destination: slice, source: slice, where: Optional[np.ndarray] = None):
+        # Copies whole particles (matrix columns and their costs), or those `where` selects in each problem
+        if where is None:
+            self.matrix[:, :, destination] = self.matrix[:, :, source]
+            self.costs[:, destination] = self.costs[:, source]
+            return
+        np.copyto(self.matrix[:, :, destination], self.matrix[:, :, source], where=where[:, None, :])
+        np.copyto(self.costs[:, destination], self.costs[:, source], where=where)
+        return
+
+    def step(self, generation: int):
+        self.reproduce()
+        self.move(generation)
+        self.select()
+        return
+
+    def reproduce(self):
+        self.rng.standard_normal(out=self.normals)
+        self._copy(self.sons_cols, self.particles_cols)
+        # Mutate
+        noise = self.weights_noise
+        noise *= 0.1
+        noise += 1
+        self.matrix[:, self.weights_rows, self.sons_cols] *= noise
+        return
+
+    def move(self, generation: int):
+        matrix = self.matrix
+        rows = self.chromosome_rows
+        deviation, term = self.deviation, self.term
+
+        global_best = np.asfortranarray(self.solutions[:, :, None])
+
+        # Particles move relative to the current ancestors and sons relative to their parents (see _Swarm)
+        self._copy(self.sons_ancestors_cols, self.particles_cols)
+        self._copy(self.sons_best_ancestors_cols, self.best_ancestors_cols)
+        improved = self.costs[:, self.sons_ancestors_cols] < self.costs[:, self.best_ancestors_cols]
+        self._copy(self.sons_best_ancestors_cols, self.sons_ancestors_cols, where=improved)
+
+        moving = matrix[:, rows, self.moving_cols]
+        weights = matrix[:, self.weights_rows, self.moving_cols]
+
+        # wi: inertia weight
+        np.subtract(moving, matrix[:, rows, self.moving_ancestors_cols], out=deviation)
+        deviation *= weights[:, 0:1]
+        deviation *= 1 / (generation + 1)
+
+        # wm: best ancestor weight
+        np.subtract(matrix[:, rows, self.moving_best_ancestors_cols], moving, out=term)
+        term *= weights[:, 1:2]
+        term *= self.memory_noise
+        deviation += term
+
+        # wc: global best weight
+        np.subtract(global_best, moving, out=term)
+        term *= weights[:, 2:3]
+        if self.communication_probability != 1:
+            self.rng.random(out=self.uniform)
+            np.less(self.uniform, self.communication_probability, out=self.communication)
+            term *= self.communication
+        term *= self.cooperation_noise
+        deviation += term
+
+        # Add deviation to particles and enforce domain
+        moving += deviation
+        np.maximum(moving, self.chromosome_low, out=moving)
+        np.minimum(moving, self.chromosome_high, out=moving)
+
+        self.costs[:, self.moving_cols] = self.evaluator(moving, self.problems)
+        self._copy(self.ancestors_cols, self.sons_ancestors_cols)
+        self._copy(self.best_ancestors_cols, self.sons_best_ancestors_cols)
+        return
+
+    def select(self):
+        # The transposed tensor is a C ordered (columns, rows, problems) array, so the survivors of every problem
+        # are gathered by flat index in one take, and copied back as a contiguous block
+        batch_size = len(self.costs)
+        matrix, costs = self.matrix.T, self.costs.T
+        half_best_indexes = np.argsort(self.costs[:, self.moving_cols], axis=1)[:, : self.swarm_size].T
+        column_starts = half_best_indexes * matrix[0].size
+        np.take(matrix.reshape(-1), column_starts[:, None] + self.gather_offsets, out=self.selected, mode="clip")
+        costs_indexes = half_best_indexes * batch_size + np.arange(batch_size)
+        np.take(costs.reshape(-1), costs_indexes, out=self.selected_costs, mode="clip")
+        matrix[self.particles_cols] = self.selected
+        costs[self.particles_cols] = self.selected_costs
+        return
+
+
+class _BatchStopping:
+    # EarlyStopping criteria checked for all the running problems at once. Missing criteria are NaN, which
+    # never compares true
+    def __init__(self, stopping: Union[EarlyStopping, Sequence[EarlyStopping]], batch_size: int):
+        self.shared = isinstance(stopping, EarlyStopping)
+        self.criteria: List[EarlyStopping] = (
+            [stopping] * batch_size if isinstance(stopping, EarlyStopping) else list(stopping)
+        )
+        if len(self.criteria) != batch_size:
+            raise ValueError("stopping must be an EarlyStopping or one per problem")
+
+        def values(name: str) -> np.ndarray:
+            return np.array([np.nan if getattr(c, name) is None else getattr(c, name) for c in self.criteria])
+
+        self.patience = values("patience")
+        self.tol = values("tol")
+        self.target_cost = values("target_cost")
+        self.min_spread = values("min_spread")
+        self.max_evaluations = values("max_evaluations")
+        self.time_limit = values("time_limit")
+        self.best: np.ndarray = np.full(batch_size, np.inf)
+        self.stagnant: np.ndarray = np.zeros(batch_size)
+        self.running = np.arange(batch_size)
+
+        # Outcome of every problem, for report()
+        self.reasons: List[Optional[str]] = [None] * batch_size
+        self.generations = np.zeros(batch_size, dtype=int)
+        self.evaluations = np.zeros(batch_size, dtype=int)
+        self.generation = 0
+        self._start_time = time.perf_counter()
+        return
+
+    def update(self, swarms: _BatchSwarm, evaluations: int) -> np.ndarray:
+        # Mask of the running problems that must stop after this generation, in EarlyStopping's order
+        self.generation += 1
+        self.generations[self.running] = self.generation
+        self.evaluations[self.running] = evaluations
+
+        best_costs = swarms.best_costs
+        improved = best_costs < self.best - self.tol
+        self.stagnant = np.where(improved, 0, self.stagnant + 1)
+        self.best = np.minimum(self.best, best_costs)
+
+        particles = swarms.matrix[:, swarms.chromosome_rows, swarms.particles_cols]
+        elapsed = time.perf_counter() - self._start_time
+        checks = (
+            (TARGET_COST, best_costs <= self.target_cost),
+            (STAGNATION, self.stagnant >= self.patience),
+            (SWARM_COLLAPSE, np.all(np.ptp(particles, axis=2) < self.min_spread[:, None], axis=1)),
+            (MAX_EVALUATIONS, evaluations >= self.max_evaluations),
+            (TIME_LIMIT, elapsed >= self.time_limit),
+        )
+        stopped = np.zeros(len(self.running), dtype=bool)
+        for reason, met in checks:
+            for i in np.flatnonzero(met & ~stopped):
+                self.reasons[self.running[i]] = reason
+            stopped |= met
+        return stopped
+
+    def keep(self, kept: np.ndarray):
+        for name in ("patience", "tol", "target_cost", "min_spread", "max_evaluations", "time_limit"):
+            setattr(self, name, getattr(self, name)[kept])
+        self.best = self.best[kept]
+        self.stagnant = self.stagnant[kept]
+        self.running = self.running[kept]
+        return
+
+    def report(self):
+        # Outcome of each problem on its EarlyStopping. Criteria shared by every problem report the batch: the
+        # generations it ran, the evaluations of every problem, and a reason when every problem stopped early
+        if not self.shared:
+            for problem, criteria in enumerate(self.criteria):
+                criteria.reason = self.reasons[problem]
+                criteria.generation = int(self.generations[problem])
+                criteria.evaluations = int(self.evaluations[problem])
+            return
+        criteria = self.criteria[0]
+        last = int(np.argmax(self.generations))
+        criteria.reason = None if len(self.running) else self.reasons[last]
+        criteria.generation = self.generation
+        criteria.evaluations = int(self.evaluations.sum())
+        return
+
+    def summary(self) -> str:
+        stopped = [reason for reason in self.reasons if reason is not None]
+        if not stopped:
+            return ""
+        return "\t-> Stopped early: %d of %d problems (%s)\n" % (
+            len(stopped),
+            len(self.reasons),
+            ", ".join("%s: %d" % (reason, stopped.count(reason)) for reason in dict.fromkeys(stopped)),
+        )
@@ -0,0 +1,196 @@
+import multiprocessing
+import queue
+import time
+import traceback
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from evola.epso.performance_version import _check_bounds, _Swarm
+from evola.evaluation import Evaluator
+from evola.rng import Seed, spawn_rngs
+
+TOPOLOGIES = ("ring", "full")
+
+
+class IslandsResult(NamedTuple):
+    solution: np.ndarray  # best chromosome over all islands
+    best_cost: float
+    island_best_costs: np.ndarray  # best cost found by each island
+    migration_seconds: np.ndarray  # time each island spent sending, waiting for and inserting migrants
+    migrations: int  # number of migration rounds
+
+
+def _neighbours(island: int, n_islands: int, topology: str):
+    # Islands this one sends migrants to, and how many islands send migrants to it
+    if topology == "ring":
+        return [(island + 1) % n_islands], 1
+    return [i for i in range(n_islands) if i != island], n_islands - 1
+
+
+def _migrate(swarm: _Swarm, island: int, epoch: int, inboxes: list, pending: Dict[int, list], config: dict):
+    particles = swarm.chromosome_matrix[:, swarm.particles_cols]
+    costs = swarm.costs[swarm.particles_cols]
+    destinations, sources = _neighbours(island, config["n_islands"], config["topology"])
+
+    # Migrants travel as a small (rows, migration_size) array (chromosome and weights) and their costs
+    order = np.argsort(costs)
+    emigrants = np.ascontiguousarray(particles[:, order[: config["migration_size"]]])
+    emigrant_costs = costs[order[: config["migration_size"]]]
+    for destination in destinations:
+        inboxes[destination].put((epoch, island, (emigrants, emigrant_costs)))
+
+    # Several islands may write to the same inbox, so messages from a later round can arrive early
+    inbox = inboxes[island]
+    while len(pending.setdefault(epoch, [])) < sources:
+        message_epoch, source, immigrants = inbox.get()
+        pending.setdefault(message_epoch, []).append((source, immigrants))
+
+    # Immigrants (sorted by source island, for determinism) replace the worst particles
+    arrivals = sorted(pending.pop(epoch), key=lambda message: message[0])
+    immigrants = np.concatenate([immigrants for _, (immigrants, _) in arrivals], axis=1)
+    worst = order[-immigrants.shape[1] :]  # noqa
+    particles[:, worst] = immigrants
+    costs[worst] = np.concatenate([immigrant_costs for _, (_, immigrant_costs) in arrivals])
+    return
+
+
+def _run_island(island: int, config: dict, rng: np.random.Generator, inboxes: list, results):
+    try:
+        evaluator = Evaluator(
+            config["cost_function"],
+            config["cost_function_args"],
+            config["cost_function_kwargs"],
+            vectorized=config["vectorized"],
+        )
+        swarm = _Swarm(
+            evaluator,
+            rng,
+            swarm_size=config["swarm_size"],
+            chromosome_length=config["chromosome_length"],
+            chromosome_low=config["chromosome_low"],
+            chromosome_high=config["chromosome_high"],
+            wi=config["wi"],
+            wm=config["wm"],
+            wc=config["wc"],
+            communication_probability=config["communication_probability"],
+        )
+
+        generations = config["generations"]
+        interval = config["migration_interval"]
+        migration_seconds = 0.0
+        pending: Dict[int, list] = {}
+        for generation in range(generations):
+            swarm.reproduce()
+            swarm.move(generation)
+            swarm.select()
+
+            if config["n_islands"] > 1 and (generation + 1) % interval == 0 and generation + 1 < generations:
+                start = time.perf_counter()
+                _migrate(swarm, island, (generation + 1) // interval, inboxes, pending, config)
+                migration_seconds += time.perf_counter() - start
+
+        results.put((island, None, swarm.best_cost, swarm.solution.copy(), migration_seconds))
+    except Exception:  # noqa
+        results.put((island, traceback.format_exc(), None, None, None))
+    return
+
+
+def _collect(processes: List[multiprocessing.Process], results, n_islands: int) -> list:
+    collected: list = [None] * n_islands
+    remaining = n_islands
+    while remaining:
+        try:
+            island, error, best_cost, solution, migration_seconds = results.get(timeout=1)
+        except queue.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                raise RuntimeError("An island process died unexpectedly")
+            continue
+        if error is not None:
+            raise RuntimeError("Island %d failed:\n%s" % (island, error))
+        collected[island] = (best_cost, solution, migration_seconds)
+        remaining -= 1
+    return collected
+
+
+def epso_islands(  # noqa
+    n_islands: int,
+    swarm_size: int,
+    generations: int,
+    chromosome_length: int,
+    chromosome_low: Union[Sequence[float], np.ndarray, float],
+    chromosome_high: Union[Sequence[float], np.ndarray, float],
+    cost_function: Callable,
+    cost_function_args: Optional[tuple] = None,
+    cost_function_kwargs: Optional[dict] = None,
+    migration_interval: int = 10,
+    migration_size: int = 1,
+    topology: str = "ring",
+    wi: float = 0.5,
+    wm: float = 0.5,
+    wc: float = 0.5,
+    communication_probability: float = 1.0,
+    vectorized: bool = False,
+    seed: Seed = None,
+    bit_generator: str = "PCG64",
+) -> IslandsResult:
+    # Island model: n_islands swarms of swarm_size evolve in separate processes (see epso), and every
+    # migration_interval generations each one sends its migration_size best particles to its neighbours
+    # (next island on a ring, or every other island), where they replace the worst particles.
+    _check_bounds(chromosome_length, chromosome_low, chromosome_high)
+    if topology not in TOPOLOGIES:
+        raise ValueError("Unknown topology %r, choose one of: %s" % (topology, ", ".join(TOPOLOGIES)))
+    if n_islands < 1:
+        raise ValueError("n_islands must be at least 1")
+    if migration_interval < 1:
+        raise ValueError("migration_interval must be at least 1")
+    _, sources = _neighbours(0, n_islands, topology)
+    if migration_size < 1 or migration_size * sources > swarm_size:
+        raise ValueError("Migrants received by an island must be between 1 and swarm_size")
+
+    config = dict(
+        n_islands=n_islands,
+        swarm_size=swarm_size,
+        generations=generations,
+        chromosome_length=chromosome_length,
+        chromosome_low=chromosome_low,
+        chromosome_high=chromosome_high,
+        cost_function=cost_function,
+        cost_function_args=cost_function_args,
+        cost_function_kwargs=cost_function_kwargs,
+        migration_interval=migration_interval,
+        migration_size=migration_size,
+        topology=topology,
+        wi=wi,
+        wm=wm,
+        wc=wc,
+        communication_probability=communication_probability,
+        vectorized=vectorized,
+    )
+
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(n_islands)]
+    results = context.Queue()
+    processes = [
+        context.Process(target=_run_island, args=(island, config, rng, inboxes, results), daemon=True)
+        for island, rng in enumerate(spawn_rngs(seed, n_islands, bit_generator))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        collected = _collect(processes, results, n_islands)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    island_best_costs = np.array([best_cost for best_cost, _, _ in collected])
+    best_island = int(np.argmin(island_best_costs))
+    return IslandsResult(
+        solution=collected[best_island][1],
+        best_cost=float(island_best_costs[best_island]),
+        island_best_costs=island_best_costs,
+        migration_seconds=np.array([migration_seconds for _, _, migration_seconds in collected]),
+        migrations=max(0, (generations - 1) // migration_interval) if n_islands > 1 else 0,
+    )
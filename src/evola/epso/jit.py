@@ -0,0 +1,112 @@
+# Optional numba backend of epso: the movement rule, the weights mutation and the domain enforcement fused
+# into one compiled loop per particle, and @njit cost functions called from a compiled loop over the columns.
+# The kernels are plain Python so this module imports without numba, they are only compiled when used.
+import warnings
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+BACKENDS = ("numpy", "numba")
+
+
+def _move_kernel(
+    matrix,
+    start,
+    stop,
+    swarm_size,
+    chromosome_length,
+    inverse_generation,
+    weights_noise,
+    memory_noise,
+    cooperation_noise,
+    uniform,
+    communication_probability,
+    global_best,
+    low,
+    high,
+    integer,
+):
+    # Moves the columns start:stop of the chromosome matrix, in the same order of operations as the NumPy path.
+    # weights_noise is the mutation factor of the sons' weights, the other noise arrays are the block's
+    shift = swarm_size * 2
+    for column in range(start, stop):
+        block_column = column - start
+        if column >= swarm_size:
+            for weight in range(3):
+                matrix[chromosome_length + weight, column] *= weights_noise[weight, column - swarm_size]
+        wi = matrix[chromosome_length, column]
+        wm = matrix[chromosome_length + 1, column]
+        wc = matrix[chromosome_length + 2, column]
+
+        for gene in range(chromosome_length):
+            chromosome = matrix[gene, column]
+            deviation = (chromosome - matrix[gene, column + shift]) * wi * inverse_generation
+            deviation += (matrix[gene, column + shift * 2] - chromosome) * wm * memory_noise[gene, block_column]
+            if communication_probability == 1 or uniform[gene, block_column] < communication_probability:
+                deviation += (global_best[gene] - chromosome) * wc * cooperation_noise[gene, block_column]
+
+            chromosome += deviation
+            if integer[gene]:
+                chromosome = np.rint(chromosome)
+            matrix[gene, column] = min(max(chromosome, low[gene]), high[gene])
+    return
+
+
+def _evaluate_columns(cost_function, chromosomes, costs, args):
+    for column in range(chromosomes.shape[1]):
+        costs[column] = cost_function(chromosomes[:, column], *args)
+    return
+
+
+@lru_cache(maxsize=None)
+def _compile(kernel: Callable) -> Optional[Callable]:
+    try:
+        import numba
+    except ImportError:
+        warnings.warn("Install numba to use the numba backend: `pip install numba`. Using numpy", RuntimeWarning)
+        return None
+    return numba.njit(cache=True)(kernel)
+
+
+def move_kernel(backend: str) -> Optional[Callable]:
+    # Compiled movement kernel, or None for the NumPy path (also when numba is missing)
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend %r, choose one of: %s" % (backend, ", ".join(BACKENDS)))
+    if backend == "numpy":
+        return None
+    return _compile(_move_kernel)
+
+
+def is_jitted(cost_function: Callable) -> bool:
+    try:
+        from numba.extending import is_jitted as _is_jitted
+    except ImportError:
+        return False
+    return _is_jitted(cost_function)
+
+
+class CompiledColumns:
+    """
+    Vectorized cost function that calls an @njit cost function (of one chromosome) on every column of a block
+    inside a compiled loop, instead of once per particle from Python.
+    """
+
+    def __init__(self, cost_function: Callable) -> None:
+        self.cost_function = cost_function
+        return
+
+    def __call__(self, chromosomes: np.ndarray, *args) -> np.ndarray:
+        evaluate_columns = _compile(_evaluate_columns)
+        if evaluate_columns is None:
+            raise RuntimeError("Compiled cost functions need numba: `pip install numba`")
+        costs = np.empty(chromosomes.shape[1])
+        evaluate_columns(self.cost_function, chromosomes, costs, args)
+        return costs
+
+
+def compiled_cost_function(backend: str, cost_function: Callable, vectorized: bool) -> Tuple[Callable, bool]:
+    # With the numba backend, @njit cost functions of one chromosome are evaluated in a compiled loop
+    if backend == "numba" and not vectorized and is_jitted(cost_function):
+        return CompiledColumns(cost_function), True
+    return cost_function, vectorized
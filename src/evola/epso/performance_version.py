@@ -1,14 +1,35 @@
-from typing import Callable, Optional, Union
+from concurrent.futures import Executor
+from functools import partial
+from typing import (
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 
+from evola.checkpoint import Checkpoint, Checkpointer, load_checkpoint
+from evola.epso.jit import compiled_cost_function, move_kernel
+from evola.evaluation import Evaluator
+from evola.profiling import Profiler
+from evola.rng import Seed, make_rng
+from evola.shared import SharedArrays
+from evola.stopping import EarlyStopping
+from evola.surrogate import Surrogate
+
 
 def epso(  # noqa
     swarm_size: int,
     generations: int,
     chromosome_length: int,
-    chromosome_low: Union[float, int],  # TODO support array
-    chromosome_high: Union[float, int],  # TODO support array
+    chromosome_low: Union[Sequence[float], np.ndarray, float],
+    chromosome_high: Union[Sequence[float], np.ndarray, float],
     cost_function: Callable,
     cost_function_args: Optional[tuple] = None,
     cost_function_kwargs: Optional[dict] = None,
@@ -17,84 +38,235 @@ def epso(  # noqa
     wc: float = 0.5,
     communication_probability: float = 1.0,
     verbose: bool = False,
+    vectorized: bool = False,
+    executor: Optional[Executor] = None,
+    n_workers: Optional[int] = None,
+    n_threads: Optional[int] = None,
+    seed: Seed = None,
+    rng: Optional[np.random.Generator] = None,
+    bit_generator: str = "PCG64",
+    cache_size: Optional[int] = None,
+    cache_quantization: Optional[float] = None,
+    deduplicate: bool = False,
+    stopping: Optional[EarlyStopping] = None,
+    checkpoint: Optional[Checkpointer] = None,
+    resume: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+    dtype=np.float64,
+    cost_dtype=np.float64,
+    block_size: Optional[int] = None,
+    chromosome_dtypes: Union[List[type], type] = float,
+    backend: str = "numpy",
+    surrogate: Optional[Surrogate] = None,
+    shared_memory: bool = False,
 ):
-    # TODO add integer support
-    # Init
-    if isinstance(chromosome_low, list):
-        if len(chromosome_low) != chromosome_length:
-            raise ValueError("Chromosome lower bounds must be same length of chromosome")
-    if isinstance(chromosome_high, list):
-        if len(chromosome_high) != chromosome_length:
-            raise ValueError("Chromosome higher bounds must be same length of chromosome")
+    states = epso_iter(
+        swarm_size,
+        generations,
+        chromosome_length,
+        chromosome_low,
+        chromosome_high,
+        cost_function,
+        cost_function_args,
+        cost_function_kwargs,
+        wi=wi,
+        wm=wm,
+        wc=wc,
+        communication_probability=communication_probability,
+        verbose=verbose,
+        vectorized=vectorized,
+        executor=executor,
+        n_workers=n_workers,
+        n_threads=n_threads,
+        seed=seed,
+        rng=rng,
+        bit_generator=bit_generator,
+        cache_size=cache_size,
+        cache_quantization=cache_quantization,
+        deduplicate=deduplicate,
+        stopping=stopping,
+        checkpoint=checkpoint,
+        resume=resume,
+        profiler=profiler,
+        dtype=dtype,
+        cost_dtype=cost_dtype,
+        block_size=block_size,
+        chromosome_dtypes=chromosome_dtypes,
+        backend=backend,
+        surrogate=surrogate,
+        shared_memory=shared_memory,
+    )
+    # Runs every generation, epso_iter returns the solution once it's done
+    while True:
+        try:
+            next(states)
+        except StopIteration as done:
+            return done.value
 
-    cost_function_args = cost_function_args or tuple()
-    cost_function_kwargs = cost_function_kwargs or dict()
 
-    # generation_counter = 0  # (for wi deviation)
-    chromosome_low = chromosome_low if not isinstance(chromosome_low, list) else np.array(chromosome_low)
-    chromosome_high = chromosome_high if not isinstance(chromosome_high, list) else np.array(chromosome_high)
+class EPSOState(NamedTuple):
+    generation: int  # generations run so far
+    best_cost: float
+    best_chromosome: np.ndarray  # read-only view into the swarm (in its dtype), only valid until the next generation
+    costs: Optional[np.ndarray] = None  # read-only view of the particles' costs (with cost_views)
 
-    # Init particles
 
-    # chromosome_matrix is composed of the following:
-    #      | particles | ancestors | best_ancestors | particles sons | ancestors sons | best_ancestors_sons
-    # c1   |
-    # c2   |
-    # ...
-    # cn   |
-    # wi   |
-    # wm   |
-    # wc   |
-    # cost |
-    total_particles = swarm_size * 4
-    weights_ammount = 3
+def epso_iter(  # noqa
+    swarm_size: int,
+    generations: int,
+    chromosome_length: int,
+    chromosome_low: Union[Sequence[float], np.ndarray, float],
+    chromosome_high: Union[Sequence[float], np.ndarray, float],
+    cost_function: Callable,
+    cost_function_args: Optional[tuple] = None,
+    cost_function_kwargs: Optional[dict] = None,
+    wi: float = 0.5,
+    wm: float = 0.5,
+    wc: float = 0.5,
+    communication_probability: float = 1.0,
+    verbose: bool = False,
+    vectorized: bool = False,
+    executor: Optional[Executor] = None,
+    n_workers: Optional[int] = None,
+    n_threads: Optional[int] = None,
+    seed: Seed = None,
+    rng: Optional[np.random.Generator] = None,
+    bit_generator: str = "PCG64",
+    cache_size: Optional[int] = None,
+    cache_quantization: Optional[float] = None,
+    deduplicate: bool = False,
+    stopping: Optional[EarlyStopping] = None,
+    checkpoint: Optional[Checkpointer] = None,
+    resume: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+    dtype=np.float64,
+    cost_dtype=np.float64,
+    block_size: Optional[int] = None,
+    chromosome_dtypes: Union[List[type], type] = float,
+    backend: str = "numpy",
+    surrogate: Optional[Surrogate] = None,
+    shared_memory: bool = False,
+    cost_views: bool = False,
+) -> Generator[EPSOState, None, np.ndarray]:
+    # Same as epso, yielding a snapshot after each generation. Run to the end, it returns epso's solution.
+    # Snapshots are views, so they cost nothing and history is only kept if the caller keeps copies.
+    # Leaving the loop early (or closing the iterator) releases the evaluator and the shared memory.
+    _check_bounds(chromosome_length, chromosome_low, chromosome_high)
+    shared = _shared_arrays(shared_memory, executor, n_workers)
+
+    cost_function, vectorized = compiled_cost_function(backend, cost_function, vectorized)
+    evaluator = Evaluator(
+        cost_function,
+        cost_function_args,
+        cost_function_kwargs,
+        vectorized=vectorized,
+        executor=executor,
+        n_workers=n_workers,
+        n_threads=n_threads,
+        cache_size=cache_size,
+        cache_quantization=cache_quantization,
+        deduplicate=deduplicate,
+        shared=shared,
+    )
+    try:
+        swarm, start = _start(
+            evaluator,
+            make_rng(seed, rng, bit_generator),
+            resume,
+            surrogate,
+            swarm_size=swarm_size,
+            chromosome_length=chromosome_length,
+            chromosome_low=chromosome_low,
+            chromosome_high=chromosome_high,
+            wi=wi,
+            wm=wm,
+            wc=wc,
+            communication_probability=communication_probability,
+            dtype=dtype,
+            cost_dtype=cost_dtype,
+            block_size=block_size,
+            chromosome_dtypes=chromosome_dtypes,
+            backend=backend,
+            shared=shared,
+        )
+        matrix = swarm.chromosome_matrix
+        for generation in _generations(
+            swarm, evaluator, generations, verbose, stopping, checkpoint, start, profiler, surrogate
+        ):
+            best = swarm.global_best_index
+            yield EPSOState(
+                generation,
+                float(swarm.costs[best]),
+                _read_only(matrix[swarm.chromosome_rows, best]),
+                _read_only(swarm.costs[swarm.particles_cols]) if cost_views else None,
+            )
+        # A view would outlive the shared memory it points to
+        solution = swarm.solution if shared is None else swarm.solution.copy()
+    finally:
+        evaluator.close()
+        if shared is not None:
+            shared.close()
 
-    # Indexers
-    chromosome_slice_rows = slice(0, -4)
-    weights_rows_slice = slice(-4, -1)
-    wi_slice_rows = -4
-    wm_slice_rows = -3
-    wc_slice_rows = -2
-    cost_slice_row = -1
+    if verbose:
+        for report in (evaluator, stopping, profiler, surrogate):
+            if report is not None:
+                print(report.summary(), end="")
 
-    current_particles_slice_cols = slice(0, swarm_size * 3)
+    return solution
 
-    particles_slice_cols = slice(0, swarm_size)
-    ancestors_slice_cols = slice(swarm_size, swarm_size * 2)
-    particles_and_ancestors_slice_cols = slice(0, swarm_size * 2)
 
-    best_ancestors_slice_cols = slice(swarm_size * 2, swarm_size * 3)
+def _shared_arrays(shared_memory: bool, executor: Optional[Executor], n_workers: Optional[int]):
+    # Swarm state in shared memory, only useful when the evaluation is spread over workers
+    if not shared_memory:
+        return None
+    if executor is None and n_workers is None:
+        raise ValueError("shared_memory needs an executor or n_workers to evaluate in")
+    return SharedArrays()
 
-    particles_sons_slice_cols = slice(swarm_size * 3, swarm_size * 4)
 
-    # Genetic soup initialization
-    chromosome_matrix = np.zeros((chromosome_length + weights_ammount + 1, total_particles))
-    chromosome_matrix[chromosome_slice_rows, particles_slice_cols] = np.random.uniform(
-        chromosome_low, chromosome_high, (chromosome_length, swarm_size)
-    )
-    chromosome_matrix[chromosome_slice_rows, ancestors_slice_cols] = np.random.uniform(
-        chromosome_low, chromosome_high, (chromosome_length, swarm_size)
-    )
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
 
-    chromosome_matrix[wi_slice_rows, particles_and_ancestors_slice_cols] = wi
-    chromosome_matrix[wm_slice_rows, particles_and_ancestors_slice_cols] = wm
-    chromosome_matrix[wc_slice_rows, particles_and_ancestors_slice_cols] = wc
 
-    # Init Cost
+def _check_bounds(chromosome_length: int, chromosome_low, chromosome_high):
+    # Bounds are a number for every gene, or one per gene (a list or array)
+    if np.ndim(chromosome_low) and np.shape(chromosome_low) != (chromosome_length,):
+        raise ValueError("Chromosome lower bounds must be same length of chromosome")
+    if np.ndim(chromosome_high) and np.shape(chromosome_high) != (chromosome_length,):
+        raise ValueError("Chromosome higher bounds must be same length of chromosome")
+    return
+
+
+def _gene_bounds(bound, dtype) -> np.ndarray:
+    # Per gene bounds become a column, which broadcasts over the particles (columns) of the matrix
+    bound = np.asarray(bound, dtype=dtype)
+    return bound if bound.ndim == 0 else bound.reshape((-1, 1))
 
-    chromosome_matrix[cost_slice_row, particles_and_ancestors_slice_cols] = np.apply_along_axis(
-        cost_function,
-        0,
-        chromosome_matrix[chromosome_slice_rows, particles_and_ancestors_slice_cols],
-        *cost_function_args,
-        **cost_function_kwargs,
-    )
 
-    chromosome_matrix[:, best_ancestors_slice_cols] = chromosome_matrix[:, ancestors_slice_cols]
-    global_best_chromosome_index = np.argmin(chromosome_matrix[cost_slice_row, current_particles_slice_cols])
+def _integer_genes(chromosome_dtypes, chromosome_length: int) -> Optional[np.ndarray]:
+    # Column mask of the integer genes, or None when every gene is float
+    if not isinstance(chromosome_dtypes, (list, tuple)):
+        chromosome_dtypes = [chromosome_dtypes] * chromosome_length
+    if len(chromosome_dtypes) != chromosome_length:
+        raise ValueError("Chromosome types list must be same length of chromosome")
+    for _type in chromosome_dtypes:
+        if not np.issubdtype(_type, np.integer) and not np.issubdtype(_type, np.floating):
+            raise ValueError("Chromosome types must be integer or float, got %r" % (_type,))
 
-    iterator = range(generations)
+    integer = np.array([np.issubdtype(_type, np.integer) for _type in chromosome_dtypes]).reshape((-1, 1))
+    return integer if integer.any() else None
 
+
+def _float_dtype(dtype, name: str) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("%s must be float32 or float64, got %s" % (name, dtype))
+    return dtype
+
+
+def _progress(iterator, verbose: bool):
     if verbose:
         try:
             from tqdm import tqdm
@@ -102,107 +274,550 @@ def epso(  # noqa
             iterator = tqdm(iterator)
         except ImportError:
             raise Exception("Must install tqdm to use verbose: pip install `tqdm`")
+    return iterator
+
+
+class _Workspace:
+    # Buffers allocated once and updated in place by every generation, so the loop doesn't allocate
+    # swarm sized temporaries. They are Fortran ordered like the chromosome matrix, where each particle
+    # is a contiguous column and column blocks never overlap in memory (which would force numpy to copy).
+    # Movement buffers hold one block of `block` columns, the whole moving block unless the swarm is tiled.
+    def __init__(
+        self,
+        chromosome_length: int,
+        swarm_size: int,
+        rows: int,
+        weights_ammount: int,
+        dtype,
+        cost_dtype,
+        block: int,
+        tiled: bool = False,
+    ):
+        self.chromosome_length = chromosome_length
+        block_shape = (chromosome_length, block)
+        self.deviation = np.empty(block_shape, dtype=dtype, order="F")
+        self.term = np.empty(block_shape, dtype=dtype, order="F")
+        self.communication = np.empty(block_shape, dtype=bool, order="F")
+        self.uniform = np.empty(block_shape, dtype=dtype, order="F")
+        # The normal draws of a generation (weights mutation, then the memory and cooperation noise of a block),
+        # filled by a single call when the swarm isn't tiled and split into views
+        self.weights_size = weights_ammount * swarm_size
+        self.normals = np.empty(self.weights_size + chromosome_length * block * 2, dtype=dtype)
+        self.weights_noise = self.normals[: self.weights_size].reshape((weights_ammount, swarm_size))
+        self.improved = np.empty(swarm_size, dtype=bool)
+        # float32 swarms with float64 costs keep the global best, and evaluate each block, in float64
+        wide = np.promote_types(dtype, cost_dtype)
+        self.global_best = np.empty((chromosome_length, 1), dtype=wide)
+        self.upcast = None if wide == dtype else np.empty(block_shape, dtype=wide, order="F")
+        # Selected particles are gathered here (one per row) before being copied back into the matrix.
+        # Tiled swarms select in place instead, so they don't need a buffer as big as the particles
+        self.selected = np.empty((0 if tiled else swarm_size, rows), dtype=dtype)
+        self.selected_costs = np.empty(0 if tiled else swarm_size, dtype=cost_dtype)
+
+    def block_normals(self, width: int) -> np.ndarray:
+        # Memory and cooperation noise of a block `width` columns wide, drawn per block by tiled swarms
+        return self.normals[self.weights_size : self.weights_size + self.chromosome_length * width * 2]  # noqa
+
+    def noise(self, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Memory and cooperation noise views of a block `width` columns wide
+        size = self.chromosome_length * width
+        shape = (self.chromosome_length, width)
+        start = self.weights_size
+        return (
+            self.normals[start : start + size].reshape(shape, order="F"),  # noqa
+            self.normals[start + size : start + size * 2].reshape(shape, order="F"),  # noqa
+        )
 
-    for generation in iterator:
-        # Reproduce
-        chromosome_matrix[:, particles_sons_slice_cols] = chromosome_matrix[:, particles_slice_cols]
-        # Mutate
-        chromosome_matrix[weights_rows_slice, particles_sons_slice_cols] = chromosome_matrix[
-            weights_rows_slice, particles_sons_slice_cols
-        ] * (1 + 0.1 * np.random.normal(size=(weights_ammount, swarm_size)))
-
-        # Move
-        if communication_probability == 1:
-            communication_matrix = np.ones((chromosome_length, swarm_size * 2))
-        else:
-            communication_matrix = np.random.choice(
-                [0, 1],
-                (chromosome_length, swarm_size * 2),
-                p=[1 - communication_probability, communication_probability],
-            )
-
-        # TODO this can be split in two cores (uses more memory...)
-        # or 100% vectorized if particles and sons are side by side
-        # and we copy ancestors and best ancestors (also uses more memory...)
-        for i, _slice in enumerate([particles_slice_cols, particles_sons_slice_cols]):
-            # wi: inertia weight
-            deviation = (
-                1
-                / (generation + 1)
-                * chromosome_matrix[wi_slice_rows, _slice]
-                * (
-                    chromosome_matrix[chromosome_slice_rows, _slice]
-                    - chromosome_matrix[chromosome_slice_rows, ancestors_slice_cols]
-                )
-            )
-
-            # wm: best ancestor weight
-            deviation = deviation + np.random.normal(size=deviation.shape) * chromosome_matrix[
-                wm_slice_rows, _slice
-            ] * (
-                chromosome_matrix[chromosome_slice_rows, best_ancestors_slice_cols]
-                - chromosome_matrix[chromosome_slice_rows, _slice]
-            )
 
-            # wc: global best weight
-            deviation = deviation + communication_matrix[
-                :, swarm_size * i : swarm_size * (i + 1)  # noqa
-            ] * np.random.normal(size=deviation.shape) * chromosome_matrix[wc_slice_rows, _slice] * (
-                chromosome_matrix[chromosome_slice_rows, global_best_chromosome_index][:, np.newaxis]
-                - chromosome_matrix[chromosome_slice_rows, _slice]
-            )
+class _Swarm:
+    # chromosome_matrix is composed of the following:
+    #      | particles | particles sons | ancestors | ancestors sons | best_ancestors | best_ancestors_sons
+    # c1   |
+    # c2   |
+    # ...
+    # cn   |
+    # wi   |
+    # wm   |
+    # wc   |
+    #
+    # Particles and sons sit side by side, and so do their ancestors and best ancestors, so the movement
+    # rule, the domain enforcement and the evaluation run once over a contiguous 2 * swarm_size block.
+    # Costs live in a separate vector with the same column layout, so the matrix can be stored in float32
+    # while costs (and so the ranking and the global best) keep float64 precision. Blocks reach the cost
+    # function upcast to float64, and the global best and the solution are float64 copies.
+    #
+    # With a `block_size`, the moving block is tiled: movement, domain enforcement and evaluation run over
+    # column blocks of that size, so their temporaries (and the cost function's) are bounded by the block
+    # instead of the swarm. Selection only needs the cost vector and moves the survivors in place, into the same
+    # columns as the untiled selection.
+
+    # Row indexers
+    chromosome_rows = slice(0, -3)
+    weights_rows = slice(-3, None)
+    wi_row = -3
+    wm_row = -2
+    wc_row = -1
+    weights_ammount = 3
 
-            if i == 0:  # particles sons
-                # create next ancestors
-                chromosome_matrix[:, ancestors_slice_cols] = chromosome_matrix[:, _slice]
-                chromosome_matrix[:, best_ancestors_slice_cols] = np.where(
-                    chromosome_matrix[cost_slice_row, ancestors_slice_cols]
-                    < chromosome_matrix[cost_slice_row, best_ancestors_slice_cols],
-                    chromosome_matrix[:, ancestors_slice_cols],
-                    chromosome_matrix[:, best_ancestors_slice_cols],
-                )
-
-            # Add deviation to particles
-            chromosome_matrix[chromosome_slice_rows, _slice] = (
-                chromosome_matrix[chromosome_slice_rows, _slice] + deviation
-            )
+    def __init__(
+        self,
+        evaluator: Optional[Callable[[np.ndarray], np.ndarray]],
+        rng: np.random.Generator,
+        *,
+        swarm_size: int,
+        chromosome_length: int,
+        chromosome_low,
+        chromosome_high,
+        wi: float,
+        wm: float,
+        wc: float,
+        communication_probability: float,
+        evaluate: bool = True,
+        dtype=np.float64,
+        cost_dtype=np.float64,
+        block_size: Optional[int] = None,
+        chromosome_dtypes: Union[List[type], type] = float,
+        backend: str = "numpy",
+        shared: Optional[SharedArrays] = None,
+    ):
+        if block_size is not None and block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.dtype = _float_dtype(dtype, "dtype")
+        self.cost_dtype = _float_dtype(cost_dtype, "cost_dtype")
+        self.evaluator = evaluator
+        self.rng = rng
+        self.swarm_size = swarm_size
+        self.chromosome_length = chromosome_length
+        self.chromosome_low = _gene_bounds(chromosome_low, self.dtype)
+        self.chromosome_high = _gene_bounds(chromosome_high, self.dtype)
+        # Integer genes are whole numbers kept in the float matrix: their bounds are rounded inwards and they
+        # are rounded after every move, over the whole block like the domain enforcement
+        self.integer_genes = _integer_genes(chromosome_dtypes, chromosome_length)
+        self.integer_rows = None if self.integer_genes is None else np.flatnonzero(self.integer_genes)
+        if self.integer_genes is not None:
+            self.chromosome_low = np.where(self.integer_genes, np.ceil(self.chromosome_low), self.chromosome_low)
+            self.chromosome_high = np.where(self.integer_genes, np.floor(self.chromosome_high), self.chromosome_high)
+            if np.any(self.chromosome_low > self.chromosome_high):
+                raise ValueError("Integer genes need a whole number between their lower and higher bounds")
+        self.communication_probability = communication_probability
+
+        # Column indexers
+        self.particles_cols = slice(0, swarm_size)
+        self.sons_cols = slice(swarm_size, swarm_size * 2)
+        self.moving_cols = slice(0, swarm_size * 2)  # particles and sons
+        self.ancestors_cols = slice(swarm_size * 2, swarm_size * 3)
+        self.sons_ancestors_cols = slice(swarm_size * 3, swarm_size * 4)
+        self.moving_ancestors_cols = slice(swarm_size * 2, swarm_size * 4)
+        self.best_ancestors_cols = slice(swarm_size * 4, swarm_size * 5)
+        self.sons_best_ancestors_cols = slice(swarm_size * 5, swarm_size * 6)
+        self.moving_best_ancestors_cols = slice(swarm_size * 4, swarm_size * 6)
+
+        # With the numba backend, the movement of a block is a compiled kernel, which takes the bounds per gene
+        self._kernel = move_kernel(backend)
+        self._kernel_bounds = tuple(
+            np.ascontiguousarray(np.broadcast_to(bound, (chromosome_length, 1))[:, 0])
+            for bound in (self.chromosome_low, self.chromosome_high)
+        )
+        self._kernel_integer = (
+            np.zeros(chromosome_length, dtype=bool) if self.integer_genes is None else self.integer_genes[:, 0]
+        )
 
-            # Enforce domain
-            chromosome_matrix[chromosome_slice_rows, _slice] = np.where(
-                chromosome_matrix[chromosome_slice_rows, _slice] > chromosome_high,
-                chromosome_high,
-                chromosome_matrix[chromosome_slice_rows, _slice],
-            )
-            chromosome_matrix[chromosome_slice_rows, _slice] = np.where(
-                chromosome_matrix[chromosome_slice_rows, _slice] < chromosome_low,
-                chromosome_low,
-                chromosome_matrix[chromosome_slice_rows, _slice],
-            )
+        # Column blocks of the moving block, a single one unless tiled
+        moving_width = swarm_size * 2
+        self.block_size = moving_width if block_size is None else min(block_size, moving_width)
+        self.blocks = [
+            slice(start, min(start + self.block_size, moving_width))
+            for start in range(0, moving_width, self.block_size)
+        ]
+        self.tiled = len(self.blocks) > 1
+
+        rows = chromosome_length + self.weights_ammount
+
+        # Genetic soup initialization: sons' columns temporarily hold the first ancestors. Integer genes are
+        # drawn half a unit beyond their bounds and rounded, so every whole number in them is equally likely
+        low, high = self.chromosome_low, self.chromosome_high
+        if self.integer_genes is not None:
+            low, high = low - 0.5 * self.integer_genes, high + 0.5 * self.integer_genes
+        # Shared swarms keep the matrix and costs in shared memory, where evaluation workers read and write them
+        self.shared = shared
+        if shared is None:
+            matrix = np.zeros((rows, swarm_size * 6), dtype=self.dtype, order="F")
+            costs = np.zeros(swarm_size * 6, dtype=self.cost_dtype)
+        else:
+            matrix = shared.create("matrix", (rows, swarm_size * 6), self.dtype, order="F")
+            costs = shared.create("costs", (swarm_size * 6,), self.cost_dtype)
+        for block in self.blocks:
+            moving = matrix[self.chromosome_rows, block]
+            moving[...] = rng.random((chromosome_length, block.stop - block.start), dtype=self.dtype)
+            moving *= high - low
+            moving += low
+            if self.integer_rows is not None:
+                self._enforce_domain(moving)
+        matrix[self.wi_row, self.moving_cols] = wi
+        matrix[self.wm_row, self.moving_cols] = wm
+        matrix[self.wc_row, self.moving_cols] = wc
+
+        self.chromosome_matrix = matrix
+        self.costs = costs
+        self.workspace = _Workspace(
+            chromosome_length,
+            swarm_size,
+            rows,
+            self.weights_ammount,
+            self.dtype,
+            self.cost_dtype,
+            self.block_size,
+            self.tiled,
+        )
 
-            # Calculate new cost
-            chromosome_matrix[cost_slice_row, _slice] = np.apply_along_axis(
-                cost_function,
-                0,
-                chromosome_matrix[chromosome_slice_rows, _slice],
-                *cost_function_args,
-                **cost_function_kwargs,
+        # Without an evaluator, the caller evaluates `moving` and passes the costs to initialize(). Swarms
+        # that will be restored from a checkpoint aren't evaluated at all
+        if evaluator is not None and evaluate:
+            for block in self.blocks:
+                self.costs[block] = evaluator(self._chromosomes(block))
+            self.initialize(self.costs[self.moving_cols])
+        return
+
+    @property
+    def moving(self) -> np.ndarray:
+        # Chromosomes of the particles and sons, the block that is evaluated
+        return self.chromosome_matrix[self.chromosome_rows, self.moving_cols]
+
+    def _copy(self, destination: slice, source: slice, where=True):
+        # Copies whole particles (matrix columns and their costs)
+        np.copyto(self.chromosome_matrix[:, destination], self.chromosome_matrix[:, source], where=where)
+        np.copyto(self.costs[destination], self.costs[source], where=where)
+        return
+
+    def initialize(self, costs: np.ndarray):
+        self.costs[self.moving_cols] = costs
+        self._copy(self.ancestors_cols, self.sons_cols)
+        self._copy(self.best_ancestors_cols, self.ancestors_cols)
+        return
+
+    @property
+    def global_best_index(self) -> int:
+        # Best of the current particles and of the best ancestors (which already hold every past ancestor)
+        costs = self.costs
+        best_particle = int(np.argmin(costs[self.particles_cols]))
+        best_ancestor = int(np.argmin(costs[self.best_ancestors_cols]))
+        if costs[self.best_ancestors_cols][best_ancestor] < costs[self.particles_cols][best_particle]:
+            return self.best_ancestors_cols.start + best_ancestor
+        return best_particle
+
+    @property
+    def solution(self) -> np.ndarray:
+        solution = self.chromosome_matrix[self.chromosome_rows, self.global_best_index]
+        return solution if self.workspace.upcast is None else solution.astype(self.workspace.upcast.dtype)
+
+    @property
+    def best_cost(self) -> float:
+        return float(self.costs[self.global_best_index])
+
+    def save(self, checkpointer: Checkpointer, generation: int):
+        checkpointer.save(
+            generation,
+            self.rng,
+            {"matrix": self.chromosome_matrix, "costs": self.costs},
+            global_best_index=self.global_best_index,
+        )
+        return
+
+    def restore(self, checkpoint: Checkpoint) -> int:
+        # Continues from a checkpoint, working on its copy-on-write arrays (copied into shared swarms). Returns the
+        # generations already run
+        matrix, costs = checkpoint.arrays["matrix"], checkpoint.arrays["costs"]
+        if matrix.shape != self.chromosome_matrix.shape or matrix.dtype != self.dtype:
+            raise ValueError(
+                "Checkpoint matrix is %s %s, expected %s %s for this swarm size, chromosome length and dtype"
+                % (matrix.shape, matrix.dtype, self.chromosome_matrix.shape, self.dtype)
             )
-
-        # Select
-        costs = np.concatenate(
-            (
-                chromosome_matrix[cost_slice_row, particles_slice_cols],
-                chromosome_matrix[cost_slice_row, particles_sons_slice_cols],
+        if costs.dtype != self.cost_dtype:
+            raise ValueError("Checkpoint costs are %s, expected %s" % (costs.dtype, self.cost_dtype))
+        if self.shared is None:
+            self.chromosome_matrix = matrix
+            self.costs = costs
+        else:
+            np.copyto(self.chromosome_matrix, matrix)
+            np.copyto(self.costs, costs)
+        self.rng.bit_generator.state = checkpoint.rng_state
+        return checkpoint.generation
+
+    def stop(self, stopping: EarlyStopping, evaluations: int) -> bool:
+        # Checks the stopping criteria after a generation
+        particles = self.chromosome_matrix[self.chromosome_rows, self.particles_cols]
+        return stopping.update(self.best_cost, particles.T, evaluations)
+
+    def reproduce(self):
+        matrix = self.chromosome_matrix
+        noise = self.workspace.weights_noise
+
+        # Every normal this generation needs (mutation and movement) in one bulk draw. Tiled swarms draw
+        # the movement noise block by block, as they move
+        self.rng.standard_normal(dtype=self.dtype, out=noise if self.tiled else self.workspace.normals)
+
+        self._copy(self.sons_cols, self.particles_cols)
+        # Mutate (the numba kernel applies the mutation to each son as it moves it)
+        noise *= 0.1
+        noise += 1
+        if self._kernel is None:
+            matrix[self.weights_rows, self.sons_cols] *= noise
+        return
+
+    def step(self, generation: int, profiler: Optional[Profiler] = None):
+        # One generation, with its phases timed by the profiler if given
+        if profiler is None:
+            self.reproduce()
+            self.move(generation)
+            self.select()
+            return
+        evaluator = self._require_evaluator()
+        profiler.run("reproduce", self.reproduce)
+        profiler.run("move", self._start_move)
+        for block in self.blocks:
+            profiler.run("move", self._move_block, generation, block)
+            self.costs[block] = profiler.evaluate(evaluator, self._chromosomes(block))
+        profiler.run("move", self._end_move)
+        profiler.run("select", self.select)
+        profiler.end_generation()
+        return
+
+    def move(self, generation: int):
+        evaluator = self._require_evaluator()
+        self._start_move()
+        for block in self.blocks:
+            self._move_block(generation, block)
+            self.costs[block] = evaluator(self._chromosomes(block))
+        self._end_move()
+        return
+
+    def _chromosomes(self, block: slice) -> np.ndarray:
+        # Column block to evaluate, upcast to the cost dtype one tile at a time. Shared swarms evaluated straight
+        # by an Evaluator pass the matrix columns, which its workers read in place and upcast themselves
+        chromosomes = self.chromosome_matrix[self.chromosome_rows, block]
+        upcast = self.workspace.upcast
+        if upcast is None or (self.shared is not None and isinstance(self.evaluator, Evaluator)):
+            return chromosomes
+        upcast = upcast[:, : block.stop - block.start]
+        np.copyto(upcast, chromosomes)
+        return upcast
+
+    def _require_evaluator(self) -> Callable[[np.ndarray], np.ndarray]:
+        if self.evaluator is None:
+            raise RuntimeError("Swarm has no evaluator: evaluate displace() and pass the costs to update_costs()")
+        return self.evaluator
+
+    def displace(self, generation: int) -> np.ndarray:
+        # First half of move: applies the movement rule and returns the block to evaluate
+        self._start_move()
+        for block in self.blocks:
+            self._move_block(generation, block)
+        return self.moving
+
+    def update_costs(self, costs: np.ndarray):
+        # Second half of move: stores the new costs and moves on to the next generation's ancestors
+        self.costs[self.moving_cols] = costs
+        self._end_move()
+        return
+
+    def _start_move(self):
+        matrix = self.chromosome_matrix
+        ws = self.workspace
+
+        np.copyto(ws.global_best[:, 0], matrix[self.chromosome_rows, self.global_best_index])
+
+        # Particles move relative to the current ancestors, while sons move relative to their parents:
+        # the particles before moving become the sons' ancestors, and the next generation's ancestors
+        self._copy(self.sons_ancestors_cols, self.particles_cols)
+        self._copy(self.sons_best_ancestors_cols, self.best_ancestors_cols)
+        np.less(self.costs[self.sons_ancestors_cols], self.costs[self.best_ancestors_cols], out=ws.improved)
+        self._copy(self.sons_best_ancestors_cols, self.sons_ancestors_cols, where=ws.improved)
+        return
+
+    def _move_block(self, generation: int, block: slice):
+        # Movement rule and domain enforcement of one column block of the moving block
+        matrix = self.chromosome_matrix
+        ws = self.workspace
+        width = block.stop - block.start
+        shift = self.swarm_size * 2  # from a moving column to its ancestor's
+        ancestors = slice(block.start + shift, block.stop + shift)
+        best_ancestors = slice(block.start + shift * 2, block.stop + shift * 2)
+
+        if self.tiled:
+            self.rng.standard_normal(dtype=self.dtype, out=ws.block_normals(width))
+        memory_noise, cooperation_noise = ws.noise(width)
+        if self._kernel is not None:
+            self._move_block_compiled(self._kernel, generation, block, memory_noise, cooperation_noise)
+            return
+        deviation, term = ws.deviation[:, :width], ws.term[:, :width]
+
+        moving = matrix[self.chromosome_rows, block]
+
+        # wi: inertia weight
+        np.subtract(moving, matrix[self.chromosome_rows, ancestors], out=deviation)
+        deviation *= matrix[self.wi_row, block]
+        deviation *= 1 / (generation + 1)
+
+        # wm: best ancestor weight
+        np.subtract(matrix[self.chromosome_rows, best_ancestors], moving, out=term)
+        term *= matrix[self.wm_row, block]
+        term *= memory_noise
+        deviation += term
+
+        # wc: global best weight
+        np.subtract(ws.global_best, moving, out=term)
+        term *= matrix[self.wc_row, block]
+        if self.communication_probability != 1:
+            communication = ws.communication[:, :width]
+            np.less(
+                self.rng.random(dtype=self.dtype, out=ws.uniform[:, :width]),
+                self.communication_probability,
+                out=communication,
             )
+            term *= communication
+        term *= cooperation_noise
+        deviation += term
+
+        # Add deviation to particles
+        moving += deviation
+
+        # Enforce domain (and whole numbers in integer genes)
+        self._enforce_domain(moving)
+        return
+
+    def _move_block_compiled(
+        self, kernel: Callable, generation: int, block: slice, memory_noise: np.ndarray, cooperation_noise: np.ndarray
+    ):
+        ws = self.workspace
+        uniform = ws.uniform[:, : block.stop - block.start]
+        if self.communication_probability != 1:
+            self.rng.random(dtype=self.dtype, out=uniform)
+        kernel(
+            self.chromosome_matrix,
+            block.start,
+            block.stop,
+            self.swarm_size,
+            self.chromosome_length,
+            self.dtype.type(1 / (generation + 1)),
+            ws.weights_noise,
+            memory_noise,
+            cooperation_noise,
+            uniform,
+            self.communication_probability,
+            ws.global_best[:, 0],
+            *self._kernel_bounds,
+            self._kernel_integer,
         )
-        sorted_costs_indexes = np.argsort(costs)
-        half_best_indexes = sorted_costs_indexes[: len(sorted_costs_indexes) // 2]
-
-        half_best_indexes = np.where(
-            half_best_indexes > chromosome_matrix.shape[1], (half_best_indexes - swarm_size) * 3, half_best_indexes
-        )
-        chromosome_matrix[:, particles_slice_cols] = chromosome_matrix[:, half_best_indexes]
+        return
+
+    def _enforce_domain(self, chromosomes: np.ndarray):
+        # Gathering the integer rows is much faster than a masked np.rint over the whole block
+        if self.integer_rows is None:
+            pass
+        elif len(self.integer_rows) == self.chromosome_length:
+            np.rint(chromosomes, out=chromosomes)
+        else:
+            integers = chromosomes[self.integer_rows]
+            chromosomes[self.integer_rows] = np.rint(integers, out=integers)
+        np.clip(chromosomes, self.chromosome_low, self.chromosome_high, out=chromosomes)
+        return
+
+    def _end_move(self):
+        self._copy(self.ancestors_cols, self.sons_ancestors_cols)
+        self._copy(self.best_ancestors_cols, self.sons_best_ancestors_cols)
+        return
+
+    def select(self):
+        if self.tiled:
+            self._select_in_place()
+            return
+        matrix = self.chromosome_matrix
+        ws = self.workspace
+
+        # Particles and sons are contiguous, so the best half indexes are already column indexes
+        sorted_costs_indexes = np.argsort(self.costs[self.moving_cols])
+        half_best_indexes = sorted_costs_indexes[: self.swarm_size]
+        np.take(matrix.T, half_best_indexes, axis=0, out=ws.selected, mode="clip")
+        np.take(self.costs, half_best_indexes, out=ws.selected_costs, mode="clip")
+        np.copyto(matrix[:, self.particles_cols], ws.selected.T)
+        np.copyto(self.costs[self.particles_cols], ws.selected_costs)
+        return
+
+    def _select_in_place(self):
+        # Same columns as select(), the survivors in cost order, without a buffer as big as the particles. Surviving
+        # particles first move to the columns of the sons that didn't survive, then every survivor is gathered from
+        # the sons' columns into the particles', so no column is read after being overwritten
+        swarm_size = self.swarm_size
+        order = np.argsort(self.costs[self.moving_cols])[:swarm_size]
+        survivors = np.zeros(swarm_size * 2, dtype=bool)
+        survivors[order] = True
+        stashed = np.flatnonzero(survivors[self.particles_cols])
+        free = np.flatnonzero(~survivors[self.sons_cols]) + swarm_size
+        location = np.arange(swarm_size * 2)
+        location[stashed] = free
+        self._move_columns(free, stashed)
+        self._move_columns(np.arange(swarm_size), location[order])
+        return
+
+    def _move_columns(self, destination: np.ndarray, source: np.ndarray):
+        # Copies whole particles between disjoint column sets, a block at a time
+        matrix = self.chromosome_matrix
+        for start in range(0, len(destination), self.block_size):
+            chunk = slice(start, start + self.block_size)
+            matrix[:, destination[chunk]] = matrix[:, source[chunk]]
+        self.costs[destination] = self.costs[source]
+        return
+
+
+def _start(
+    evaluator: Evaluator,
+    rng: np.random.Generator,
+    resume: Optional[str],
+    surrogate: Optional[Surrogate],
+    **options,
+) -> Tuple[_Swarm, int]:
+    # New swarm, or the one saved in the `resume` checkpoint directory, and the generations it already ran.
+    # `options` are the _Swarm's
+    if surrogate is not None:
+        surrogate.seed_from(rng)
+    swarm = _Swarm(
+        evaluator if surrogate is None else partial(surrogate.evaluate, evaluator),
+        rng,
+        evaluate=resume is None,
+        **options,
+    )
+    if resume is None:
+        return swarm, 0
+    return swarm, swarm.restore(load_checkpoint(resume))
 
-    global_best_chromosome_index = np.argmin(chromosome_matrix[cost_slice_row, current_particles_slice_cols])
 
-    return chromosome_matrix[chromosome_slice_rows, global_best_chromosome_index]  # solution
+def _generations(
+    swarm: _Swarm,
+    evaluator: Evaluator,
+    generations: int,
+    verbose: bool,
+    stopping: Optional[EarlyStopping],
+    checkpoint: Optional[Checkpointer] = None,
+    start: int = 0,
+    profiler: Optional[Profiler] = None,
+    surrogate: Optional[Surrogate] = None,
+) -> Iterator[int]:
+    # Runs the swarm from generation `start`, yielding the number of generations run after each one
+    if stopping is not None:
+        stopping.start(evaluator.evaluations)
+    if checkpoint is not None:
+        checkpoint.start()
+    if surrogate is not None:
+        surrogate.start()
+
+    for generation in _progress(range(start, generations), verbose):
+        swarm.step(generation, profiler)
+        if surrogate is not None:
+            surrogate.end_generation()
+        if checkpoint is not None and checkpoint.due(generation + 1):
+            swarm.save(checkpoint, generation + 1)
+        stop = stopping is not None and swarm.stop(stopping, evaluator.evaluations)
+        yield generation + 1
+        if stop:
+            break
+    return
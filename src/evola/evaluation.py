@@ -0,0 +1,344 @@
+import asyncio
+import inspect
+import math
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from evola.shared import SharedArrays, SharedSpec, attach
+
+
+def evaluate(
+    cost_function: Callable,
+    chromosomes: np.ndarray,
+    cost_function_args: tuple,
+    cost_function_kwargs: dict,
+    vectorized: bool,
+) -> np.ndarray:
+    # chromosomes is a (chromosome_length, n) block, one candidate per column
+    if not vectorized:
+        return np.apply_along_axis(cost_function, 0, chromosomes, *cost_function_args, **cost_function_kwargs)
+
+    # Vectorized cost functions receive the whole block and return one cost per column
+    costs = np.asarray(cost_function(chromosomes, *cost_function_args, **cost_function_kwargs))
+    if costs.shape != (chromosomes.shape[1],):
+        raise ValueError(
+            "Vectorized cost function must return one cost per chromosome: expected shape %s, got %s"
+            % ((chromosomes.shape[1],), costs.shape)
+        )
+    return costs
+
+
+def _evaluate_chunk(args) -> np.ndarray:
+    # Module level so it can be pickled to worker processes
+    return evaluate(*args)
+
+
+def _evaluate_shared_chunk(args) -> None:
+    # Evaluates columns start:stop of a shared matrix, writing their costs into the shared costs
+    cost_function, cost_function_args, cost_function_kwargs, vectorized, specs, rows, start, stop = args
+    matrix, costs = attach(specs)
+    # A float32 matrix with float64 costs is evaluated in float64, as the swarm does in process
+    chromosomes = matrix[:rows, start:stop]
+    chromosomes = chromosomes.astype(np.promote_types(chromosomes.dtype, costs.dtype), copy=False)
+    costs[start:stop] = evaluate(cost_function, chromosomes, cost_function_args, cost_function_kwargs, vectorized)
+    return
+
+
+class Evaluator:
+    """
+    Evaluates blocks of chromosomes (one candidate per column), either in process or
+    spread in chunks over a `concurrent.futures` executor.
+
+    When `n_workers` is given, a process pool is created on first use and reused until `close()`.
+    `n_threads` does the same with a thread pool, for cost functions that release the GIL (most of their
+    time in NumPy, BLAS or C extensions): threads start fast and evaluate views of the block, with nothing
+    pickled or copied. A user supplied `executor` is never shut down by the evaluator.
+
+    With `cache_size`, the costs of the last `cache_size` distinct chromosomes are kept (least recently
+    used are evicted first) and repeated chromosomes are not evaluated again. Float chromosomes can be
+    matched up to `cache_quantization` (chromosomes that round to the same multiple of it share a cost).
+
+    With `deduplicate`, identical chromosomes within a block are evaluated once and their cost is
+    scattered back to every copy.
+
+    With `shared` arrays holding a Fortran ordered "matrix" and its "costs" (one per column), blocks that are
+    column ranges of the matrix are evaluated in place: workers attach to the shared memory and only receive
+    the column ranges, writing the costs straight into the shared costs. Other blocks are sent as usual.
+    """
+
+    def __init__(
+        self,
+        cost_function: Callable,
+        cost_function_args: Optional[tuple] = None,
+        cost_function_kwargs: Optional[dict] = None,
+        vectorized: bool = False,
+        executor: Optional[Executor] = None,
+        n_workers: Optional[int] = None,
+        n_threads: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        cache_quantization: Optional[float] = None,
+        deduplicate: bool = False,
+        shared: Optional[SharedArrays] = None,
+    ) -> None:
+        if sum(option is not None for option in (executor, n_workers, n_threads)) > 1:
+            raise ValueError("Use only one of executor, n_workers and n_threads")
+        if n_workers is not None and n_workers < 1:
+            raise ValueError("n_workers must be at least 1")
+        if n_threads is not None and n_threads < 1:
+            raise ValueError("n_threads must be at least 1")
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+        if cache_size is not None and cache_size < 1:
+            raise ValueError("cache_size must be at least 1")
+        if cache_quantization is not None and cache_quantization <= 0:
+            raise ValueError("cache_quantization must be positive")
+
+        self.cost_function = cost_function
+        self.cost_function_args = cost_function_args or tuple()
+        self.cost_function_kwargs = cost_function_kwargs or dict()
+        self.vectorized = vectorized
+        self.n_workers = n_workers
+        self.n_threads = n_threads
+        self.chunksize = chunksize
+
+        self._executor = executor
+        self._owns_executor = False
+
+        self.cache_size = cache_size
+        self.cache_quantization = cache_quantization
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "Optional[OrderedDict[bytes, float]]" = OrderedDict() if cache_size is not None else None
+
+        self.shared = shared
+        self.deduplicate = deduplicate
+        self.saved_evaluations = 0  # duplicates within a block that weren't evaluated
+        self.evaluations = 0  # candidates passed to the cost function
+        return
+
+    @property
+    def parallel(self) -> bool:
+        return self._executor is not None or self.n_workers is not None or self.n_threads is not None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.n_threads is not None:
+                self._executor = ThreadPoolExecutor(max_workers=self.n_threads, thread_name_prefix="evola")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.n_workers)
+            self._owns_executor = True
+        return self._executor
+
+    def _chunksize(self, n: int) -> int:
+        if self.chunksize is not None:
+            return self.chunksize
+        if self.n_threads is not None and self.vectorized:
+            # Handing a chunk to a thread costs next to nothing, but every call of a vectorized function pays
+            # its own overhead: one chunk per thread, as large as possible
+            return max(1, math.ceil(n / self.n_threads))
+        # A few chunks per worker keeps them busy without paying IPC per candidate
+        workers = self.n_workers or self.n_threads or getattr(self._executor, "_max_workers", None) or 1
+        return max(1, math.ceil(n / (workers * 4)))
+
+    def _chunks(self, chromosomes: np.ndarray) -> List[np.ndarray]:
+        n = chromosomes.shape[1]
+        chunksize = self._chunksize(n)
+        return [chromosomes[:, i : i + chunksize] for i in range(0, n, chunksize)]  # noqa
+
+    def _keys(self, chromosomes: np.ndarray) -> List[bytes]:
+        if self.cache_quantization is not None:
+            rows = np.rint(chromosomes.T / self.cache_quantization).astype(np.int64)
+        else:
+            rows = np.ascontiguousarray(chromosomes.T)
+        return [row.tobytes() for row in rows]
+
+    def _cached(self, chromosomes: np.ndarray, cache: "OrderedDict[bytes, float]", cache_size: int) -> np.ndarray:
+        keys = self._keys(chromosomes)
+        costs = np.empty(len(keys))
+        missing = []
+        for i, key in enumerate(keys):
+            cost = cache.get(key)
+            if cost is None:
+                missing.append(i)
+            else:
+                cache.move_to_end(key)
+                costs[i] = cost
+
+        self.cache_hits += len(keys) - len(missing)
+        self.cache_misses += len(missing)
+
+        if missing:
+            costs[missing] = self._evaluate(chromosomes[:, missing])
+            for i in missing:
+                cache[keys[i]] = costs[i]
+                cache.move_to_end(keys[i])
+            while len(cache) > cache_size:
+                cache.popitem(last=False)
+        return costs
+
+    def summary(self) -> str:
+        # Lines for the simulation final message
+        summary = ""
+        if self._cache is not None:
+            lookups = self.cache_hits + self.cache_misses
+            summary += "\t-> Cost cache: %d hits, %d misses (%.1f%% hit rate)\n" % (
+                self.cache_hits,
+                self.cache_misses,
+                100 * self.cache_hits / lookups if lookups else 0.0,
+            )
+        if self.deduplicate:
+            summary += "\t-> Duplicates: %d evaluations saved\n" % self.saved_evaluations
+        return summary
+
+    def __call__(self, chromosomes: np.ndarray) -> np.ndarray:
+        if self.deduplicate and chromosomes.shape[1] > 1:
+            unique, inverse = np.unique(chromosomes.T, axis=0, return_inverse=True)
+            self.saved_evaluations += chromosomes.shape[1] - unique.shape[0]
+            return self._lookup(unique.T)[inverse.reshape(-1)]
+        return self._lookup(chromosomes)
+
+    def _lookup(self, chromosomes: np.ndarray) -> np.ndarray:
+        if self._cache is not None and self.cache_size is not None:
+            return self._cached(chromosomes, self._cache, self.cache_size)
+        return self._evaluate(chromosomes)
+
+    def _evaluate(self, chromosomes: np.ndarray) -> np.ndarray:
+        self.evaluations += chromosomes.shape[1]
+        if not self.parallel or chromosomes.shape[1] == 0:
+            return evaluate(
+                self.cost_function,
+                chromosomes,
+                self.cost_function_args,
+                self.cost_function_kwargs,
+                self.vectorized,
+            )
+
+        columns = self.shared.columns("matrix", chromosomes) if self.shared is not None else None
+        if columns is not None and self.shared is not None:
+            return self._evaluate_shared(self.shared, *columns)
+
+        tasks = [
+            (self.cost_function, chunk, self.cost_function_args, self.cost_function_kwargs, self.vectorized)
+            for chunk in self._chunks(chromosomes)
+        ]
+        # Executor.map yields results in submission order, so costs line up with the columns
+        return np.concatenate(list(self._get_executor().map(_evaluate_chunk, tasks)))
+
+    def _evaluate_shared(self, shared: SharedArrays, rows: int, start: int, stop: int) -> np.ndarray:
+        specs: Tuple[SharedSpec, ...] = (shared.spec("matrix"), shared.spec("costs"))
+        chunksize = self._chunksize(stop - start)
+        tasks = [
+            (
+                self.cost_function,
+                self.cost_function_args,
+                self.cost_function_kwargs,
+                self.vectorized,
+                specs,
+                rows,
+                i,
+                min(i + chunksize, stop),
+            )
+            for i in range(start, stop, chunksize)
+        ]
+        for _ in self._get_executor().map(_evaluate_shared_chunk, tasks):
+            pass
+        return shared.arrays["costs"][start:stop].copy()
+
+    def close(self) -> None:
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._owns_executor = False
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __deepcopy__(self, memo):
+        # Copies of a population share the evaluator (and its pool) instead of duplicating it
+        return self
+
+    def __getstate__(self):
+        # Executors can't be pickled: an unpickled evaluator (e.g. in a worker process) runs in process
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_owns_executor"] = False
+        state["n_workers"] = None
+        state["n_threads"] = None
+        state["shared"] = None
+        return state
+
+
+def is_async(cost_function: Callable) -> bool:
+    # async def functions, and instances of classes with an async def __call__
+    return inspect.iscoroutinefunction(cost_function) or inspect.iscoroutinefunction(
+        getattr(cost_function, "__call__", None)
+    )
+
+
+class AsyncEvaluator:
+    """
+    Evaluates blocks of chromosomes with an `async def` cost function (e.g. one that queries a simulation
+    server), one coroutine per candidate, running at most `concurrency` of them at a time.
+
+    An evaluation that takes longer than `timeout` seconds is cancelled and the candidate gets
+    `timeout_cost`, so it loses every selection.
+    """
+
+    def __init__(
+        self,
+        cost_function: Callable,
+        cost_function_args: Optional[tuple] = None,
+        cost_function_kwargs: Optional[dict] = None,
+        concurrency: int = 10,
+        timeout: Optional[float] = None,
+        timeout_cost: float = np.inf,
+    ) -> None:
+        if not is_async(cost_function):
+            raise ValueError("Cost function must be a coroutine function (async def)")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+
+        self.cost_function = cost_function
+        self.cost_function_args = cost_function_args or tuple()
+        self.cost_function_kwargs = cost_function_kwargs or dict()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.timeout_cost = timeout_cost
+        self.timeouts = 0  # evaluations cancelled for exceeding the timeout
+        self.evaluations = 0  # candidates passed to the cost function
+        return
+
+    async def _evaluate_one(self, semaphore: asyncio.Semaphore, chromosome: np.ndarray) -> float:
+        async with semaphore:
+            coroutine = self.cost_function(chromosome, *self.cost_function_args, **self.cost_function_kwargs)
+            try:
+                return float(await asyncio.wait_for(coroutine, self.timeout))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return self.timeout_cost
+
+    async def __call__(self, chromosomes: np.ndarray) -> np.ndarray:
+        # Each candidate gets its own copy, since the swarm keeps updating the block once this returns
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.evaluations += chromosomes.shape[1]
+        costs = await asyncio.gather(
+            *(self._evaluate_one(semaphore, chromosomes[:, i].copy()) for i in range(chromosomes.shape[1]))
+        )
+        return np.array(costs, dtype=float)
+
+    def summary(self) -> str:
+        # Lines for the simulation final message
+        if self.timeout is None:
+            return ""
+        return "\t-> Timeouts: %d evaluations\n" % self.timeouts
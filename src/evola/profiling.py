@@ -0,0 +1,78 @@
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+PHASES = ("reproduce", "move", "evaluate", "select")
+
+
+class Profiler:
+    """
+    Times the phases of every generation: reproduce, move (the movement rule and bookkeeping, without the
+    evaluation), evaluate (the cost function calls) and select. Engines only take the timed path when given a
+    profiler, so runs without one pay nothing.
+
+    `totals` holds the cumulative seconds per phase and `history` one record per generation (phase seconds and
+    the number of candidates evaluated), unless `keep_history` is False. Hooks are called as
+    `on_generation(generation, record)` after each generation and `on_evaluate(candidates, seconds)` after each
+    evaluation, e.g. to export them to a metrics pipeline.
+    """
+
+    def __init__(
+        self,
+        on_generation: Optional[Callable[[int, Dict[str, float]], None]] = None,
+        on_evaluate: Optional[Callable[[int, float], None]] = None,
+        keep_history: bool = True,
+    ) -> None:
+        self.on_generation = on_generation
+        self.on_evaluate = on_evaluate
+        self.keep_history = keep_history
+        self.totals: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.history: List[Dict[str, float]] = []
+        self.generations = 0
+        self.evaluations = 0
+        self._current: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self._current_evaluations = 0
+        return
+
+    def run(self, phase: str, function: Callable, *args):
+        start = perf_counter()
+        result = function(*args)
+        self._current[phase] += perf_counter() - start
+        return result
+
+    def evaluate(self, evaluator: Callable[[np.ndarray], np.ndarray], chromosomes: np.ndarray) -> np.ndarray:
+        start = perf_counter()
+        costs = evaluator(chromosomes)
+        seconds = perf_counter() - start
+        self._current["evaluate"] += seconds
+        self._current_evaluations += chromosomes.shape[1]
+        if self.on_evaluate is not None:
+            self.on_evaluate(chromosomes.shape[1], seconds)
+        return costs
+
+    def end_generation(self) -> None:
+        self.generations += 1
+        self.evaluations += self._current_evaluations
+        for phase, seconds in self._current.items():
+            self.totals[phase] += seconds
+
+        record = dict(self._current, evaluations=self._current_evaluations)
+        if self.keep_history:
+            self.history.append(record)
+        if self.on_generation is not None:
+            self.on_generation(self.generations, record)
+
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._current_evaluations = 0
+        return
+
+    def summary(self) -> str:
+        # Line for the simulation final message
+        total = sum(self.totals.values())
+        if not total:
+            return ""
+        phases = " | ".join(
+            "%s %.3fs (%.1f%%)" % (phase, seconds, 100 * seconds / total) for phase, seconds in self.totals.items()
+        )
+        return "\t-> Phases: %s\n" % phases
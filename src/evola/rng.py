@@ -0,0 +1,56 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+BIT_GENERATORS = {
+    "PCG64": np.random.PCG64,
+    "SFC64": np.random.SFC64,
+}
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+def seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if seed is None:
+        # Derived from the global numpy state, so np.random.seed still makes runs repeatable
+        seed = int(np.random.randint(np.iinfo(np.int32).max))
+    return np.random.SeedSequence(seed)
+
+
+def _bit_generator(seed: np.random.SeedSequence, bit_generator: str) -> np.random.BitGenerator:
+    try:
+        return BIT_GENERATORS[bit_generator](seed)
+    except KeyError as exc:
+        raise ValueError(
+            "Unknown bit generator %r, choose one of: %s" % (bit_generator, ", ".join(BIT_GENERATORS))
+        ) from exc
+
+
+def make_rng(
+    seed: Seed = None,
+    rng: Optional[np.random.Generator] = None,
+    bit_generator: str = "PCG64",
+) -> np.random.Generator:
+    if rng is not None:
+        if seed is not None:
+            raise ValueError("Use either seed or rng, not both")
+        return rng
+    return np.random.Generator(_bit_generator(seed_sequence(seed), bit_generator))
+
+
+def spawn_rngs(seed: Seed, n: int, bit_generator: str = "PCG64") -> List[np.random.Generator]:
+    # Independent child streams, e.g. one per replicate or per worker process
+    return [np.random.Generator(_bit_generator(child, bit_generator)) for child in seed_sequence(seed).spawn(n)]
+
+
+def generator_seed_sequence(rng: np.random.Generator) -> np.random.SeedSequence:
+    # Seed sequence `rng` was made from. BitGenerator.seed_seq needs NumPy 1.25, older releases keep it as _seed_seq
+    bit_generator = rng.bit_generator
+    return getattr(bit_generator, "seed_seq", None) or getattr(bit_generator, "_seed_seq")
+
+
+def child_rng(rng: np.random.Generator) -> np.random.Generator:
+    # Independent child stream of `rng` that doesn't advance it (Generator.spawn needs NumPy 1.25)
+    return np.random.Generator(type(rng.bit_generator)(generator_seed_sequence(rng).spawn(1)[0]))
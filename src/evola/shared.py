@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import threading
+import weakref
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Literal, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+
+class SharedSpec(NamedTuple):
+    # What a worker process needs to attach to a shared array
+    segment: str
+    shape: Tuple[int, ...]
+    dtype: str
+    order: Literal["C", "F"]
+
+
+class SharedArrays:
+    """
+    numpy arrays kept in `multiprocessing.shared_memory` segments, so worker processes attach to them by name
+    instead of receiving pickled copies (see `shared` in Evaluator and `shared_memory` in epso).
+
+    The segments are unlinked by close(), when leaving a `with` block (also on exceptions), when the object is
+    garbage collected or at interpreter exit, whichever comes first. Views still alive keep their memory
+    mapped until they are gone, but the segments themselves are removed.
+    """
+
+    def __init__(self) -> None:
+        self.arrays: Dict[str, np.ndarray] = {}
+        self._segments: Dict[str, SharedMemory] = {}
+        self._specs: Dict[str, SharedSpec] = {}
+        self._finalizer = weakref.finalize(self, _release, self._segments)
+        return
+
+    def create(self, name: str, shape: Tuple[int, ...], dtype, order: Literal["C", "F"] = "C") -> np.ndarray:
+        # New zero filled array in its own segment
+        dtype = np.dtype(dtype)
+        segment = SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self._segments[name] = segment
+        _created.add(segment.name)
+        self._specs[name] = SharedSpec(segment.name, tuple(shape), dtype.str, order)
+        array: np.ndarray = np.ndarray(shape, dtype=dtype, buffer=segment.buf, order=order)
+        array[...] = 0
+        self.arrays[name] = array
+        return array
+
+    def spec(self, name: str) -> SharedSpec:
+        return self._specs[name]
+
+    def columns(self, name: str, block: np.ndarray) -> Optional[Tuple[int, int, int]]:
+        # (rows, start, stop) when `block` is the first rows of a column range of the named Fortran ordered
+        # array (the blocks the swarm evaluates), None for any other array (e.g. a copy)
+        array = self.arrays.get(name)
+        if array is None or block.ndim != 2 or block.dtype != array.dtype or block.shape[0] > array.shape[0]:
+            return None
+        column_stride = array.strides[1]
+        if block.strides != (array.itemsize, column_stride) and block.shape[1] > 1:
+            return None
+        offset = block.__array_interface__["data"][0] - array.__array_interface__["data"][0]
+        if offset < 0 or offset % column_stride:
+            return None
+        start = offset // column_stride
+        stop = start + block.shape[1]
+        if stop > array.shape[1]:
+            return None
+        return block.shape[0], start, stop
+
+    def close(self) -> None:
+        self.arrays.clear()
+        self._finalizer()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __getstate__(self):
+        raise TypeError("SharedArrays can't be pickled: pass their specs to the workers")
+
+
+def _release(segments: Dict[str, SharedMemory]):
+    for segment in segments.values():
+        _created.discard(segment.name)
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+        try:
+            segment.close()
+        except BufferError:
+            pass  # views are still alive, the memory is unmapped once they are gone
+    segments.clear()
+    return
+
+
+# Segments created by this process (and inherited by forked workers)
+_created: Set[str] = set()
+# Segments a worker process is attached to, kept between tasks of the same run. Thread pools attach concurrently
+_attached: Dict[str, Tuple[SharedMemory, np.ndarray]] = {}
+_attached_lock = threading.Lock()
+
+
+def attach(specs: Tuple[SharedSpec, ...]) -> List[np.ndarray]:
+    # Arrays of the given specs in this process. Segments of a previous run are detached first
+    with _attached_lock:
+        return _attach(specs)
+
+
+def _attach(specs: Tuple[SharedSpec, ...]) -> List[np.ndarray]:
+    names = {spec.segment for spec in specs}
+    if set(_attached) != names:
+        stale = [segment for segment, _ in _attached.values()]
+        _attached.clear()  # drops the arrays, so their segments can be closed
+        for segment in stale:
+            try:
+                segment.close()
+            except BufferError:
+                pass
+        for spec in specs:
+            segment = _open(spec.segment)
+            array: np.ndarray = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=segment.buf, order=spec.order)
+            _attached[spec.segment] = (segment, array)
+    return [_attached[spec.segment][1] for spec in specs]
+
+
+def _open(name: str) -> SharedMemory:
+    # The creating process owns the segment: workers must not track it, or they would remove it when they exit
+    try:
+        return SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    except TypeError:  # Python < 3.13 tracks every segment it opens
+        segment = SharedMemory(name=name)
+    # Workers started by multiprocessing, and threads of the creating process, report to the creator's tracker,
+    # which already tracks the segment once: untracking it there would untrack the creator's segment
+    if os.name == "posix" and multiprocessing.parent_process() is None and name not in _created:
+        resource_tracker.unregister(segment._name, "shared_memory")  # type: ignore[attr-defined]
+    return segment
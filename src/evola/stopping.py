@@ -0,0 +1,97 @@
+import math
+import time
+from typing import Optional
+
+import numpy as np
+
+STAGNATION = "stagnation"
+TARGET_COST = "target_cost"
+SWARM_COLLAPSE = "swarm_collapse"
+MAX_EVALUATIONS = "max_evaluations"
+TIME_LIMIT = "time_limit"
+
+
+class EarlyStopping:
+    """
+    Stopping criteria checked after every generation. They can be combined, and the first one met ends the run:
+
+    - stagnation: the best cost didn't improve by more than `tol` for `patience` generations
+    - target cost: the best cost is at or below `target_cost`
+    - swarm collapse: every gene's spread (max - min over the particles) is below `min_spread`
+    - max evaluations: the generations evaluated `max_evaluations` candidates or more (checked per
+      generation, so the last one may overshoot)
+    - time limit: the generations ran for `time_limit` seconds or more
+
+    After a run, `reason` names the criterion that stopped it (None if every generation ran), and
+    `generation` and `evaluations` count the generations and evaluations it made.
+    """
+
+    def __init__(
+        self,
+        patience: Optional[int] = None,
+        tol: float = 0.0,
+        target_cost: Optional[float] = None,
+        min_spread: Optional[float] = None,
+        max_evaluations: Optional[int] = None,
+        time_limit: Optional[float] = None,
+    ) -> None:
+        if patience is not None and patience < 1:
+            raise ValueError("patience must be at least 1")
+        if tol < 0:
+            raise ValueError("tol can't be negative")
+        if min_spread is not None and min_spread < 0:
+            raise ValueError("min_spread can't be negative")
+        if max_evaluations is not None and max_evaluations < 1:
+            raise ValueError("max_evaluations must be at least 1")
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError("time_limit must be positive")
+
+        self.patience = patience
+        self.tol = tol
+        self.target_cost = target_cost
+        self.min_spread = min_spread
+        self.max_evaluations = max_evaluations
+        self.time_limit = time_limit
+        self.start()
+        return
+
+    def start(self, evaluations: int = 0) -> None:
+        # Resets the criteria for a new run, `evaluations` being the evaluator's count when it starts
+        self.reason: Optional[str] = None
+        self.generation = 0
+        self.evaluations = 0
+        self._initial_evaluations = evaluations
+        self._best_cost = math.inf
+        self._stagnant = 0
+        self._start_time = time.perf_counter()
+        return
+
+    def update(self, best_cost: float, particles: np.ndarray, evaluations: int) -> bool:
+        # Called after each generation with the best cost so far, the particles (one per row) and the
+        # evaluator's count. Returns True when the run must stop
+        self.generation += 1
+        self.evaluations = evaluations - self._initial_evaluations
+
+        if best_cost < self._best_cost - self.tol:
+            self._stagnant = 0
+        else:
+            self._stagnant += 1
+        self._best_cost = min(self._best_cost, best_cost)
+
+        if self.target_cost is not None and best_cost <= self.target_cost:
+            self.reason = TARGET_COST
+        elif self.patience is not None and self._stagnant >= self.patience:
+            self.reason = STAGNATION
+        elif self.min_spread is not None and np.all(np.ptp(particles, axis=0) < self.min_spread):
+            self.reason = SWARM_COLLAPSE
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = MAX_EVALUATIONS
+        elif self.time_limit is not None and time.perf_counter() - self._start_time >= self.time_limit:
+            self.reason = TIME_LIMIT
+        return self.reason is not None
+
+    def summary(self) -> str:
+        # Line for the simulation final message
+        if self.reason is None:
+            return ""
+        return "\t-> Stopped early (%s) after %d generations\n" % (self.reason, self.generation)
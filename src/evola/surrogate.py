@@ -0,0 +1,171 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from evola.rng import Seed, child_rng, make_rng
+
+
+def spearman(x: np.ndarray, y: np.ndarray) -> float:
+    # Rank correlation (ties ranked by order), nan when there are fewer than 2 values or one side is constant
+    if len(x) < 2:
+        return math.nan
+    x_ranks = np.argsort(np.argsort(x, kind="stable"), kind="stable").astype(float)
+    y_ranks = np.argsort(np.argsort(y, kind="stable"), kind="stable").astype(float)
+    if np.ptp(x) == 0 or np.ptp(y) == 0:
+        return math.nan
+    return float(np.corrcoef(x_ranks, y_ranks)[0, 1])
+
+
+class Surrogate:
+    """
+    Pre-screens candidates with a k-nearest neighbours model trained online on the costs already evaluated, so
+    only promising ones reach the cost function: the `screen` share of each batch with the best predicted costs,
+    and every other one with probability `exploration`. Candidates it screens out get an infinite cost, so they
+    never survive selection in place of an evaluated one.
+
+    The model predicts the inverse distance weighted mean cost of the `neighbours` nearest evaluated candidates
+    (genes scaled by their spread), out of the last `capacity` evaluated. Until `min_samples` are evaluated,
+    every candidate is. `history` holds one record per generation: candidates, true evaluations and the
+    Spearman rank correlation between predicted and true costs of the evaluated candidates.
+
+    Exploration draws from `seed` when given. Otherwise each run hands the surrogate a child stream of its own
+    generator, so seeded runs with a surrogate repeat.
+    """
+
+    def __init__(
+        self,
+        screen: float = 0.5,
+        exploration: float = 0.1,
+        neighbours: int = 5,
+        min_samples: int = 50,
+        capacity: int = 2000,
+        seed: Seed = None,
+        keep_history: bool = True,
+    ) -> None:
+        if not 0 < screen <= 1:
+            raise ValueError("screen must be in (0, 1]")
+        if not 0 <= exploration <= 1:
+            raise ValueError("exploration must be in [0, 1]")
+        if neighbours < 1:
+            raise ValueError("neighbours must be at least 1")
+        if capacity < max(neighbours, min_samples):
+            raise ValueError("capacity must hold at least neighbours and min_samples candidates")
+
+        self.screen = screen
+        self.exploration = exploration
+        self.neighbours = neighbours
+        self.min_samples = min_samples
+        self.capacity = capacity
+        self.keep_history = keep_history
+        self.seed = seed
+        self.rng: Optional[np.random.Generator] = None if seed is None else make_rng(seed)
+        self.history: List[Dict[str, float]] = []
+        self.candidates = 0
+        self.evaluations = 0
+        self.generations = 0
+
+        # Ring buffer of the evaluated candidates (one per column) and their costs
+        self._chromosomes = np.empty((0, capacity))
+        self._costs = np.empty(capacity)
+        self._size = 0
+        self._next = 0
+        self.start()
+        return
+
+    def seed_from(self, rng: np.random.Generator) -> None:
+        # Without a seed of its own, the surrogate draws from a child stream of the run's generator (spawning it
+        # doesn't advance the run's stream)
+        if self.seed is None:
+            self.rng = child_rng(rng)
+        return
+
+    def start(self) -> None:
+        # Starts the first generation: what was evaluated before (e.g. the initial swarm) counts towards the
+        # totals, but isn't a generation. The model keeps what it learned
+        self._current = dict(candidates=0, evaluations=0)
+        self._predicted: List[np.ndarray] = []
+        self._true: List[np.ndarray] = []
+        return
+
+    @property
+    def savings(self) -> float:
+        # Share of the candidates that weren't evaluated
+        return 1 - self.evaluations / self.candidates if self.candidates else 0.0
+
+    def evaluate(self, evaluator: Callable[[np.ndarray], np.ndarray], chromosomes: np.ndarray) -> np.ndarray:
+        # Costs of a (chromosome_length, n) block: true costs for the candidates that pass the screening
+        n = chromosomes.shape[1]
+        self.candidates += n
+        self._current["candidates"] += n
+        if self._size < self.min_samples:
+            costs = np.asarray(evaluator(chromosomes), dtype=float)
+            self.evaluations += n
+            self._current["evaluations"] += n
+            self._learn(chromosomes, costs)
+            return costs
+
+        if self.rng is None:  # used outside a run
+            self.rng = make_rng()
+        predicted = self.predict(chromosomes)
+        promising = self.rng.random(n) < self.exploration
+        promising[np.argsort(predicted, kind="stable")[: math.ceil(self.screen * n)]] = True
+        chosen = np.flatnonzero(promising)
+
+        costs = np.full(n, np.inf)
+        true_costs = np.asarray(evaluator(chromosomes[:, chosen]), dtype=float)
+        costs[chosen] = true_costs
+        self.evaluations += len(chosen)
+        self._current["evaluations"] += len(chosen)
+        self._predicted.append(predicted[chosen])
+        self._true.append(true_costs)
+        self._learn(chromosomes[:, chosen], true_costs)
+        return costs
+
+    def predict(self, chromosomes: np.ndarray) -> np.ndarray:
+        archive, costs = self._chromosomes[:, : self._size], self._costs[: self._size]
+        scale = archive.std(axis=1, keepdims=True)
+        scale[scale == 0] = 1
+        archive, chromosomes = archive / scale, chromosomes / scale
+
+        # Squared distances between every evaluated candidate (rows) and every new one (columns)
+        distances = (
+            np.sum(archive**2, axis=0)[:, None] + np.sum(chromosomes**2, axis=0) - 2 * archive.T @ chromosomes
+        )
+        k = min(self.neighbours, self._size)
+        nearest = np.argpartition(distances, k - 1, axis=0)[:k]
+        weights = 1 / (np.sqrt(np.maximum(np.take_along_axis(distances, nearest, axis=0), 0)) + 1e-12)
+        return np.sum(weights * costs[nearest], axis=0) / np.sum(weights, axis=0)
+
+    def _learn(self, chromosomes: np.ndarray, costs: np.ndarray):
+        finite = np.isfinite(costs)
+        chromosomes, costs = chromosomes[:, finite][:, -self.capacity :], costs[finite][-self.capacity :]  # noqa
+        if self._chromosomes.shape[0] != chromosomes.shape[0]:
+            self._chromosomes = np.empty((chromosomes.shape[0], self.capacity), order="F")
+        columns = (self._next + np.arange(len(costs))) % self.capacity
+        self._chromosomes[:, columns] = chromosomes
+        self._costs[columns] = costs
+        self._next = (self._next + len(costs)) % self.capacity
+        self._size = min(self._size + len(costs), self.capacity)
+        return
+
+    def end_generation(self) -> None:
+        predicted = np.concatenate(self._predicted) if self._predicted else np.empty(0)
+        true_costs = np.concatenate(self._true) if self._true else np.empty(0)
+        record = dict(self._current, correlation=spearman(predicted, true_costs))
+        self.generations += 1
+        if self.keep_history:
+            self.history.append(record)
+        self.start()
+        return
+
+    def summary(self) -> str:
+        # Line for the simulation final message
+        correlations = [record["correlation"] for record in self.history if not math.isnan(record["correlation"])]
+        correlation = " | mean rank correlation %.2f" % np.mean(correlations) if correlations else ""
+        return "\t-> Surrogate: %d of %d candidates evaluated (%.1f%% saved)%s\n" % (
+            self.evaluations,
+            self.candidates,
+            100 * self.savings,
+            correlation,
+        )
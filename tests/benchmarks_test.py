@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks import suite
+from benchmarks.problems import PROBLEMS
+
+
+@pytest.mark.parametrize("name", list(PROBLEMS))
+def test_problems_take_one_chromosome_or_a_block(name):
+    problem = PROBLEMS[name]
+    block = np.random.default_rng(0).uniform(problem.low, problem.high, (3, 5))
+
+    costs = problem.cost_function(block)
+
+    assert costs.shape == (5,)
+    np.testing.assert_allclose(costs, [problem.cost_function(block[:, i]) for i in range(5)])
+    assert np.all(costs >= problem.optimum(3) - 1e-6)
+
+
+def test_suite_writes_comparable_results(tmp_path, capsys):
+    output = str(tmp_path / "results.json")
+    arguments = ["--problems", "sphere", "rosenbrock", "--dimensions", "1", "2", "--swarm-sizes", "10"]
+    arguments += ["--generations", "5", "--repeats", "1"]
+
+    results = suite.main(arguments + ["--output", output])
+    suite.main(arguments + ["--compare", output])
+
+    with open(output) as file:
+        report = json.load(file)
+    assert report["results"] == results
+    assert len(results) == 6  # rosenbrock needs 2 dimensions
+    assert {result["engine"] for result in results} == {"epso", "EPSO"}
+    for result in results:
+        assert result["evaluations_per_second"] == pytest.approx(2 * 10 * 6 / result["seconds"])
+        assert result["peak_memory_bytes"] > 0
+    assert capsys.readouterr().out.count("speed x") == 6
@@ -0,0 +1,91 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from evola.checkpoint import Checkpointer, load_checkpoint
+from evola.epso import EPSO, epso
+
+
+def sphere(chromossome):
+    return float(np.sum(chromossome**2))
+
+
+@pytest.mark.parametrize("bit_generator", ["PCG64", "SFC64"])
+def test_epso_resume_is_bit_for_bit(tmp_path, bit_generator):
+    path = str(tmp_path)
+    full = epso(30, 20, 3, -5, 5, sphere, seed=0, bit_generator=bit_generator)
+
+    epso(30, 10, 3, -5, 5, sphere, seed=0, bit_generator=bit_generator, checkpoint=Checkpointer(path, every=5))
+    assert load_checkpoint(path).generation == 10
+    resumed = epso(30, 20, 3, -5, 5, sphere, bit_generator=bit_generator, resume=path)
+
+    np.testing.assert_array_equal(resumed, full)
+
+
+def academic(generations, **kwargs):
+    return EPSO(
+        generations=generations,
+        size=30,
+        chromossome_length=3,
+        chromossome_low=-5,
+        chromossome_high=5,
+        cost_function=sphere,
+        cost_function_args=(),
+        **kwargs,
+    )
+
+
+def test_academic_resume_is_bit_for_bit(tmp_path):
+    path = str(tmp_path)
+
+    def simulation(generations, **kwargs):
+        sim = academic(generations, **kwargs)
+        sim.run_cli(verbose=False)
+        return sim
+
+    full = simulation(20, seed=1)
+    simulation(10, seed=1, checkpoint=Checkpointer(path, every=10))
+    resumed = simulation(20, resume=path)
+
+    assert resumed.best_cost == full.best_cost
+    np.testing.assert_array_equal(resumed.best_solution, full.best_solution)
+    assert resumed.cost_history == full.cost_history[10:]
+
+
+def test_academic_single_replicate_resumes(tmp_path):
+    path = str(tmp_path)
+    full = academic(20, seed=1).run_replicates(1)[0]
+    academic(10, seed=1, checkpoint=Checkpointer(path, every=10)).run_replicates(1)
+    assert load_checkpoint(path).generation == 10
+    resumed = academic(20, resume=path).run_replicates(1)[0]
+
+    assert resumed.best_cost == full.best_cost
+    np.testing.assert_array_equal(resumed.best_history, full.best_history[10:])
+
+
+def test_checkpoint_every_seconds_keeps_last(tmp_path):
+    path = str(tmp_path)
+    checkpoint = Checkpointer(path, seconds=1e-9)
+    epso(10, 7, 2, -1, 1, sphere, seed=2, checkpoint=checkpoint)
+
+    assert checkpoint.saves == 7
+    assert sorted(os.path.basename(file) for file in glob.glob(os.path.join(path, "*.npy"))) == [
+        "costs-7.npy",
+        "matrix-7.npy",
+    ]
+    assert load_checkpoint(path).state["global_best_index"] >= 0
+
+
+def test_resume_errors(tmp_path):
+    path = str(tmp_path)
+    with pytest.raises(ValueError):
+        epso(10, 5, 2, -1, 1, sphere, resume=path)  # nothing saved yet
+
+    epso(10, 5, 2, -1, 1, sphere, seed=3, checkpoint=Checkpointer(path, every=5))
+    with pytest.raises(ValueError):
+        epso(20, 10, 2, -1, 1, sphere, resume=path)  # different swarm size
+
+    with pytest.raises(ValueError):
+        Checkpointer(path)
@@ -0,0 +1,133 @@
+import multiprocessing
+import socket
+import threading
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from evola.distributed import ARGS, PULL, Coordinator, _receive, main, serve
+from evola.epso import EPSO, epso
+from evola.evaluation import _evaluate_chunk
+
+
+def sphere(chromosomes, shift=0.0):
+    return np.sum((chromosomes - shift) ** 2, axis=0)
+
+
+def failing(chromosomes):
+    raise ValueError("bad chromosome")
+
+
+def start_worker(coordinator, cost_function=sphere, results=None):
+    def run():
+        batches = serve(coordinator.address, cost_function)
+        if results is not None:
+            results.append(batches)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_epso_over_localhost_workers():
+    expected = epso(30, 15, 4, -5, 5, sphere, vectorized=True, seed=0)
+
+    with Coordinator() as coordinator:
+        processes = [
+            multiprocessing.get_context("spawn").Process(
+                target=main, args=(["%s:%d" % coordinator.address, "tests.distributed_test:sphere"],)
+            )
+            for _ in range(2)
+        ]
+        for process in processes:
+            process.start()
+        solution = epso(30, 15, 4, -5, 5, sphere, vectorized=True, seed=0, executor=coordinator)
+    for process in processes:
+        process.join(10)
+        assert process.exitcode == 0
+
+    np.testing.assert_array_equal(solution, expected)
+
+
+def test_academic_epso_over_workers():
+    def simulation(**kwargs):
+        sim = EPSO(10, 20, 3, -5, 5, lambda chromossome: float(np.sum(chromossome**2)), (), seed=1, **kwargs)
+        sim.run_cli(verbose=False)
+        return sim
+
+    with Coordinator() as coordinator:
+        workers = [start_worker(coordinator) for _ in range(3)]
+        sim = simulation(executor=coordinator)
+    for worker in workers:
+        worker.join(10)
+
+    expected = simulation()
+    assert sim.best_cost == expected.best_cost
+    np.testing.assert_array_equal(sim.best_solution, expected.best_solution)
+
+
+def test_arguments_reach_the_workers():
+    def solve(**kwargs):
+        return epso(20, 30, 3, -5, 5, sphere, (3.0,), vectorized=True, seed=4, **kwargs)
+
+    with Coordinator() as coordinator:
+        start_worker(coordinator)
+        solution = solve(executor=coordinator)
+        # A later run with other arguments sends them again
+        shifted = epso(20, 30, 3, -5, 5, sphere, cost_function_kwargs={"shift": -2.0}, seed=4, executor=coordinator)
+
+    np.testing.assert_array_equal(solution, solve())
+    np.testing.assert_allclose(solution, 3.0, atol=0.1)
+    np.testing.assert_array_equal(shifted, epso(20, 30, 3, -5, 5, sphere, cost_function_kwargs={"shift": -2.0}, seed=4))
+
+
+def test_faster_workers_take_more_batches():
+    def slow_sphere(chromosomes):
+        time.sleep(0.05)
+        return sphere(chromosomes)
+
+    fast: List[int] = []
+    slow: List[int] = []
+    with Coordinator() as coordinator:
+        workers = [start_worker(coordinator, results=fast), start_worker(coordinator, slow_sphere, results=slow)]
+        while coordinator.workers < 2:
+            time.sleep(0.01)
+        epso(40, 10, 3, -5, 5, sphere, vectorized=True, seed=2, executor=coordinator)
+    for worker in workers:
+        worker.join(10)
+
+    assert fast[0] > 2 * slow[0]
+
+
+def test_lost_worker_batch_is_requeued():
+    def lose_batch(address):
+        # A worker that takes a batch and disconnects without answering
+        with socket.create_connection(address) as lost:
+            lost.sendall(PULL)
+            assert bytes(_receive(lost, 4)) == ARGS  # then the batch
+        start_worker(coordinator)
+
+    with Coordinator(timeout=5) as coordinator:
+        threading.Thread(target=lose_batch, args=(coordinator.address,), daemon=True).start()
+        solution = epso(20, 5, 3, -5, 5, sphere, vectorized=True, seed=3, executor=coordinator)
+        assert coordinator.lost_workers == coordinator.requeued == 1
+        assert "1 lost (1 batches requeued)" in coordinator.summary()
+
+    np.testing.assert_array_equal(solution, epso(20, 5, 3, -5, 5, sphere, vectorized=True, seed=3))
+
+
+def test_worker_errors_are_raised():
+    with Coordinator() as coordinator:
+        start_worker(coordinator, failing)
+        with pytest.raises(RuntimeError, match="bad chromosome"):
+            epso(10, 5, 2, -1, 1, sphere, vectorized=True, executor=coordinator)
+
+
+def test_coordinator_only_evaluates():
+    with Coordinator() as coordinator:
+        with pytest.raises(TypeError):
+            coordinator.submit(print, "hello")
+    with pytest.raises(RuntimeError):
+        coordinator.submit(_evaluate_chunk, (sphere, np.zeros((2, 3)), (), {}, True))
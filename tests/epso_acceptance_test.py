@@ -49,3 +49,51 @@ def test_run_performance_version():
 
     assert isclose(best_cost, -7.487, abs_tol=0.001)
     assert isclose(best_solution, -1.191, abs_tol=0.001)
+
+
+def test_run_performance_version_vectorized():
+    # chromossome is the (chromosome_length, n) block, so this returns one cost per particle
+    def cost(chromossome):
+        x = chromossome[0]
+        return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+    best_solution = epso(
+        swarm_size=100,
+        generations=50,
+        chromosome_length=1,
+        chromosome_low=-2,
+        chromosome_high=10,
+        cost_function=cost,
+        cost_function_args=(),
+        vectorized=True,
+    )
+
+    best_cost = cost(best_solution)
+
+    assert isclose(best_cost, -7.487, abs_tol=0.001)
+    assert isclose(best_solution[0], -1.191, abs_tol=0.001)
+
+
+def test_run_cli_array_backed_swarm():
+    def cost(chromossome):
+        return (chromossome[0] - 3) ** 2 + (chromossome[1] - 0.5) ** 2
+
+    sim = EPSO(
+        generations=20,
+        size=50,
+        chromossome_length=2,
+        chromossome_low=[0, 0],
+        chromossome_high=[10, 1],
+        cost_function=cost,
+        cost_function_args=(),
+        chromossome_dtypes=[int, float],
+    )
+
+    sim.run_cli(verbose=False)
+
+    swarm = sim.population
+    elements = swarm.elements
+    assert len(elements) == swarm.size == 50
+    assert all(float(p.chromossome[0]).is_integer() for p in elements)
+    assert isclose(swarm.average_cost(), sum(p.cost for p in elements) / swarm.size)
+    assert sim.best_particle.cost == sim.best_cost <= min(p.cost for p in elements)
@@ -0,0 +1,120 @@
+import asyncio
+import struct
+from math import isclose
+
+import numpy as np
+
+from evola.epso import EPSO, epso, epso_async
+from evola.evaluation import AsyncEvaluator
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+class SimulationServer:
+    # Local stand-in for a simulation server: receives a chromosome as doubles, answers with its cost
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        (length,) = struct.unpack("!I", await reader.readexactly(4))
+        chromossome = np.frombuffer(await reader.readexactly(8 * length), dtype=">f8")
+        await asyncio.sleep(self.delay)
+        writer.write(struct.pack("!d", wingo(chromossome)))
+        await writer.drain()
+        writer.close()
+        self.requests += 1
+        self.active -= 1
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def cost_function(self):
+        async def cost(chromossome):
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+            writer.write(struct.pack("!I", len(chromossome)) + chromossome.astype(">f8").tobytes())
+            (value,) = struct.unpack("!d", await reader.readexactly(8))
+            writer.close()
+            return value
+
+        return cost
+
+
+def test_epso_async_against_server():
+    async def main():
+        async with SimulationServer(delay=0.001) as server:
+            solution = await epso_async(
+                swarm_size=50,
+                generations=20,
+                chromosome_length=1,
+                chromosome_low=-2,
+                chromosome_high=10,
+                cost_function=server.cost_function(),
+                concurrency=8,
+                seed=0,
+            )
+        return solution, server
+
+    solution, server = asyncio.run(main())
+
+    assert isclose(wingo(solution), -7.487, abs_tol=0.001)
+    assert server.requests == 50 * 2 * 21  # the initial block and one block per generation
+    assert 1 < server.max_active <= 8
+
+
+def test_epso_async_matches_epso():
+    async def cost(chromossome):
+        return wingo(chromossome)
+
+    solution = asyncio.run(epso_async(20, 10, 1, -2, 10, cost, seed=3))
+    expected = epso(20, 10, 1, -2, 10, wingo, seed=3)
+
+    np.testing.assert_array_equal(solution, expected)
+
+
+def test_async_evaluator_timeout():
+    async def cost(chromossome):
+        await asyncio.sleep(chromossome[0])
+        return float(chromossome[0])
+
+    evaluator = AsyncEvaluator(cost, concurrency=4, timeout=0.05)
+    costs = asyncio.run(evaluator(np.array([[0.0, 1.0, 0.01, 2.0]])))
+
+    np.testing.assert_array_equal(costs, [0.0, np.inf, 0.01, np.inf])
+    assert evaluator.timeouts == 2
+
+
+def test_run_async_against_server():
+    async def main():
+        async with SimulationServer() as server:
+            sim = EPSO(
+                generations=10,
+                size=100,
+                chromossome_length=1,
+                chromossome_low=-2,
+                chromossome_high=10,
+                cost_function=server.cost_function(),
+                cost_function_args=(),
+                seed=1,
+            )
+            await sim.run_async(concurrency=16, verbose=False)
+        return sim
+
+    sim = asyncio.run(main())
+
+    assert isclose(sim.best_cost, -7.487, abs_tol=0.001)
+    assert isclose(sim.best_particle.chromossome[0], -1.191, abs_tol=0.001)
+    assert len(sim.cost_history) == 10
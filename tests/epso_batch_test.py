@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from evola.epso import epso, epso_batch
+from evola.stopping import MAX_EVALUATIONS, TARGET_COST, EarlyStopping
+
+SHIFTS = np.linspace(-3, 3, 7)
+
+
+def sphere(chromosomes, shift=0.0):
+    return np.sum((chromosomes - shift) ** 2, axis=0)
+
+
+def batched_sphere(chromosomes, shift):
+    return np.sum((chromosomes - shift[:, None, None]) ** 2, axis=1)
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+@pytest.mark.parametrize("communication_probability", [1.0, 0.6])
+def test_batch_of_one_runs_like_epso(communication_probability):
+    kwargs = dict(vectorized=True, seed=3, communication_probability=communication_probability)
+    expected = epso(20, 30, 4, -5, [1, 2, 3, 4], sphere, **kwargs)
+    solutions = epso_batch(1, 20, 30, 4, -5, [1, 2, 3, 4], sphere, **kwargs)
+    assert solutions.shape == (1, 4)
+    np.testing.assert_array_equal(solutions[0], expected)
+
+    np.testing.assert_array_equal(
+        epso_batch(1, 10, 20, 1, -2, 10, wingo, seed=1)[0], epso(10, 20, 1, -2, 10, wingo, seed=1)
+    )
+
+
+def test_problems_with_their_own_arguments():
+    args = [(shift,) for shift in SHIFTS]
+    solutions = epso_batch(7, 20, 100, 3, -5, 5, batched_sphere, args, batched=True, seed=0)
+
+    assert solutions.shape == (7, 3)
+    np.testing.assert_allclose(solutions, np.repeat(SHIFTS[:, None], 3, axis=1), atol=1e-3)
+    # Same problems, evaluated one at a time
+    np.testing.assert_array_equal(epso_batch(7, 20, 100, 3, -5, 5, sphere, args, vectorized=True, seed=0), solutions)
+    np.testing.assert_array_equal(epso_batch(7, 20, 100, 3, -5, 5, sphere, args, seed=0), solutions)
+
+
+def test_per_problem_bounds():
+    low = np.array([[-5, -5], [1, -5], [-5, 2]])
+    high = np.array([[5, 5], [5, 5], [5, 3]])
+    solutions = epso_batch(3, 20, 50, 2, low, high, sphere, vectorized=True, seed=1)
+
+    assert np.all((low <= solutions) & (solutions <= high))
+    np.testing.assert_allclose(solutions, [[0, 0], [1, 0], [0, 2]], atol=1e-3)
+
+
+def test_per_problem_stopping():
+    stopping = [EarlyStopping(target_cost=1e-2), EarlyStopping(max_evaluations=400), EarlyStopping()]
+    args = [(shift,) for shift in SHIFTS[:3]]
+    solutions = epso_batch(3, 20, 60, 3, -5, 5, batched_sphere, args, batched=True, seed=2, stopping=stopping)
+
+    assert [criteria.reason for criteria in stopping] == [TARGET_COST, MAX_EVALUATIONS, None]
+    assert stopping[0].generation < 60 and stopping[1].generation == 10 and stopping[2].generation == 60
+    assert stopping[1].evaluations == 400
+    assert sphere(solutions[0], SHIFTS[0]) <= 1e-2
+    assert sphere(solutions[2], SHIFTS[2]) < sphere(solutions[1], SHIFTS[1])
+
+    shared = EarlyStopping(patience=5, tol=1e-3)
+    solutions = epso_batch(3, 20, 1000, 3, -5, 5, batched_sphere, args, batched=True, seed=2, stopping=shared)
+    assert shared.reason is not None and shared.generation < 1000
+    np.testing.assert_allclose(solutions, np.repeat(SHIFTS[:3, None], 3, axis=1), atol=0.1)
+
+
+def test_batch_errors():
+    with pytest.raises(ValueError):
+        epso_batch(0, 10, 5, 2, -1, 1, sphere, vectorized=True)
+    with pytest.raises(ValueError):
+        epso_batch(3, 10, 5, 2, -1, 1, sphere, [(0,), (1,)], vectorized=True)
+    with pytest.raises(ValueError):
+        epso_batch(3, 10, 5, 2, np.zeros((2, 2)), 1, sphere, vectorized=True)
+    with pytest.raises(ValueError):
+        epso_batch(3, 10, 5, 2, -1, 1, sphere, vectorized=True, stopping=[EarlyStopping()])
+    with pytest.raises(ValueError, match="one cost per chromosome"):
+        epso_batch(3, 10, 5, 2, -1, 1, lambda chromosomes: chromosomes.sum(axis=(1, 2)), batched=True)
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from math import isclose
+
+import numpy as np
+import pytest
+
+from evola.epso import epso, epso_iter
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+def sphere(chromosomes):
+    return np.einsum("ij,ij->j", chromosomes, chromosomes, dtype=np.float64)
+
+
+@pytest.mark.parametrize("cost_dtype", [np.float32, np.float64])
+def test_float32_swarm(cost_dtype):
+    seen = []
+
+    def cost(chromossome):
+        seen.append(chromossome.dtype)
+        return wingo(chromossome.astype(np.float64))
+
+    solution = epso(100, 30, 1, -2, 10, cost, seed=0, dtype=np.float32, cost_dtype=cost_dtype)
+
+    # float64 costs evaluate (and return) the float32 chromosomes in float64
+    assert solution.dtype == cost_dtype
+    assert set(seen) == {np.dtype(cost_dtype)}
+    assert isclose(wingo(solution.astype(np.float64)), -7.487, abs_tol=0.001)
+
+
+@pytest.mark.parametrize("shared_memory", [False, True])
+def test_float32_swarm_evaluates_float64_blocks(shared_memory):
+    seen = set()
+
+    def cost(chromosomes):
+        seen.add(chromosomes.dtype)
+        return sphere(chromosomes)
+
+    with ThreadPoolExecutor(2) as executor:
+        solution = epso(
+            40,
+            10,
+            3,
+            -5,
+            5,
+            cost,
+            vectorized=True,
+            seed=4,
+            dtype=np.float32,
+            block_size=16,
+            executor=executor,
+            shared_memory=shared_memory,
+        )
+
+    assert seen == {np.dtype(np.float64)}
+    assert solution.dtype == np.float64
+    # Same values as the swarm's float32 chromosomes
+    np.testing.assert_array_equal(solution, solution.astype(np.float32))
+
+
+@pytest.mark.parametrize("cost_dtype", [np.float32, np.float64])
+def test_cost_dtype(cost_dtype):
+    states = epso_iter(
+        50, 20, 8, -5, 5, sphere, vectorized=True, seed=1, dtype="float32", cost_dtype=cost_dtype, cost_views=True
+    )
+    for state in states:
+        assert state.best_chromosome.dtype == np.float32
+        assert state.costs is not None and state.costs.dtype == cost_dtype
+    assert state.best_cost < 1
+
+
+def test_float64_is_default_and_other_dtypes_are_rejected():
+    assert epso(10, 2, 2, -1, 1, sphere, vectorized=True, seed=2).dtype == np.float64
+    with pytest.raises(ValueError):
+        epso(10, 2, 2, -1, 1, sphere, vectorized=True, dtype=np.float16)
+    with pytest.raises(ValueError):
+        epso(10, 2, 2, -1, 1, sphere, vectorized=True, cost_dtype=np.int64)
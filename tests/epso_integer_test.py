@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from evola.epso import EPSO, epso, epso_iter
+
+TARGET = np.array([[1.3], [-2.0], [0.7], [2.0]])
+
+
+def distance(chromosomes):
+    return np.sum((chromosomes - TARGET) ** 2, axis=0)
+
+
+def test_per_gene_bounds():
+    # Bounds of shape (L,) apply per gene, not per particle
+    low, high = [-5, -4, -3, -2], [5, 4, 3, 2]
+    for state in epso_iter(30, 40, 4, low, high, distance, vectorized=True, seed=0):
+        assert np.all(state.best_chromosome >= low) and np.all(state.best_chromosome <= high)
+    np.testing.assert_allclose(state.best_chromosome, TARGET[:, 0], atol=1e-3)
+
+    solution = epso(30, 40, 4, np.array(low), np.array(high), distance, vectorized=True, seed=0)
+    np.testing.assert_array_equal(solution, state.best_chromosome)
+
+
+@pytest.mark.parametrize("block_size", [None, 7])
+def test_mixed_integer_genes(block_size):
+    solution = epso(
+        30,
+        40,
+        4,
+        [-5, -4.5, -3, -2.5],
+        [5, 4.5, 3, 2.5],
+        distance,
+        vectorized=True,
+        seed=1,
+        block_size=block_size,
+        chromosome_dtypes=[float, int, float, np.int32],
+    )
+
+    assert solution[1] == -2 and solution[3] == 2
+    np.testing.assert_allclose(solution[[0, 2]], [1.3, 0.7], atol=1e-3)
+
+
+def test_integer_genes_stay_whole_and_in_bounds():
+    seen = []
+
+    def cost(chromosomes):
+        seen.append(chromosomes.copy())
+        return distance(chromosomes)
+
+    epso(20, 10, 4, -2.5, [2.5, 1, 3, 0.5], cost, vectorized=True, seed=2, chromosome_dtypes=int)
+
+    seen = np.concatenate(seen, axis=1)
+    np.testing.assert_array_equal(seen, np.rint(seen))
+    assert seen.min() == -2
+    np.testing.assert_array_equal(seen.max(axis=1), [2, 1, 3, 0])
+
+
+def test_invalid_genes():
+    with pytest.raises(ValueError):
+        epso(10, 5, 3, [-1, -1], 1, distance, vectorized=True)
+    with pytest.raises(ValueError):
+        epso(10, 5, 3, -1, 1, distance, vectorized=True, chromosome_dtypes=[int, float])
+    with pytest.raises(ValueError):
+        epso(10, 5, 3, -1, 1, distance, vectorized=True, chromosome_dtypes=str)
+    with pytest.raises(ValueError):
+        epso(10, 5, 3, 0.2, 0.8, distance, vectorized=True, chromosome_dtypes=int)
+
+
+def test_academic_integer_genes_start_whole():
+    sim = EPSO(
+        generations=1,
+        size=20,
+        chromossome_length=2,
+        chromossome_low=[0, 0],
+        chromossome_high=[10, 1],
+        cost_function=lambda chromossome: float(np.sum(chromossome)),
+        cost_function_args=(),
+        chromossome_dtypes=[np.int64, float],
+        seed=0,
+    )
+
+    integers = np.array([particle.chromossome[0] for particle in sim.population.elements])
+    np.testing.assert_array_equal(integers, np.rint(integers))
+    assert integers.min() >= 0 and integers.max() <= 10
+
+
+def test_academic_integer_bounds_are_rounded_inwards():
+    def make(low, high):
+        return EPSO(
+            generations=5,
+            size=20,
+            chromossome_length=2,
+            chromossome_low=low,
+            chromossome_high=high,
+            cost_function=lambda chromossome: float(np.sum(chromossome**2)),
+            cost_function_args=(),
+            chromossome_dtypes=[int, float],
+            seed=1,
+        )
+
+    sim = make([0.5, 0.5], [3.7, 3.7])
+    integers = np.array([particle.chromossome[0] for particle in sim.population.elements])
+    assert integers.min() >= 1 and integers.max() <= 3
+    # Moving pulls towards 0, which is outside the rounded bounds
+    assert sim.run_replicates(1)[0].best_chromossome[0] == 1
+
+    with pytest.raises(ValueError):
+        make([0.2, 0], [0.8, 1])
@@ -0,0 +1,42 @@
+from math import isclose
+
+import pytest
+
+from evola.epso import epso_islands
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+@pytest.mark.parametrize("topology", ["ring", "full"])
+def test_epso_islands(topology):
+    result = epso_islands(
+        n_islands=3,
+        swarm_size=50,
+        generations=30,
+        chromosome_length=1,
+        chromosome_low=-2,
+        chromosome_high=10,
+        cost_function=wingo,
+        migration_interval=5,
+        migration_size=2,
+        topology=topology,
+        vectorized=True,
+        seed=11,
+    )
+
+    assert isclose(result.best_cost, -7.487, abs_tol=0.001)
+    assert result.best_cost == result.island_best_costs.min() == wingo(result.solution)
+    assert result.island_best_costs.shape == result.migration_seconds.shape == (3,)
+    assert result.migrations == 5
+
+
+def broken(chromossome):
+    raise ArithmeticError("broken cost function")
+
+
+def test_epso_islands_reports_island_errors():
+    with pytest.raises(RuntimeError, match="broken cost function"):
+        epso_islands(2, 10, 5, 1, 0, 1, broken)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from evola.epso import epso, epso_iter
+from evola.stopping import EarlyStopping
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+def test_epso_iter_yields_every_generation():
+    states = []
+    for state in epso_iter(50, 10, 1, -2, 10, wingo, seed=0, cost_views=True):
+        assert state.costs is not None
+        states.append((state.generation, state.best_cost, state.best_chromosome.copy(), state.costs.copy()))
+
+    assert [generation for generation, _, _, _ in states] == list(range(1, 11))
+    best_costs = [best_cost for _, best_cost, _, _ in states]
+    assert best_costs == sorted(best_costs, reverse=True)  # the global best never gets worse
+    for _, best_cost, best_chromosome, costs in states:
+        assert best_cost == wingo(best_chromosome)
+        assert costs.shape == (50,) and best_cost <= costs.min()
+
+    np.testing.assert_array_equal(states[-1][2], epso(50, 10, 1, -2, 10, wingo, seed=0))
+
+
+def test_epso_iter_snapshots_are_read_only():
+    state = next(epso_iter(10, 5, 2, -1, 1, lambda c: float(np.sum(c**2)), seed=1, cost_views=True))
+
+    assert state.costs is not None
+    with pytest.raises(ValueError):
+        state.best_chromosome[0] = 0
+    with pytest.raises(ValueError):
+        state.costs[0] = 0
+
+
+def test_epso_iter_early_exit_and_stopping():
+    generations = [state.generation for state in epso_iter(20, 100, 1, -2, 10, wingo, seed=2)]
+    assert generations == list(range(1, 101))
+
+    stopping = EarlyStopping(target_cost=-7.4)
+    states = list(epso_iter(100, 100, 1, -2, 10, wingo, seed=2, stopping=stopping))
+    assert states[-1].generation == stopping.generation < 100
+    assert states[-1].costs is None
+
+    # Closing the iterator early releases the evaluation pool
+    iterator = epso_iter(20, 100, 1, -2, 10, wingo, seed=2, n_workers=2)
+    next(iterator)
+    iterator.close()
+
+
+def test_epso_iter_returns_the_solution(capsys):
+    stopping = EarlyStopping(target_cost=-7.4)
+    iterator = epso_iter(50, 30, 1, -2, 10, wingo, seed=4, verbose=True, stopping=stopping)
+    with pytest.raises(StopIteration) as done:
+        while True:
+            next(iterator)
+
+    np.testing.assert_array_equal(done.value.value, epso(50, 30, 1, -2, 10, wingo, seed=4, stopping=stopping))
+    assert "Stopped early" in capsys.readouterr().out
+    # No generations left to run, as when resuming a finished run
+    assert epso(20, 0, 1, -2, 10, wingo, seed=4).shape == (1,)
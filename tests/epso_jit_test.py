@@ -0,0 +1,86 @@
+import importlib.util
+
+import numpy as np
+import pytest
+
+from evola.epso import epso
+from evola.epso.jit import _compile, _move_kernel
+from evola.epso.performance_version import _Swarm
+from evola.evaluation import Evaluator
+
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(communication_probability=1.0),
+        dict(communication_probability=0.5, block_size=7),
+        dict(communication_probability=0.7, chromosome_dtypes=[int, float, float]),
+    ],
+)
+def test_move_kernel_matches_numpy(options):
+    # The kernel runs uncompiled here, its arithmetic is the NumPy path's
+    def run(kernel):
+        swarm = _Swarm(
+            Evaluator(sphere, vectorized=True),
+            np.random.default_rng(0),
+            swarm_size=10,
+            chromosome_length=3,
+            chromosome_low=[-5, -4, -3],
+            chromosome_high=[5, 4, 3],
+            wi=0.5,
+            wm=0.5,
+            wc=0.5,
+            communication_probability=options.get("communication_probability", 1.0),
+            block_size=options.get("block_size"),
+            chromosome_dtypes=options.get("chromosome_dtypes", float),
+        )
+        swarm._kernel = kernel
+        for generation in range(5):
+            swarm.step(generation)
+        return swarm.chromosome_matrix, swarm.costs
+
+    matrix, costs = run(_move_kernel)
+    expected_matrix, expected_costs = run(None)
+    np.testing.assert_allclose(matrix, expected_matrix, rtol=1e-12)
+    np.testing.assert_allclose(costs, expected_costs, rtol=1e-12)
+
+
+@pytest.mark.skipif(HAS_NUMBA, reason="numba is installed")
+def test_numba_backend_falls_back_to_numpy():
+    _compile.cache_clear()
+    with pytest.warns(RuntimeWarning, match="numba"):
+        solution = epso(20, 10, 3, -5, 5, sphere, vectorized=True, seed=0, backend="numba")
+    np.testing.assert_array_equal(solution, epso(20, 10, 3, -5, 5, sphere, vectorized=True, seed=0))
+
+
+@pytest.mark.skipif(not HAS_NUMBA, reason="numba is not installed")
+@pytest.mark.parametrize(
+    "options", [dict(communication_probability=0.5), dict(chromosome_dtypes=int, dtype=np.float32)]
+)
+def test_numba_backend_matches_numpy(options):
+    solution = epso(50, 30, 4, -5, 5, sphere, vectorized=True, seed=0, backend="numba", **options)
+    np.testing.assert_array_equal(solution, epso(50, 30, 4, -5, 5, sphere, vectorized=True, seed=0, **options))
+
+
+@pytest.mark.skipif(not HAS_NUMBA, reason="numba is not installed")
+def test_numba_backend_with_njit_cost_function():
+    import numba
+
+    @numba.njit
+    def njit_sphere(chromosome):
+        return np.sum(chromosome**2)
+
+    solution = epso(50, 60, 4, -5, 5, njit_sphere, seed=0, backend="numba", communication_probability=0.7)
+    expected = epso(50, 60, 4, -5, 5, sphere, vectorized=True, seed=0, communication_probability=0.7)
+    np.testing.assert_allclose(solution, expected, atol=1e-6)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        epso(10, 5, 2, -1, 1, sphere, vectorized=True, backend="cuda")
@@ -0,0 +1,132 @@
+from math import isclose
+
+import numpy as np
+import pytest
+
+from evola.epso import EPSO, epso
+from evola.evaluation import Evaluator
+
+
+# Cost functions sent to worker processes must be importable, so they live at module level
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+def test_process_pool_keeps_column_order():
+    chromosomes = np.random.uniform(-2, 10, (3, 101))
+
+    expected = Evaluator(wingo)(chromosomes)
+    with Evaluator(wingo, n_workers=2, chunksize=7) as evaluator:
+        first = evaluator(chromosomes)
+        second = evaluator(chromosomes)
+
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(second, expected)
+
+
+def test_run_performance_version_process_pool():
+    best_solution = epso(
+        swarm_size=100,
+        generations=50,
+        chromosome_length=1,
+        chromosome_low=-2,
+        chromosome_high=10,
+        cost_function=wingo,
+        n_workers=2,
+    )
+
+    assert isclose(wingo(best_solution), -7.487, abs_tol=0.001)
+
+
+def test_run_cli_process_pool():
+    sim = EPSO(
+        generations=10,
+        size=100,
+        chromossome_length=1,
+        chromossome_low=-2,
+        chromossome_high=10,
+        cost_function=wingo,
+        cost_function_args=(),
+        n_workers=2,
+    )
+
+    sim.run_cli(verbose=False)
+
+    assert isclose(sim.best_cost, -7.487, abs_tol=0.001)
+
+
+def test_run_replicates_process_pool():
+    def make_sim():
+        return EPSO(
+            generations=10,
+            size=50,
+            chromossome_length=1,
+            chromossome_low=-2,
+            chromossome_high=10,
+            cost_function=wingo,
+            cost_function_args=(),
+            seed=3,
+        )
+
+    sim = make_sim()
+    results = sim.run_replicates(4, workers=2)
+
+    # Same seed, same replicate streams, whether they run in the pool or in process
+    expected = make_sim().run_replicates(4)
+
+    assert len(results) == len(sim.best_hist) == len(sim.avg_hist) == 4
+    assert [r.best_cost for r in results] == [r.best_cost for r in expected] == sim.best_hist
+    assert results[0].best_history.shape == results[0].average_history.shape == (10,)
+    assert sim.best_cost == min(sim.best_hist)
+    assert isclose(sim.best_cost, wingo(results[int(np.argmin(sim.best_hist))].best_chromossome))
+
+
+def test_run_replicates_closes_the_evaluation_pool():
+    sim = EPSO(
+        generations=3,
+        size=10,
+        chromossome_length=1,
+        chromossome_low=-2,
+        chromossome_high=10,
+        cost_function=wingo,
+        cost_function_args=(),
+        n_threads=2,
+        seed=3,
+    )
+    sim.run_replicates(2)
+    assert sim.population.evaluator._executor is None
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+def test_thread_pool_keeps_column_order():
+    chromosomes = np.random.uniform(-2, 10, (3, 101))
+
+    with Evaluator(wingo, n_threads=3) as evaluator:
+        np.testing.assert_array_equal(evaluator(chromosomes), Evaluator(wingo)(chromosomes))
+        assert evaluator._chunksize(101) == 9  # a few chunks per thread
+    with Evaluator(sphere, vectorized=True, n_threads=3) as evaluator:
+        np.testing.assert_array_equal(evaluator(chromosomes), sphere(chromosomes))
+        assert evaluator._chunksize(101) == 34  # one chunk per thread
+
+
+def test_thread_pool_runs_match_serial_runs():
+    expected = epso(30, 20, 4, -5, 5, sphere, vectorized=True, seed=0)
+    np.testing.assert_array_equal(epso(30, 20, 4, -5, 5, sphere, vectorized=True, seed=0, n_threads=2), expected)
+
+    def simulation(**kwargs):
+        sim = EPSO(10, 50, 1, -2, 10, wingo, (), seed=1, **kwargs)
+        sim.run_cli(verbose=False)
+        return sim
+
+    assert simulation(n_threads=2).best_cost == simulation().best_cost
+
+
+def test_thread_pool_options():
+    with pytest.raises(ValueError):
+        Evaluator(wingo, n_threads=0)
+    with pytest.raises(ValueError):
+        Evaluator(wingo, n_workers=2, n_threads=2)
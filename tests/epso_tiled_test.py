@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from evola.checkpoint import Checkpointer
+from evola.epso import epso
+from evola.epso.performance_version import _Swarm
+from evola.evaluation import Evaluator
+from evola.profiling import Profiler
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+def test_block_size_covering_the_swarm_is_not_tiled():
+    untiled = epso(20, 15, 3, -5, 5, sphere, vectorized=True, seed=0, communication_probability=0.5)
+    covering = epso(20, 15, 3, -5, 5, sphere, vectorized=True, seed=0, communication_probability=0.5, block_size=40)
+    np.testing.assert_array_equal(covering, untiled)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 16])
+def test_tiled_run(block_size):
+    widths = []
+
+    def cost(chromosomes):
+        widths.append(chromosomes.shape[1])
+        return sphere(chromosomes)
+
+    solution = epso(50, 60, 4, -5, 5, cost, vectorized=True, seed=1, block_size=block_size)
+    again = epso(50, 60, 4, -5, 5, sphere, vectorized=True, seed=1, block_size=block_size)
+
+    assert max(widths) == block_size
+    assert sum(widths) == 100 * 61
+    assert sphere(solution) < 1e-6
+    np.testing.assert_array_equal(again, solution)
+
+
+def make_swarm(block_size=None, seed=2):
+    return _Swarm(
+        Evaluator(sphere, vectorized=True),
+        np.random.default_rng(seed),
+        swarm_size=25,
+        chromosome_length=3,
+        chromosome_low=-5,
+        chromosome_high=5,
+        wi=0.5,
+        wm=0.5,
+        wc=0.5,
+        communication_probability=1.0,
+        block_size=block_size,
+    )
+
+
+def test_in_place_selection_matches_untiled_selection():
+    swarm = make_swarm(block_size=8)
+    untiled = make_swarm()
+    for generation in range(3):
+        swarm.reproduce()
+        swarm.move(generation)
+        # Same inputs for both selections (the swarms only differ in how their noise is drawn)
+        np.copyto(untiled.chromosome_matrix, swarm.chromosome_matrix)
+        np.copyto(untiled.costs, swarm.costs)
+        expected = np.sort(swarm.costs[swarm.moving_cols])[:25]
+        swarm.select()
+        untiled.select()
+
+        # Particles, ancestors and best ancestors line up column by column
+        kept = np.r_[swarm.particles_cols, swarm.ancestors_cols, swarm.best_ancestors_cols]
+        np.testing.assert_array_equal(swarm.chromosome_matrix[:, kept], untiled.chromosome_matrix[:, kept])
+        np.testing.assert_array_equal(swarm.costs[kept], untiled.costs[kept])
+        np.testing.assert_array_equal(swarm.costs[swarm.particles_cols], expected)
+        particles = swarm.chromosome_matrix[swarm.chromosome_rows, swarm.particles_cols]
+        np.testing.assert_array_equal(swarm.costs[swarm.particles_cols], sphere(particles))
+
+
+def test_tiled_profiler_and_checkpoint(tmp_path):
+    profiler = Profiler()
+    full = epso(30, 20, 3, -5, 5, sphere, vectorized=True, seed=3, block_size=25, profiler=profiler)
+    assert [record["evaluations"] for record in profiler.history] == [60] * 20
+
+    path = str(tmp_path)
+    epso(30, 10, 3, -5, 5, sphere, vectorized=True, seed=3, block_size=25, checkpoint=Checkpointer(path, every=10))
+    resumed = epso(30, 20, 3, -5, 5, sphere, vectorized=True, block_size=25, resume=path)
+    np.testing.assert_array_equal(resumed, full)
+
+
+def test_block_size_must_be_positive():
+    with pytest.raises(ValueError):
+        epso(10, 5, 2, -1, 1, sphere, vectorized=True, block_size=0)
@@ -0,0 +1,111 @@
+import numpy as np
+
+from evola.epso import EPSO, epso
+from evola.evaluation import Evaluator
+
+
+class CountingCost:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, chromossome):
+        self.calls += 1
+        return float(np.sum(chromossome**2))
+
+
+def test_cache_skips_repeated_chromosomes():
+    cost = CountingCost()
+    evaluator = Evaluator(cost, cache_size=10)
+    chromosomes = np.array([[1.0, 2.0, 1.0], [0.0, 3.0, 0.0]])
+
+    first = evaluator(chromosomes)
+    second = evaluator(chromosomes[:, ::-1])
+
+    np.testing.assert_array_equal(first, [1.0, 13.0, 1.0])
+    np.testing.assert_array_equal(second, first[::-1])
+    assert cost.calls == 3  # the repeated column in the first block is only a hit from the second block on
+    assert (evaluator.cache_hits, evaluator.cache_misses) == (3, 3)
+
+
+def test_cache_evicts_least_recently_used():
+    cost = CountingCost()
+    evaluator = Evaluator(cost, cache_size=2)
+
+    evaluator(np.array([[1.0, 2.0]]))
+    evaluator(np.array([[1.0]]))  # 1 is now the most recently used
+    evaluator(np.array([[3.0]]))  # evicts 2
+    evaluator(np.array([[1.0, 2.0]]))
+
+    assert cost.calls == 4
+    assert (evaluator.cache_hits, evaluator.cache_misses) == (2, 4)
+
+
+def test_cache_quantization():
+    cost = CountingCost()
+    evaluator = Evaluator(cost, cache_size=10, cache_quantization=0.01)
+
+    first = evaluator(np.array([[0.5, 0.52]]))
+    second = evaluator(np.array([[0.501]]))
+
+    assert cost.calls == 2
+    assert second[0] == first[0]
+
+
+def test_run_cli_reports_cache(capsys):
+    def cost(chromossome):
+        return (chromossome[0] - 3) ** 2 + (chromossome[1] - 7) ** 2
+
+    sim = EPSO(
+        generations=20,
+        size=30,
+        chromossome_length=2,
+        chromossome_low=0,
+        chromossome_high=10,
+        cost_function=cost,
+        cost_function_args=(),
+        chromossome_dtypes=int,
+        cache_size=1000,
+    )
+
+    sim.run_cli(verbose=True)
+
+    evaluator = sim.population.evaluator
+    assert evaluator.cache_hits > 0
+    assert "Cost cache: %d hits" % evaluator.cache_hits in capsys.readouterr().out
+
+
+def test_deduplicate_evaluates_unique_columns_once():
+    cost = CountingCost()
+    evaluator = Evaluator(cost, deduplicate=True, cache_size=10)
+    chromosomes = np.array([[1.0, 2.0, 1.0, 2.0, 5.0], [0.0, 3.0, 0.0, 3.0, 0.0]])
+
+    costs = evaluator(chromosomes)
+
+    np.testing.assert_array_equal(costs, [1.0, 13.0, 1.0, 13.0, 25.0])
+    assert cost.calls == 3
+    assert evaluator.saved_evaluations == 2
+    assert (evaluator.cache_hits, evaluator.cache_misses) == (0, 3)
+    assert "Duplicates: 2 evaluations saved" in evaluator.summary()
+
+
+def test_run_performance_version_deduplicates_boundary_particles(capsys):
+    # The optimum is on the upper bound, so clipped particles pile up on the same vertex
+    def cost(chromossome):
+        return -np.sum(chromossome, axis=0)
+
+    best_solution = epso(
+        swarm_size=50,
+        generations=20,
+        chromosome_length=2,
+        chromosome_low=0,
+        chromosome_high=1,
+        cost_function=cost,
+        vectorized=True,
+        deduplicate=True,
+        verbose=True,
+        seed=5,
+    )
+
+    np.testing.assert_array_equal(best_solution, [1.0, 1.0])
+    saved = int(capsys.readouterr().out.split("Duplicates: ")[1].split()[0])
+    assert saved > 0
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from evola.epso import EPSO, epso
+from evola.profiling import PHASES, Profiler
+
+
+def sphere(chromossome):
+    return float(np.sum(chromossome**2))
+
+
+def test_epso_profiler_times_every_phase():
+    generations, evaluated = [], []
+    profiler = Profiler(
+        on_generation=lambda generation, record: generations.append(generation),
+        on_evaluate=lambda candidates, seconds: evaluated.append(candidates),
+    )
+
+    solution = epso(20, 15, 3, -5, 5, sphere, seed=0, profiler=profiler)
+
+    np.testing.assert_array_equal(solution, epso(20, 15, 3, -5, 5, sphere, seed=0))
+    assert generations == list(range(1, 16))
+    assert evaluated == [40] * 15
+    assert profiler.evaluations == 40 * 15
+    assert len(profiler.history) == 15
+    for phase in PHASES:
+        assert profiler.totals[phase] > 0
+        assert profiler.totals[phase] == pytest.approx(sum(record[phase] for record in profiler.history))
+
+
+def test_academic_profiler(capsys):
+    profiler = Profiler(keep_history=False)
+    sim = EPSO(
+        generations=10,
+        size=20,
+        chromossome_length=2,
+        chromossome_low=-5,
+        chromossome_high=5,
+        cost_function=sphere,
+        cost_function_args=(),
+        profiler=profiler,
+    )
+    sim.run_cli()
+
+    assert (profiler.generations, profiler.evaluations) == (10, 10 * 40)
+    assert profiler.history == []
+    assert "-> Phases: reproduce" in capsys.readouterr().out
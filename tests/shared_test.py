@@ -0,0 +1,119 @@
+import gc
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+from evola import shared as shared_module
+from evola.checkpoint import Checkpointer
+from evola.epso import epso, epso_iter
+from evola.shared import SharedArrays, attach
+
+SHM = "/dev/shm"  # nosec
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+def failing(chromosomes):
+    raise RuntimeError("simulation crashed")
+
+
+def segments():
+    return set(os.listdir(SHM)) if os.path.isdir(SHM) else set()
+
+
+def test_shared_memory_epso_matches_and_cleans_up():
+    before = segments()
+    expected = epso(30, 15, 4, -5, 5, sphere, vectorized=True, seed=0)
+
+    solution = epso(30, 15, 4, -5, 5, sphere, vectorized=True, seed=0, n_workers=2, shared_memory=True)
+    with ThreadPoolExecutor(2) as executor:
+        states = list(
+            epso_iter(30, 15, 4, -5, 5, sphere, vectorized=True, seed=0, executor=executor, shared_memory=True)
+        )
+
+    np.testing.assert_array_equal(solution, expected)
+    assert states[-1].best_cost == float(sphere(expected[:, None])[0])
+    del states
+    gc.collect()
+    assert segments() == before
+
+
+def test_shared_memory_is_released_on_exceptions():
+    before = segments()
+    with pytest.raises(RuntimeError, match="simulation crashed"):
+        epso(10, 5, 2, -1, 1, failing, vectorized=True, n_workers=2, shared_memory=True)
+    assert segments() == before
+
+
+def test_shared_memory_resume(tmp_path):
+    path = str(tmp_path)
+    full = epso(20, 10, 3, -5, 5, sphere, vectorized=True, seed=1)
+    epso(20, 5, 3, -5, 5, sphere, vectorized=True, seed=1, checkpoint=Checkpointer(path, every=5))
+    with ThreadPoolExecutor(2) as executor:
+        resumed = epso(20, 10, 3, -5, 5, sphere, vectorized=True, executor=executor, shared_memory=True, resume=path)
+    np.testing.assert_array_equal(resumed, full)
+
+
+def test_shared_arrays_columns():
+    with SharedArrays() as shared:
+        matrix = shared.create("matrix", (5, 12), np.float64, order="F")
+        assert shared.columns("matrix", matrix[:3, 4:9]) == (3, 4, 9)
+        assert shared.columns("matrix", matrix[:3, 4:5]) == (3, 4, 5)
+        assert shared.columns("matrix", matrix[1:3, 4:9]) is None  # doesn't start at the first row
+        assert shared.columns("matrix", matrix[:3, 4:9].copy()) is None
+        assert shared.columns("matrix", matrix[:3, ::2]) is None
+        assert shared.columns("costs", matrix[:3, 4:9]) is None
+        name = shared.spec("matrix").segment
+        assert os.path.exists(os.path.join(SHM, name)) or not os.path.isdir(SHM)
+    assert not os.path.exists(os.path.join(SHM, name))
+
+    shared = SharedArrays()
+    shared.create("costs", (4,), np.float32)
+    name = shared.spec("costs").segment
+    del shared
+    gc.collect()
+    assert not os.path.exists(os.path.join(SHM, name))
+
+
+def test_shared_memory_needs_workers():
+    with pytest.raises(ValueError):
+        epso(10, 5, 2, -1, 1, sphere, vectorized=True, shared_memory=True)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX segments are tracked")
+def test_workers_untrack_only_segments_of_other_processes(monkeypatch):
+    untracked = []
+
+    def legacy_shared_memory(name=None, create=False, size=0, **kwargs):
+        if kwargs:  # as before Python 3.13, which always tracks the segment
+            raise TypeError("unexpected keyword argument 'track'")
+        return SharedMemory(name=name, create=create, size=size, track=False)
+
+    with SharedArrays() as arrays:
+        arrays.create("costs", (4,), np.float64)
+        name = arrays.spec("costs").segment
+        monkeypatch.setattr(shared_module, "SharedMemory", legacy_shared_memory)
+        monkeypatch.setattr(shared_module.resource_tracker, "unregister", lambda *args: untracked.append(args))
+
+        # The creating process (and its threads) keeps the segment tracked
+        shared_module._open(name).close()
+        assert untracked == []
+        # A process with a tracker of its own untracks it
+        monkeypatch.setattr(shared_module, "_created", set())
+        shared_module._open(name).close()
+        assert [args[1] for args in untracked] == ["shared_memory"]
+
+
+def test_threads_attach_concurrently():
+    with SharedArrays() as arrays:
+        arrays.create("matrix", (3, 8), np.float64, order="F")[...] = 1
+        arrays.create("costs", (8,), np.float64)
+        specs = (arrays.spec("matrix"), arrays.spec("costs"))
+        with ThreadPoolExecutor(8) as executor:
+            attached = list(executor.map(lambda _: attach(specs), range(64)))
+        assert all(matrix.sum() == 24 and costs.shape == (8,) for matrix, costs in attached)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from evola.epso import EPSO, epso
+from evola.stopping import EarlyStopping
+
+
+def wingo(chromossome):
+    x = chromossome[0]
+    return (x**6) - 52 / 25 * (x**5) + 39 / 80 * (x**4) + 71 / 10 * (x**3) - 79 / 20 * (x**2) - x + 1 / 10
+
+
+def sphere(chromossome):
+    return float(np.sum(chromossome**2))
+
+
+def test_target_cost():
+    stopping = EarlyStopping(target_cost=-7.4)
+    solution = epso(100, 200, 1, -2, 10, wingo, stopping=stopping, seed=0)
+
+    assert stopping.reason == "target_cost"
+    assert stopping.generation < 200
+    assert wingo(solution) <= -7.4
+
+
+def test_stagnation():
+    stopping = EarlyStopping(patience=5, tol=1e-6)
+    epso(50, 1000, 1, -2, 10, wingo, stopping=stopping, seed=1)
+
+    assert stopping.reason == "stagnation"
+    assert stopping.generation < 1000
+
+
+def test_swarm_collapse():
+    stopping = EarlyStopping(min_spread=1e-3)
+    epso(20, 1000, 2, -5, 5, sphere, stopping=stopping, seed=2)
+
+    assert stopping.reason == "swarm_collapse"
+
+
+def test_max_evaluations_and_time_limit():
+    stopping = EarlyStopping(max_evaluations=500)
+    epso(50, 100, 1, -2, 10, wingo, stopping=stopping, seed=3)
+
+    assert stopping.reason == "max_evaluations"
+    assert (stopping.generation, stopping.evaluations) == (5, 500)  # 2 * swarm_size evaluations per generation
+
+    stopping = EarlyStopping(time_limit=1e-9)
+    epso(50, 100, 1, -2, 10, wingo, stopping=stopping, seed=3)
+
+    assert (stopping.reason, stopping.generation) == ("time_limit", 1)
+
+
+def test_no_criterion_met():
+    stopping = EarlyStopping(target_cost=-100)
+    epso(10, 5, 1, -2, 10, wingo, stopping=stopping, seed=4)
+
+    assert (stopping.reason, stopping.generation) == (None, 5)
+
+
+def test_invalid_criteria():
+    with pytest.raises(ValueError):
+        EarlyStopping(patience=0)
+    with pytest.raises(ValueError):
+        EarlyStopping(time_limit=0)
+
+
+def test_academic_version_stops_early(capsys):
+    stopping = EarlyStopping(patience=5, tol=1e-6)
+    sim = EPSO(
+        generations=500,
+        size=50,
+        chromossome_length=1,
+        chromossome_low=-2,
+        chromossome_high=10,
+        cost_function=wingo,
+        cost_function_args=(),
+        seed=5,
+        stopping=stopping,
+    )
+    sim.run_cli(verbose=False)
+
+    assert sim.stop_reason == "stagnation"
+    assert len(sim.cost_history) == stopping.generation < 500
+
+    results = sim.run_replicates(2, verbose=True)
+    assert all(result.stop_reason == "stagnation" for result in results)
+    assert all(len(result.best_history) < 500 for result in results)
+    assert "Stopped early (stagnation)" in capsys.readouterr().out
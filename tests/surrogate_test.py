@@ -0,0 +1,86 @@
+import math
+
+import numpy as np
+import pytest
+
+from evola.epso import epso, epso_iter
+from evola.surrogate import Surrogate, spearman
+
+
+def sphere(chromosomes):
+    return np.sum(chromosomes**2, axis=0)
+
+
+class CountingSphere:
+    def __init__(self):
+        self.evaluations = 0
+
+    def __call__(self, chromosomes):
+        self.evaluations += chromosomes.shape[1]
+        return sphere(chromosomes)
+
+
+def test_surrogate_saves_evaluations(capsys):
+    cost = CountingSphere()
+    surrogate = Surrogate(screen=0.3, exploration=0.1, seed=0)
+
+    solution = epso(40, 60, 5, -5, 5, cost, vectorized=True, seed=0, surrogate=surrogate, verbose=True)
+
+    assert sphere(solution) < 1e-3
+    assert surrogate.evaluations == cost.evaluations
+    assert surrogate.candidates == 80 * 61
+    assert 0.4 < surrogate.savings < 0.7
+    assert len(surrogate.history) == surrogate.generations == 60
+    assert sum(record["candidates"] for record in surrogate.history) == 80 * 60
+    late = [record["correlation"] for record in surrogate.history[10:]]
+    assert np.mean(late) > 0.5
+    assert "Surrogate: %d of 4880 candidates evaluated" % cost.evaluations in capsys.readouterr().out
+
+
+def test_screening_everything_changes_nothing():
+    surrogate = Surrogate(screen=1.0, exploration=0.0, min_samples=10)
+    states = list(epso_iter(20, 15, 3, -5, 5, sphere, vectorized=True, seed=1, surrogate=surrogate, block_size=15))
+
+    assert surrogate.savings == 0
+    np.testing.assert_array_equal(
+        states[-1].best_chromosome, epso(20, 15, 3, -5, 5, sphere, vectorized=True, seed=1, block_size=15)
+    )
+
+
+def test_screened_out_candidates_are_never_selected():
+    surrogate = Surrogate(screen=0.5, exploration=0.0, min_samples=20, seed=2)
+    for state in epso_iter(20, 30, 3, -5, 5, sphere, vectorized=True, seed=2, surrogate=surrogate, cost_views=True):
+        assert state.costs is not None and np.all(np.isfinite(state.costs))
+
+
+def test_spearman():
+    assert spearman(np.array([1.0, 2.0, 3.0]), np.array([10.0, 40.0, 90.0])) == pytest.approx(1)
+    assert spearman(np.array([1.0, 2.0, 3.0]), np.array([3.0, 2.0, 1.0])) == pytest.approx(-1)
+    assert math.isnan(spearman(np.array([1.0]), np.array([1.0])))
+    assert math.isnan(spearman(np.array([1.0, 1.0]), np.array([1.0, 2.0])))
+
+
+def test_invalid_surrogate():
+    with pytest.raises(ValueError):
+        Surrogate(screen=0)
+    with pytest.raises(ValueError):
+        Surrogate(exploration=1.5)
+    with pytest.raises(ValueError):
+        Surrogate(neighbours=0)
+    with pytest.raises(ValueError):
+        Surrogate(min_samples=100, capacity=50)
+
+
+def test_seeded_runs_with_a_surrogate_repeat():
+    def run(seed):
+        return epso(20, 30, 3, -5, 5, sphere, vectorized=True, seed=seed, surrogate=Surrogate(min_samples=20))
+
+    np.testing.assert_array_equal(run(5), run(5))
+    assert not np.array_equal(run(5), run(6))
+
+    np.random.seed(3)
+    first = epso(20, 30, 3, -5, 5, sphere, vectorized=True, surrogate=Surrogate(min_samples=20))
+    np.random.seed(3)
+    np.testing.assert_array_equal(
+        epso(20, 30, 3, -5, 5, sphere, vectorized=True, surrogate=Surrogate(min_samples=20)), first
+    )